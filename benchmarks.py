@@ -0,0 +1,613 @@
+import argparse
+import asyncio
+import atexit
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import challenges
+import compact_graph
+import grid_analysis
+import scheduling
+from compact_graph import CompactGraph
+from generators import (barabasi_albert_edges, chain_edges, erdos_renyi_edges, grid_edges, random_dag_edges,
+                        random_grid, random_words)
+from graph import Graph
+from parallel_bfs import ParallelBfs
+from query_service import QueryService
+from reachability import ReachabilityIndex
+from tiled_grid import TiledGrid
+from word_ladder import WordLadderIndex
+
+
+def timed(function, *args):
+    """
+    Call function(*args) and time it.
+    Returns:
+    tuple: The return value and the elapsed seconds.
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def traced(function, *args):
+    """
+    Call function(*args) while tracing allocations. Tracing slows the call down, so time it separately.
+    Returns:
+    tuple: The return value and the peak bytes allocated during the call.
+    """
+    tracemalloc.start()
+    result = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+
+def build_graph(edges, is_directed=True):
+    graph = Graph(is_directed=is_directed)
+    for vertex_id1, vertex_id2 in edges:
+        graph.add_edge(vertex_id1, vertex_id2)
+    return graph
+
+
+def compare_backends(num_vertices=100000, num_edges=1000000, seed=0):
+    """
+    Compare memory use and shortest-path throughput of Graph against CompactGraph
+    on the same random directed graph, and print the results.
+    """
+    edges = erdos_renyi_edges(num_vertices, num_edges, seed)
+
+    graph, graph_time = timed(build_graph, edges)
+    compact, compact_time = timed(CompactGraph.from_edges, edges)
+    _, graph_bytes = traced(build_graph, edges)
+    _, compact_bytes = traced(CompactGraph.from_edges, edges)
+    print(f'{num_vertices} vertices, {num_edges} edges')
+    print(f'build   Graph: {graph_time:.2f}s {graph_bytes / num_edges:.0f} B/edge')
+    print(f'build   CompactGraph: {compact_time:.2f}s {compact_bytes / num_edges:.0f} B/edge '
+          f'({compact.nbytes() / num_edges:.1f} B/edge in adjacency arrays)')
+
+    rng = random.Random(seed)
+    queries = [(rng.randrange(num_vertices), rng.randrange(num_vertices)) for _ in range(20)]
+    queries = [(a, b) for a, b in queries if graph.contains_id(a) and graph.contains_id(b)]
+    for name, backend in (('Graph', graph), ('CompactGraph', compact)):
+        start = time.perf_counter()
+        for start_id, target_id in queries:
+            backend.find_shortest_path(start_id, target_id)
+        elapsed = time.perf_counter() - start
+        print(f'shortest path   {name}: {len(queries) / elapsed:.1f} queries/s')
+
+
+def compare_path_engines(size=300, seed=0):
+    """
+    Compare BFS, Dijkstra and A* point-to-point queries on a grid, for both backends, and print the results.
+    Dijkstra runs on the same unit-weight grid as BFS, and A* on a weighted grid with a
+    Manhattan-distance heuristic (a lower bound, since every weight is at least 1).
+    """
+    unit = build_graph(grid_edges(size, size), is_directed=False)
+    weighted = Graph(is_directed=False)
+    weighted.add_weighted_edges_from(grid_edges(size, size, seed, max_weight=10))
+    compact_unit = CompactGraph.from_graph(unit)
+    compact_weighted = CompactGraph.from_graph(weighted)
+
+    def manhattan(vertex_id, target_id):
+        return abs(vertex_id[0] - target_id[0]) + abs(vertex_id[1] - target_id[1])
+
+    rng = random.Random(seed)
+    queries = [((rng.randrange(size), rng.randrange(size)), (rng.randrange(size), rng.randrange(size)))
+               for _ in range(10)]
+
+    runs = (
+        ('BFS', lambda graph, a, b: graph.find_shortest_path(a, b), unit, compact_unit),
+        ('Dijkstra (unit weights)', lambda graph, a, b: graph.find_cheapest_path(a, b), unit, compact_unit),
+        ('Dijkstra (weighted)', lambda graph, a, b: graph.find_cheapest_path(a, b), weighted, compact_weighted),
+        ('A* (weighted)', lambda graph, a, b: graph.find_cheapest_path(a, b, manhattan), weighted, compact_weighted),
+    )
+    print(f'{size}x{size} grid')
+    for name, query, graph, compact in runs:
+        for backend_name, backend in (('Graph', graph), ('CompactGraph', compact)):
+            start = time.perf_counter()
+            for start_id, target_id in queries:
+                query(backend, start_id, target_id)
+            elapsed = time.perf_counter() - start
+            print(f'{name}   {backend_name}: {len(queries) / elapsed:.1f} queries/s')
+
+
+def compare_batched_bfs(num_vertices=20000, num_edges=200000, num_queries=512, depth=5, seed=0):
+    """
+    Compare answering many "who is exactly `depth` hops away" queries one at a time against
+    the bit-parallel batch API, and print the throughput of each. Batching pays off once the
+    searches overlap, i.e. when each one reaches a large part of the graph; for shallow searches
+    that stay far apart, one BFS per query is faster.
+    """
+    compact = CompactGraph.from_edges(erdos_renyi_edges(num_vertices, num_edges, seed))
+    rng = random.Random(seed)
+    start_ids = [compact.get_id(rng.randrange(compact.num_vertices())) for _ in range(num_queries)]
+
+    single, single_time = timed(lambda: [compact.find_vertices_n_away(start_id, depth) for start_id in start_ids])
+    batched, batched_time = timed(compact.batch_vertices_n_away, start_ids, depth)
+    assert [sorted(result) for result in single] == [sorted(result) for result in batched]
+
+    print(f'{num_queries} {depth}-hop queries on {num_vertices} vertices, {num_edges} edges')
+    print(f'one at a time: {num_queries / single_time:.0f} queries/s')
+    print(f'batched: {num_queries / batched_time:.0f} queries/s')
+
+
+def compare_bfs_directions(num_vertices=200000, edges_per_vertex=8, num_sources=5, seed=0):
+    """
+    Run full BFS traversals of Barabasi-Albert graphs (undirected and directed) top-down,
+    bottom-up and direction-optimizing, and print the edges each examined and the time taken.
+    """
+    edges = barabasi_albert_edges(num_vertices, edges_per_vertex, seed)
+    rng = random.Random(seed)
+    for is_directed in (False, True):
+        compact = CompactGraph.from_edges(edges, is_directed)
+        compact.transpose()  # built once, outside the timings
+        # directed edges point from newer to older vertices, so start from the newest ones
+        start_ids = [compact.get_id(rng.randrange(compact.num_vertices() - 100, compact.num_vertices()))
+                     for _ in range(num_sources)]
+        print(f'{"directed" if is_directed else "undirected"}: {compact.num_vertices()} vertices, '
+              f'{compact.num_edges()} edges')
+        for direction in (compact_graph.TOP_DOWN, compact_graph.BOTTOM_UP, compact_graph.DIRECTION_OPTIMIZING):
+            results, elapsed = timed(lambda: [compact.bfs_tree(start_id, direction=direction) for start_id in start_ids])
+            examined = sum(result[2] for result in results) / num_sources
+            print(f'{direction}: {examined:.0f} edges examined, {1000 * elapsed / num_sources:.0f}ms per search')
+
+
+def compare_grid_engines(size=10000, seed=0):
+    """
+    Time region counting, region labeling and spread time on a random `size` x `size` grid, and print the results.
+    """
+    land = random_grid(size, size, fill=0.4, seed=seed)
+    oranges = random_grid(size, size, fill=0.9, seed=seed)
+    oranges[size // 2] = oranges[size // 2][:size // 2] + b'\x02' + oranges[size // 2][size // 2 + 1:]
+
+    print(f'{size}x{size} grid')
+    count, elapsed = timed(grid_analysis.count_regions, land)
+    print(f'count_regions: {count} regions in {elapsed:.2f}s')
+    (count, _), elapsed = timed(grid_analysis.label_regions, land, 1, 8)
+    print(f'label_regions (8-connectivity): {count} regions in {elapsed:.2f}s')
+    steps, elapsed = timed(grid_analysis.spread_time, oranges)
+    print(f'spread_time: {steps} steps in {elapsed:.2f}s')
+
+
+def compare_tiled_grid(size=4000, tile_rows=256, seed=0):
+    """
+    Compare peak memory and time of the in-memory and tiled grid engines on a random `size` x `size`
+    grid, and print the results.
+    """
+    land = random_grid(size, size, fill=0.4, seed=seed)
+    directory = tempfile.mkdtemp()
+    try:
+        tiled = TiledGrid.create(os.path.join(directory, 'grid'), land, tile_rows)
+        print(f'{size}x{size} grid, tiles of {tile_rows} rows')
+        for name, function in (('in-memory', grid_analysis.count_regions), ('tiled', TiledGrid.count_regions)):
+            source = land if name == 'in-memory' else tiled
+            count, elapsed = timed(function, source)
+            _, peak = traced(function, source)
+            print(f'{name} count_regions: {count} regions in {elapsed:.2f}s, peak {peak / 2 ** 20:.1f} MiB')
+    finally:
+        shutil.rmtree(directory)
+
+
+def time_word_ladders(num_words=100000, word_length=5, num_queries=200, seed=0):
+    """
+    Time building a word ladder index over random words from a 16-letter alphabet and answering
+    random queries against it, and print the results.
+    """
+    words = random_words(num_words, word_length, seed=seed)
+    index, elapsed = timed(WordLadderIndex, words)
+    print(f'{len(words)} words indexed in {elapsed:.2f}s')
+
+    rng = random.Random(seed)
+
+    queries = [(rng.choice(words), rng.choice(words)) for _ in range(num_queries)]
+    lengths, elapsed = timed(lambda: [index.ladder_length(begin, end) for begin, end in queries])
+    print(f'{num_queries} ladders, average length {sum(lengths) / num_queries:.1f}, '
+          f'{1000 * elapsed / num_queries:.2f}ms per query')
+
+
+def time_scheduler(num_tasks=300000, num_prerequisites=1000000, seed=0):
+    """Time scheduling a random dependency DAG into concurrent levels, and print the results."""
+    pairs = [[task, prerequisite] for prerequisite, task in random_dag_edges(num_tasks, num_prerequisites, seed)]
+
+    plan, elapsed = timed(scheduling.schedule, num_tasks, pairs)
+    print(f'{num_tasks} tasks, {num_prerequisites} prerequisites scheduled in {elapsed:.2f}s: '
+          f'{plan.get_critical_path_length()} levels, at most {plan.get_max_width()} tasks at once')
+
+
+def compare_parallel_bfs(num_vertices=1000000, num_edges=10000000, num_sources=64, seed=0):
+    """
+    Time a single-source and a many-source BFS on a random directed graph with 1, 2, 4, ...
+    worker processes up to the number of CPUs, and print the speedup over one process.
+    """
+    compact = CompactGraph.from_edges(erdos_renyi_edges(num_vertices, num_edges, seed))
+    sources = [compact.get_id(index) for index in range(min(num_sources, compact.num_vertices()))]
+    start_id = sources[0]
+    print(f'{compact.num_vertices()} vertices, {compact.num_edges()} edges, {os.cpu_count()} CPUs')
+
+    counts = [1]
+    while counts[-1] * 2 <= (os.cpu_count() or 1):
+        counts.append(counts[-1] * 2)
+    baseline = None
+    for processes in counts:
+        with ParallelBfs(compact, processes) as bfs:
+            _, single = timed(bfs.find_distances, start_id)
+            _, many = timed(bfs.find_many_distances, sources)
+        baseline = baseline or (single, many)
+        print(f'{processes} processes: single source {single:.2f}s ({baseline[0] / single:.1f}x), '
+              f'{len(sources)} sources {many:.2f}s ({baseline[1] / many:.1f}x)')
+
+
+def compare_reachability(num_vertices=100000, num_edges=150000, num_queries=1000, seed=0):
+    """
+    Time reachability queries on a random directed graph answered by depth-first search, by the
+    index's transitive closure and by its interval labels, and print the results.
+    """
+    graph = build_graph(erdos_renyi_edges(num_vertices, num_edges, seed))
+    rng = random.Random(seed)
+    graph_ids = [vertex.get_id() for vertex in graph.get_vertices()]
+    queries = [(rng.choice(graph_ids), rng.choice(graph_ids)) for _ in range(num_queries)]
+
+    searches = queries[:max(1, num_queries // 100)]  # each one can cost a whole traversal
+    _, elapsed = timed(lambda: [graph.find_path_dfs_iter(start, target) for start, target in searches])
+    print(f'find_path_dfs_iter: {1000000 * elapsed / len(searches):.1f}us per query')
+
+    for name, max_bytes in (('closure', 1 << 40), ('labels', 0)):
+        index, build = timed(ReachabilityIndex, graph, max_bytes)
+        _, elapsed = timed(lambda: [index.reachable(start, target) for start, target in queries])
+        print(f'{name}: built in {build:.2f}s, {index.nbytes()} bytes, '
+              f'{1000000 * elapsed / num_queries:.1f}us per query')
+
+
+def time_query_service(num_vertices=20000, num_edges=100000, num_clients=200, seed=0):
+    """
+    Send shortest path requests from many concurrent asyncio clients, mixed with as many cheap
+    reachability requests, and print their median and tail latency (from when all the clients
+    start) when the paths are found one at a time on the event loop and by the QueryService.
+    """
+    graph = build_graph(erdos_renyi_edges(num_vertices, num_edges, seed))
+    rng = random.Random(seed)
+    graph_ids = graph.get_vertex_ids()
+    queries = [(rng.choice(graph_ids), rng.choice(graph_ids)) for _ in range(num_clients)]
+    reachability = ReachabilityIndex(graph)
+
+    async def on_loop(start, target):
+        await asyncio.sleep(0)
+        return graph.find_shortest_path(start, target)
+
+    async def reachable(start, target):
+        await asyncio.sleep(0)
+        return reachability.reachable(start, target)
+
+    async def clients(find_path, is_reachable):
+        begin = time.perf_counter()
+
+        async def client(query, start, target):
+            await query(start, target)
+            return time.perf_counter() - begin
+
+        requests = [client(query, start, target) for start, target in queries
+                    for query in (find_path, is_reachable)]
+        latencies = await asyncio.gather(*requests)
+        return sorted(latencies[0::2]), sorted(latencies[1::2])
+
+    async def batched():
+        async with QueryService(graph) as service:
+            return await clients(service.find_shortest_path, service.reachable)
+
+    def percentiles(latencies):
+        return (f'median {1000 * latencies[len(latencies) // 2]:.0f}ms, '
+                f'p99 {1000 * latencies[int(len(latencies) * 0.99)]:.0f}ms')
+
+    for name, run in (('on the event loop', lambda: clients(on_loop, reachable)), ('QueryService', batched)):
+        paths, reachable_latencies = asyncio.run(run())
+        print(f'{name}, {num_clients} clients: paths {percentiles(paths)}; '
+              f'reachability {percentiles(reachable_latencies)}')
+
+
+# Benchmark suite: every public Graph method and challenge function on generated workloads.
+# Sizes are multiplied by the scale factor; grids grow by its square root to keep cell counts in step.
+SCALES = {'small': 1, 'medium': 10, 'large': 100}
+DEFAULT_TOLERANCE = 0.25
+
+
+def quietly(function, *args):
+    """Call function(*args) with its printing discarded."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+def build_weighted_graph(edges, is_directed=False):
+    graph = Graph(is_directed=is_directed)
+    graph.add_weighted_edges_from(edges)
+    return graph
+
+
+def benchmark_cases(scale=1, seed=0):
+    """
+    Return the suite's benchmark cases at a scale.
+    Returns:
+    list<tuple>: (name, setup, run) triples. `setup()` builds the inputs, untimed, and returns the
+        arguments for `run`, which does the work being measured.
+    """
+    num_vertices = 2000 * scale
+    num_edges = 10000 * scale
+    side = int(60 * scale ** 0.5)
+    rng = random.Random(seed)
+
+    def random_graph(is_directed=True):
+        return build_graph(erdos_renyi_edges(num_vertices, num_edges, seed), is_directed)
+
+    def queries(graph, method, count, *extra):
+        graph_ids = [vertex.get_id() for vertex in graph.get_vertices()]
+        starts = [(rng.choice(graph_ids), rng.choice(graph_ids)) for _ in range(count)]
+        return lambda: [getattr(graph, method)(start, target, *extra) for start, target in starts]
+
+    def grid_graph():
+        return build_weighted_graph(grid_edges(side, side, seed, max_weight=10))
+
+    def oranges():
+        grid = random_grid(side * 4, side * 4, fill=0.9, seed=seed)
+        grid[0] = b'\x02' + grid[0][1:]
+        return grid
+
+    def word_queries():
+        words = random_words(5000 * scale, seed=seed)
+        return words, [(rng.choice(words), rng.choice(words)) for _ in range(20)]
+
+    def indexed_word_queries():
+        words, ladders = word_queries()
+        return WordLadderIndex(words), ladders
+
+    def reachability_queries():
+        graph = random_graph()
+        index = ReachabilityIndex(graph)
+        graph_ids = graph.get_vertex_ids()
+        starts = [(rng.choice(graph_ids), rng.choice(graph_ids)) for _ in range(1000)]
+        return lambda: [index.reachable(start, target) for start, target in starts]
+
+    def call(function):
+        return function()
+
+    def graph_edges(graph):
+        return [(vertex.get_id(), neighbor.get_id()) for vertex in graph.get_vertices()
+                for neighbor in vertex.get_neighbors()]
+
+    def edge_churn():
+        graph = random_graph()
+        edges = rng.sample(graph_edges(graph), num_edges // 10)
+
+        def churn():
+            for vertex_id1, vertex_id2 in edges:
+                graph.remove_edge(vertex_id1, vertex_id2)
+            graph.add_edges_from(edges)  # put them back for the next run
+        return churn
+
+    def vertex_churn():
+        graph = random_graph()
+        graph.enable_reverse_index()
+        vertex_ids = rng.sample(graph.get_vertex_ids(), num_vertices // 10)
+        edges = graph_edges(graph)
+
+        def churn():
+            for vertex_id in vertex_ids:
+                graph.remove_vertex(vertex_id)
+            graph.add_edges_from(edges)  # put them back for the next run
+        return churn
+
+    def indexed_graph():
+        graph = random_graph()
+        graph.enable_reverse_index()
+        return graph
+
+    def per_vertex(graph, method, *extra):
+        graph_ids = rng.sample(graph.get_vertex_ids(), 200)
+        return lambda: [getattr(graph, method)(vertex_id, *extra) for vertex_id in graph_ids]
+
+    def half_of(graph):
+        return graph, graph.get_vertex_ids()[::2]
+
+    def shrunk_graph():
+        graph = random_graph(False)
+        for vertex_id in graph.get_vertex_ids()[::2]:
+            graph.remove_vertex(vertex_id)
+        return graph
+
+    def add_vertices(vertex_ids):
+        graph = Graph()
+        for vertex_id in vertex_ids:
+            graph.add_vertex(vertex_id)
+        return graph
+
+    return [
+        ('Graph.add_edges_from (Erdos-Renyi)',
+         lambda: (erdos_renyi_edges(num_vertices, num_edges, seed),),
+         lambda edges: Graph().add_edges_from(edges)),
+        ('Graph.add_edges_from (Barabasi-Albert)',
+         lambda: (barabasi_albert_edges(num_vertices, 5, seed),),
+         lambda edges: Graph(is_directed=False).add_edges_from(edges)),
+        ('Graph.add_vertex', lambda: (range(num_vertices * 5),), add_vertices),
+        ('Graph.add_edge (Erdos-Renyi)', lambda: (erdos_renyi_edges(num_vertices, num_edges, seed),), build_graph),
+        ('Graph.from_edge_list (TSV)',
+         lambda: (write_edge_list(erdos_renyi_edges(num_vertices, num_edges, seed)),),
+         lambda path: Graph.from_edge_list(path, parse_id=int)),
+        ('Graph.add_weighted_edges_from (grid)',
+         lambda: (grid_edges(side, side, seed, max_weight=10),),
+         build_weighted_graph),
+        ('Graph.remove_edge (churn, with re-adding)', lambda: (edge_churn(),), call),
+        ('Graph.remove_vertex (churn with reverse index, with re-adding)', lambda: (vertex_churn(),), call),
+        ('Graph.compact (half the vertices removed)', lambda: (shrunk_graph(),), Graph.compact),
+        ('Graph.save', lambda: (random_graph(),), save_to_temporary_file),
+        ('Graph.bfs_traversal', lambda: (random_graph(), 0), lambda graph, start: quietly(graph.bfs_traversal, start)),
+        ('Graph.dfs_traversal', lambda: (random_graph(), 0), lambda graph, start: quietly(graph.dfs_traversal, start)),
+        ('Graph.iter_bfs', lambda: (random_graph(), 0), lambda graph, start: list(graph.iter_bfs(start))),
+        ('Graph.iter_dfs', lambda: (random_graph(), 0), lambda graph, start: list(graph.iter_dfs(start))),
+        ('Graph.find_shortest_path', lambda: (queries(random_graph(), 'find_shortest_path', 20),), call),
+        ('Graph.find_shortest_path (bidirectional)',
+         lambda: (queries(build_graph(barabasi_albert_edges(num_vertices, 5, seed), False),
+                          'find_shortest_path', 20, True),),
+         call),
+        ('Graph.find_cheapest_path (grid)', lambda: (queries(grid_graph(), 'find_cheapest_path', 5),), call),
+        ('Graph.find_path_costs (grid)', lambda: (grid_graph(), (0, 0)), lambda graph, start: graph.find_path_costs(start)),
+        ('Graph.find_vertices_n_away', lambda: (random_graph(), 0), lambda graph, start: graph.find_vertices_n_away(start, 4)),
+        ('Graph.find_path_dfs_iter', lambda: (queries(random_graph(), 'find_path_dfs_iter', 20),), call),
+        ('CompactGraph.bfs_tree (Barabasi-Albert, direction-optimizing)',
+         lambda: (CompactGraph.from_edges(barabasi_albert_edges(num_vertices * 5, 8, seed), is_directed=False), 0),
+         lambda graph, start: graph.bfs_tree(start)),
+        ('Graph.get_predecessors (reverse index)', lambda: (per_vertex(indexed_graph(), 'get_predecessors'),), call),
+        ('Graph.get_degrees (reverse index)', lambda: (indexed_graph(),), Graph.get_degrees),
+        ('Graph.get_degrees (no reverse index)', lambda: (random_graph(),), Graph.get_degrees),
+        ('Graph.find_descendants', lambda: (per_vertex(random_graph(), 'find_descendants', 3),), call),
+        ('Graph.find_ancestors (reverse index)', lambda: (per_vertex(indexed_graph(), 'find_ancestors', 3),), call),
+        ('Graph.subgraph_view (connected components of half the vertices)', lambda: half_of(random_graph(False)),
+         lambda graph, vertex_ids: graph.subgraph_view(vertex_ids).find_connected_components()),
+        ('Graph.induced_subgraph (half the vertices)', lambda: half_of(random_graph()), Graph.induced_subgraph),
+        ('Graph.find_connected_components', lambda: (random_graph(False),), Graph.find_connected_components),
+        ('Graph.is_bipartite (grid)', lambda: (grid_graph(),), Graph.is_bipartite),
+        ('Graph.find_bipartition (grid)', lambda: (grid_graph(),), Graph.find_bipartition),
+        ('Graph.find_odd_cycle', lambda: (random_graph(False),), Graph.find_odd_cycle),
+        ('Graph.depth_first_search (chain)',
+         lambda: (build_graph(chain_edges(num_vertices * 5)),), Graph.depth_first_search),
+        ('Graph.contains_cycle (random DAG)',
+         lambda: (build_graph(random_dag_edges(num_vertices, num_edges, seed)),), Graph.contains_cycle),
+        ('Graph.topological_sort (random DAG)',
+         lambda: (build_graph(random_dag_edges(num_vertices, num_edges, seed)),), Graph.topological_sort),
+        ('ReachabilityIndex (random DAG)',
+         lambda: (build_graph(random_dag_edges(num_vertices, num_edges, seed)),), ReachabilityIndex),
+        ('ReachabilityIndex.reachable', lambda: (reachability_queries(),), call),
+        ('challenges.numIslands',
+         lambda: (random_grid(side * 4, side * 4, fill=0.4, seed=seed),), challenges.numIslands),
+        ('challenges.timeToRot', lambda: (oranges(),), challenges.timeToRot),
+        ('challenges.courseOrder',
+         lambda: (num_vertices, [[task, prerequisite]
+                                 for prerequisite, task in random_dag_edges(num_vertices, num_edges, seed)]),
+         challenges.courseOrder),
+        ('challenges.wordLadderLength', word_queries,
+         lambda words, ladders: [challenges.wordLadderLength(begin, end, words) for begin, end in ladders[:2]]),
+        ('WordLadderIndex.ladder_length', indexed_word_queries,
+         lambda index, ladders: [index.ladder_length(begin, end) for begin, end in ladders]),
+    ]
+
+
+def save_to_temporary_file(graph):
+    descriptor, path = tempfile.mkstemp(suffix='.graph')
+    os.close(descriptor)
+    try:
+        graph.save(path)
+    finally:
+        os.remove(path)
+
+
+def write_edge_list(edges):
+    """Write edges to a temporary TSV edge-list file, removed when the interpreter exits, and return its path."""
+    descriptor, path = tempfile.mkstemp(suffix='.tsv')
+    with os.fdopen(descriptor, 'w') as edge_file:
+        edge_file.writelines(f'{vertex_id1}\t{vertex_id2}\n' for vertex_id1, vertex_id2 in edges)
+    atexit.register(os.remove, path)
+    return path
+
+
+def run_suite(scale=1, repeat=3, only=None, seed=0, report=print):
+    """
+    Time every benchmark case and trace its peak memory.
+    Parameters:
+    scale (integer): Multiplies the size of every workload.
+    repeat (integer): How many timed runs each case gets; the fastest counts.
+    only (string): Run just the cases whose name contains this text.
+    seed (integer): Seeds every generator, so runs are comparable.
+    report (callable): Called with a line of text as each case finishes.
+    Returns:
+    dict: The best and mean seconds and peak bytes of each case, by name.
+    """
+    results = {}
+    for name, setup, run in benchmark_cases(scale, seed):
+        if only and only not in name:
+            continue
+        arguments = setup()
+        times = [timed(run, *arguments)[1] for _ in range(repeat)]
+        _, peak = traced(run, *arguments)
+        results[name] = {'seconds': min(times), 'mean_seconds': sum(times) / len(times), 'peak_bytes': peak}
+        report(f'{name}: {min(times) * 1000:.1f}ms (mean {sum(times) / len(times) * 1000:.1f}ms), '
+               f'peak {peak / 2 ** 20:.1f} MiB')
+    return results
+
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare suite results against an earlier run.
+    Parameters:
+    results (dict): The results of `run_suite`.
+    baseline (dict): Earlier results; cases missing from either side are skipped.
+    tolerance (float): How much slower (or hungrier), as a fraction, a case may get.
+    Returns:
+    list<string>: A description of every case that got slower or used more memory beyond the tolerance.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for measure, unit in (('seconds', 's'), ('peak_bytes', ' bytes')):
+            before, after = baseline[name][measure], result[measure]
+            if before and after > before * (1 + tolerance):
+                regressions.append(f'{name}: {measure} {before:.4g}{unit} -> {after:.4g}{unit} '
+                                   f'({after / before - 1:+.0%})')
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description='Benchmark the graph algorithms and challenges.')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='workload size')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case; the fastest counts')
+    parser.add_argument('--only', help='run just the cases whose name contains this text')
+    parser.add_argument('--seed', type=int, default=0, help='seed for the workload generators')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='a JSON file from an earlier run to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown or memory growth against the baseline, as a fraction')
+    parser.add_argument('--comparisons', action='store_true',
+                        help='run the side-by-side engine comparisons instead of the suite')
+    options = parser.parse_args(arguments)
+
+    if options.comparisons:
+        compare_backends()
+        compare_path_engines()
+        compare_batched_bfs()
+        compare_bfs_directions()
+        compare_grid_engines()
+        compare_tiled_grid()
+        time_word_ladders()
+        time_scheduler()
+        compare_parallel_bfs()
+        compare_reachability()
+        time_query_service()
+        return 0
+
+    results = run_suite(SCALES[options.scale], options.repeat, options.only, options.seed)
+    if options.output:
+        with open(options.output, 'w') as out:
+            json.dump({'scale': options.scale, 'seed': options.seed, 'python': platform.python_version(),
+                       'results': results}, out, indent=2, sort_keys=True)
+
+    if options.baseline:
+        with open(options.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('scale') != options.scale:
+            print(f"warning: baseline was run at scale {baseline.get('scale')!r}, not {options.scale!r}")
+        regressions = find_regressions(results, baseline['results'], options.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,942 @@
+from array import array
+from collections import deque
+from heapq import heappop, heappush
+from itertools import chain
+
+import graph_io
+
+INFINITY = float('inf')
+BFS_BATCH_SIZE = 256  # searches run together by the bit-parallel BFS
+
+# BFS directions: scan the frontier's out-edges, scan the unvisited vertices' in-edges, or pick per level
+TOP_DOWN = 'top_down'
+BOTTOM_UP = 'bottom_up'
+DIRECTION_OPTIMIZING = 'auto'
+BOTTOM_UP_ALPHA = 14  # go bottom-up once the frontier has over 1/alpha of the unexplored edges
+BOTTOM_UP_BETA = 24  # go back top-down once the frontier holds under 1/beta of the vertices
+
+
+class CompactGraph:
+    """ CompactGraph Class
+    A frozen, array-backed representation of a directed or undirected graph.
+
+    Vertices are numbered 0..n-1. Adjacency is stored in compressed sparse row (CSR) form:
+    the out-neighbors of vertex index i are targets[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, vertex_ids, offsets, targets, is_directed=True, weights=None):
+        """
+        Initialize a compact graph from prebuilt CSR arrays.
+        Parameters:
+        vertex_ids (sequence): The vertex id stored at each vertex index.
+        offsets (array): n + 1 offsets into `targets`, one per vertex plus the end offset.
+        targets (array): The neighbor index of every edge, grouped by source vertex.
+        is_directed (boolean): Whether the graph is directed (edges go in only one direction).
+        weights (array): The weight of every edge, parallel to `targets`, or None if unweighted.
+        """
+        if len(offsets) != len(vertex_ids) + 1:
+            raise ValueError('offsets must hold one entry per vertex plus one')
+        if weights is not None and len(weights) != len(targets):
+            raise ValueError('weights must hold one entry per edge')
+
+        self.__ids = vertex_ids
+        self.__index = None  # id -> index, built on first use
+        self.__offsets = offsets
+        self.__targets = targets
+        # slicing a memoryview is zero-copy, so neighbor scans never allocate per neighbor
+        self.__targets_view = memoryview(targets)
+        self.__weights = weights
+        self.__weights_view = None if weights is None else memoryview(weights)
+        self.__is_directed = is_directed
+        self.__transpose = None
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        Build a compact graph from an existing Graph, keeping its vertex and neighbor order.
+        Parameters:
+        graph (Graph): The graph to convert.
+        Returns:
+        CompactGraph: The frozen compact copy.
+        """
+        vertices = graph.get_vertices()
+        vertex_ids = [vertex.get_id() for vertex in vertices]
+        index = {vertex_id: i for i, vertex_id in enumerate(vertex_ids)}
+
+        offsets = array('q', [0])
+        targets = array('i')
+        weights = array('d') if graph.is_weighted() else None
+        for vertex in vertices:
+            if weights is None:
+                targets.extend(index[neighbor.get_id()] for neighbor in vertex.get_neighbors())
+            else:
+                for neighbor, weight in vertex.get_weighted_neighbors():
+                    targets.append(index[neighbor.get_id()])
+                    weights.append(weight)
+            offsets.append(len(targets))
+
+        compact = cls(vertex_ids, offsets, targets, graph.is_directed(), weights)
+        compact.__index = index
+        return compact
+
+    @classmethod
+    def from_edges(cls, edges, is_directed=True, vertex_ids=(), weighted=False):
+        """
+        Build a compact graph directly from an iterable of (vertex_id1, vertex_id2) pairs.
+        Repeated edges are stored once, as they are in Graph.
+        Parameters:
+        edges (iterable): The edges to add, in insertion order.
+        is_directed (boolean): Whether the graph is directed (edges go in only one direction).
+        vertex_ids (iterable): Extra vertex ids to include even if they have no edges.
+        weighted (boolean): Whether the edges are (vertex_id1, vertex_id2, weight) triples.
+        Returns:
+        CompactGraph: The frozen compact graph.
+        """
+        ids = []
+        index = {}
+        for vertex_id in vertex_ids:
+            if vertex_id not in index:
+                index[vertex_id] = len(ids)
+                ids.append(vertex_id)
+
+        sources = array('i')
+        destinations = array('i')
+        weights = array('d') if weighted else None
+        if not weighted:
+            edges = ((vertex_id1, vertex_id2, None) for vertex_id1, vertex_id2 in edges)
+
+        for vertex_id1, vertex_id2, weight in edges:
+            i = index.get(vertex_id1)
+            if i is None:
+                i = index[vertex_id1] = len(ids)
+                ids.append(vertex_id1)
+            j = index.get(vertex_id2)
+            if j is None:
+                j = index[vertex_id2] = len(ids)
+                ids.append(vertex_id2)
+            sources.append(i)
+            destinations.append(j)
+            if weighted:
+                weights.append(weight)
+            if not is_directed:
+                sources.append(j)
+                destinations.append(i)
+                if weighted:
+                    weights.append(weight)
+
+        offsets, targets, weights = build_csr(len(ids), sources, destinations, weights)
+        compact = cls(ids, offsets, targets, is_directed, weights)
+        compact.__index = index
+        return compact
+
+    @classmethod
+    def from_edge_list(cls, path, is_directed=True, delimiter=None, comments='#', skip_header=False,
+                       parse_id=None, chunk_size=graph_io.DEFAULT_CHUNK_SIZE):
+        """
+        Build a compact graph from an edge-list file (text, CSV or TSV, optionally gzipped).
+        Edges are streamed straight into index arrays, so no per-edge objects are kept.
+        Parameters: see Graph.from_edge_list.
+        Returns:
+        CompactGraph: The frozen compact graph.
+        """
+        chunks = graph_io.read_edge_chunks(path, delimiter, comments, skip_header, parse_id, chunk_size)
+        return cls.from_edges(chain.from_iterable(chunks), is_directed)
+
+    @classmethod
+    def open(cls, path):
+        """
+        Open a graph saved with `save`. The file is memory-mapped rather than read, so opening is
+        near-instant and read-only processes opening the same file share one page-cached copy.
+        Parameters:
+        path (string): The binary graph file.
+        Returns:
+        CompactGraph: The graph, backed by the mapped file.
+        """
+        vertex_ids, offsets, targets, is_directed, weights = graph_io.read_binary(path)
+        return cls(vertex_ids, offsets, targets, is_directed, weights)
+
+    def save(self, path):
+        """
+        Save the graph in the binary graph format (see graph_io). Vertex ids must be all integers
+        or all strings.
+        Parameters:
+        path (string): The file to write.
+        """
+        graph_io.write_binary(path, self.__ids, self.__offsets, self.__targets, self.__is_directed, self.__weights)
+
+    def __str__(self):
+        """Return a string representation of the graph."""
+        kind = 'directed' if self.__is_directed else 'undirected'
+        return f'CompactGraph ({kind}) with {self.num_vertices()} vertices and {self.num_edges()} edges'
+
+    def __repr__(self):
+        """Return a string representation of the graph."""
+        return self.__str__()
+
+    def is_directed(self):
+        """Return True if the graph is directed."""
+        return self.__is_directed
+
+    def num_vertices(self):
+        """Return the number of vertices in the graph."""
+        return len(self.__ids)
+
+    def num_edges(self):
+        """Return the number of stored edges (undirected edges are stored in both directions)."""
+        return len(self.__targets)
+
+    def get_vertex_ids(self):
+        """Return the sequence of vertex ids, indexed by vertex index."""
+        return self.__ids
+
+    def get_offsets(self):
+        """Return the CSR offsets array."""
+        return self.__offsets
+
+    def get_targets(self):
+        """Return the CSR targets array."""
+        return self.__targets
+
+    def get_weights(self):
+        """Return the edge weights array, parallel to the targets array, or None if the graph is unweighted."""
+        return self.__weights
+
+    def is_weighted(self):
+        """Return True if the graph stores edge weights."""
+        return self.__weights is not None
+
+    def get_id(self, index):
+        """Return the vertex id stored at the given index."""
+        return self.__ids[index]
+
+    def get_index(self, vertex_id):
+        """Return the index of the vertex with the given id, or None if it is not in the graph."""
+        if self.__index is None:
+            self.__index = {vertex_id: i for i, vertex_id in enumerate(self.__ids)}
+        return self.__index.get(vertex_id)
+
+    def contains_id(self, vertex_id):
+        return self.get_index(vertex_id) is not None
+
+    def neighbor_indices(self, index):
+        """Return a zero-copy view of the neighbor indices of the vertex at `index`."""
+        return self.__targets_view[self.__offsets[index]:self.__offsets[index + 1]]
+
+    def neighbor_weights(self, index):
+        """Return a zero-copy view of the weights of the out-edges of the vertex at `index`, or None if unweighted."""
+        if self.__weights_view is None:
+            return None
+        return self.__weights_view[self.__offsets[index]:self.__offsets[index + 1]]
+
+    def get_neighbors(self, vertex_id):
+        """Return the ids of the neighbors of the given vertex."""
+        index = self.get_index(vertex_id)
+        if index is None:
+            raise KeyError("Vertex not found")
+        ids = self.__ids
+        return [ids[j] for j in self.neighbor_indices(index)]
+
+    def out_degree(self, index):
+        """Return the number of out-neighbors of the vertex at `index`."""
+        return self.__offsets[index + 1] - self.__offsets[index]
+
+    def nbytes(self):
+        """Return the number of bytes used by the adjacency arrays."""
+        size = self.__offsets.itemsize * len(self.__offsets) + self.__targets.itemsize * len(self.__targets)
+        if self.__weights is not None:
+            size += self.__weights.itemsize * len(self.__weights)
+        return size
+
+    def transpose(self):
+        """
+        Return the graph with every edge reversed. The result is built once and reused.
+        For an undirected graph this is the graph itself.
+        """
+        if not self.__is_directed:
+            return self
+        if self.__transpose is None:
+            n = self.num_vertices()
+            sources = array('i', bytes(0))
+            offsets = self.__offsets
+            for i in range(n):
+                sources.extend([i] * (offsets[i + 1] - offsets[i]))
+            t_offsets, t_targets, t_weights = build_csr(n, self.__targets, sources, self.__weights)
+            transpose = CompactGraph(self.__ids, t_offsets, t_targets, True, t_weights)
+            transpose.__index = self.__index
+            transpose.__transpose = self
+            self.__transpose = transpose
+        return self.__transpose
+
+    def __require_index(self, vertex_id):
+        index = self.get_index(vertex_id)
+        if index is None:
+            raise KeyError("One or both vertices are not in the graph!")
+        return index
+
+    def bfs_traversal(self, start_id, direction=TOP_DOWN):
+        """
+        Traverse the graph using breadth-first search, printing each vertex.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        direction (string): TOP_DOWN, BOTTOM_UP or DIRECTION_OPTIMIZING (see `bfs_tree`). Within a
+            level searched bottom-up, vertices come in index order rather than discovery order.
+        """
+        if direction == TOP_DOWN:
+            vertex_ids = self.iter_bfs(start_id)
+        else:
+            _, _, levels, _ = self.__bfs(self.__require_index(start_id), None, -1, direction)
+            vertex_ids = (self.__ids[vertex] for level in levels for vertex in level)
+        for vertex_id in vertex_ids:
+            print('Processing vertex {}'.format(vertex_id))
+
+    def bfs_tree(self, start_id, max_depth=None, direction=DIRECTION_OPTIMIZING):
+        """
+        Breadth-first search recording the distance and parent of every vertex reached. Each
+        level is expanded either top-down, scanning the out-edges of the frontier, or bottom-up,
+        where every unvisited vertex scans its in-edges (over the transpose) and stops at the
+        first one from the frontier. Bottom-up wins once the frontier is a large part of the
+        graph, as in the middle levels of a search of a power-law graph, where most edges out
+        of the frontier lead to vertices already visited. The direction-optimizing mode (after
+        Beamer et al.) switches per level using the frontier's size and edge count.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        max_depth (integer): The greatest distance to search to, or None for no limit.
+        direction (string): TOP_DOWN, BOTTOM_UP or DIRECTION_OPTIMIZING.
+        Returns:
+        tuple<array, array, integer>: The distance of every vertex index (-1 if unreached), the
+            parent index of every vertex index (-1 if unreached, the start is its own parent)
+            and the number of edges examined.
+        """
+        distances, parents, _, examined = self.__bfs(self.__require_index(start_id), max_depth, -1, direction)
+        return distances, parents, examined
+
+    def __bfs(self, start, max_depth, target, direction):
+        """
+        Level-synchronous BFS in the given direction, stopping after level `max_depth` or the
+        level where `target` is reached.
+        Returns:
+        tuple: The distance and parent arrays, the list of levels (each a list of vertex
+            indices) and the number of edges examined.
+        """
+        if direction not in (TOP_DOWN, BOTTOM_UP, DIRECTION_OPTIMIZING):
+            raise ValueError(f'Unknown BFS direction {direction!r}')
+        n = self.num_vertices()
+        offsets = self.__offsets
+        reverse = None if direction == TOP_DOWN else self.transpose()
+
+        distances = array('i', [-1]) * n
+        parents = array('i', [-1]) * n
+        distances[start] = 0
+        parents[start] = start
+        levels = [[start]]
+        examined = 0
+        bottom_up = direction == BOTTOM_UP
+        unexplored_edges = len(self.__targets) - self.out_degree(start)  # edges out of unvisited vertices
+        unvisited = None  # listed the first time a level is searched bottom-up
+        in_frontier = None
+
+        while levels[-1] and (max_depth is None or len(levels) <= max_depth) and (
+                target == -1 or distances[target] == -1):
+            frontier = levels[-1]
+            level = len(levels)
+            if direction == DIRECTION_OPTIMIZING:
+                if not bottom_up:
+                    frontier_edges = sum(offsets[vertex + 1] - offsets[vertex] for vertex in frontier)
+                    bottom_up = frontier_edges * BOTTOM_UP_ALPHA > unexplored_edges
+                else:
+                    bottom_up = len(frontier) * BOTTOM_UP_BETA >= n
+
+            next_frontier = []
+            if bottom_up:
+                if unvisited is None:
+                    unvisited = [vertex for vertex in range(n) if distances[vertex] == -1]
+                    in_frontier = bytearray(n)
+                for vertex in frontier:
+                    in_frontier[vertex] = 1
+                still_unvisited = []
+                for vertex in unvisited:
+                    if distances[vertex] != -1:  # reached by a top-down level since the list was made
+                        continue
+                    for scanned, parent in enumerate(reverse.neighbor_indices(vertex), 1):
+                        if in_frontier[parent]:
+                            distances[vertex] = level
+                            parents[vertex] = parent
+                            next_frontier.append(vertex)
+                            examined += scanned
+                            break
+                    else:
+                        examined += reverse.out_degree(vertex)
+                        still_unvisited.append(vertex)
+                unvisited = still_unvisited
+                for vertex in frontier:
+                    in_frontier[vertex] = 0
+            else:
+                for vertex in frontier:
+                    neighbors = self.neighbor_indices(vertex)
+                    examined += len(neighbors)
+                    for neighbor in neighbors:
+                        if distances[neighbor] == -1:
+                            distances[neighbor] = level
+                            parents[neighbor] = vertex
+                            next_frontier.append(neighbor)
+
+            unexplored_edges -= sum(offsets[vertex + 1] - offsets[vertex] for vertex in next_frontier)
+            levels.append(next_frontier)
+
+        if not levels[-1]:
+            levels.pop()
+        return distances, parents, levels, examined
+
+    def iter_bfs(self, start_id, max_depth=None, with_details=False, visitor=None):
+        """
+        Lazily traverse the graph using breadth-first search. See Graph.iter_bfs.
+        Returns:
+        iterator: The vertex ids, or (vertex_id, depth, parent_id) tuples, in breadth-first order.
+        """
+        start = self.__require_index(start_id)
+        return self.__bfs_generator(start, max_depth, with_details, visitor)
+
+    def __bfs_generator(self, start, max_depth, with_details, visitor):
+        ids = self.__ids
+        seen = bytearray(self.num_vertices())
+        seen[start] = 1
+        frontier = [start]
+        parent = {start: -1} if with_details or visitor is not None else None
+        depth = 0
+
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                if parent is not None:
+                    parent_id = None if parent[current] == -1 else ids[parent[current]]
+                    if visitor is not None and visitor(ids[current], depth, parent_id):
+                        return
+                    yield (ids[current], depth, parent_id) if with_details else ids[current]
+                else:
+                    yield ids[current]
+
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                for neighbor in self.neighbor_indices(current):
+                    if not seen[neighbor]:
+                        seen[neighbor] = 1
+                        next_frontier.append(neighbor)
+                        if parent is not None:
+                            parent[neighbor] = current
+
+            frontier = next_frontier
+            depth += 1
+
+    def iter_dfs(self, start_id, max_depth=None, with_details=False, visitor=None):
+        """
+        Lazily traverse the graph using depth-first search, in preorder. See Graph.iter_dfs.
+        Returns:
+        iterator: The vertex ids, or (vertex_id, depth, parent_id) tuples, in depth-first preorder.
+        """
+        start = self.__require_index(start_id)
+        return self.__dfs_generator(start, max_depth, with_details, visitor)
+
+    def __dfs_generator(self, start, max_depth, with_details, visitor):
+        ids = self.__ids
+        if visitor is not None and visitor(ids[start], 0, None):
+            return
+        yield (ids[start], 0, None) if with_details else ids[start]
+        if max_depth is not None and max_depth <= 0:
+            return
+
+        offsets = self.__offsets
+        targets = self.__targets
+        seen = bytearray(self.num_vertices())
+        seen[start] = 1
+        # the current path, with the next edge position to scan for each vertex on it
+        path = [start]
+        positions = [offsets[start]]
+
+        while path:
+            current = path[-1]
+            position = positions[-1]
+            end = offsets[current + 1]
+            while position < end:
+                neighbor = targets[position]
+                position += 1
+                if seen[neighbor]:
+                    continue
+                seen[neighbor] = 1
+
+                depth = len(path)
+                if visitor is not None and visitor(ids[neighbor], depth, ids[current]):
+                    return
+                yield (ids[neighbor], depth, ids[current]) if with_details else ids[neighbor]
+
+                if max_depth is None or depth < max_depth:
+                    positions[-1] = position
+                    path.append(neighbor)
+                    positions.append(offsets[neighbor])
+                    break
+            else:
+                path.pop()
+                positions.pop()
+
+    def find_shortest_path(self, start_id, target_id, bidirectional=False, direction=TOP_DOWN):
+        """
+        Find and return the shortest path from start_id to target_id.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+        bidirectional (boolean): Search forward from the start and backward (over the transpose)
+            from the target at once, meeting in the middle.
+        direction (string): For a search from the start only: TOP_DOWN, BOTTOM_UP or
+            DIRECTION_OPTIMIZING (see `bfs_tree`).
+        Returns:
+        list<string>: A list of all vertex ids in the shortest path, from start to end.
+        """
+        start = self.__require_index(start_id)
+        target = self.__require_index(target_id)
+
+        if bidirectional:
+            path = self.__find_path_bidirectional(start, target)
+        elif direction != TOP_DOWN:
+            _, parents, _, _ = self.__bfs(start, None, target, direction)
+            path = None if parents[target] == -1 else [target]
+            while path is not None and path[-1] != start:
+                path.append(parents[path[-1]])
+            if path is not None:
+                path.reverse()
+        else:
+            path = self.__find_path(start, target)
+
+        if path is None:
+            return None
+        ids = self.__ids
+        return [ids[i] for i in path]
+
+    def __find_path(self, start, target):
+        # parent index of every discovered vertex; -1 means undiscovered
+        parent = array('i', [-1]) * self.num_vertices()
+        parent[start] = start
+        queue = deque([start])
+
+        while queue:
+            current = queue.popleft()
+            if current == target:
+                break
+
+            for neighbor in self.neighbor_indices(current):
+                if parent[neighbor] == -1:
+                    parent[neighbor] = current
+                    queue.append(neighbor)
+
+        if parent[target] == -1:  # path not found
+            return None
+
+        path = [target]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        path.reverse()
+        return path
+
+    def __find_path_bidirectional(self, start, target):
+        if start == target:
+            return [start]
+
+        n = self.num_vertices()
+        # index 0 searches forward from the start, index 1 backward from the target
+        graphs = (self, self.transpose())
+        parents = (array('i', [-1]) * n, array('i', [-1]) * n)
+        depths = (array('i', [-1]) * n, array('i', [-1]) * n)
+        parents[0][start] = start
+        parents[1][target] = target
+        depths[0][start] = depths[1][target] = 0
+        frontiers = [[start], [target]]
+
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            graph, parent, depth = graphs[side], parents[side], depths[side]
+            other_depth = depths[1 - side]
+
+            meeting = -1
+            next_frontier = []
+            for current in frontiers[side]:
+                for neighbor in graph.neighbor_indices(current):
+                    if parent[neighbor] != -1:
+                        continue
+                    parent[neighbor] = current
+                    depth[neighbor] = depth[current] + 1
+                    next_frontier.append(neighbor)
+
+                    # keep the meeting point with the shortest total length in this level
+                    if other_depth[neighbor] != -1 and (
+                            meeting == -1 or other_depth[neighbor] < other_depth[meeting]):
+                        meeting = neighbor
+
+            if meeting != -1:
+                path = [meeting]
+                while path[-1] != start:
+                    path.append(parents[0][path[-1]])
+                path.reverse()
+                while path[-1] != target:
+                    path.append(parents[1][path[-1]])
+                return path
+
+            frontiers[side] = next_frontier
+
+        return None
+
+    def find_cheapest_path(self, start_id, target_id, heuristic=None):
+        """
+        Find the lowest-cost path from start_id to target_id using Dijkstra's algorithm, or A*
+        when a heuristic is given. Unweighted graphs use a weight of 1 for every edge.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+        heuristic (callable): Takes (vertex_id, target_id) and returns a lower bound on the cost
+            between them. It must never overestimate; a settled vertex is reopened if a cheaper
+            path to it turns up later, so the path found is the cheapest.
+        Returns:
+        tuple<number, list<string>>: The total cost and the vertex ids on the path, or None if
+            the target can't be reached.
+        """
+        start = self.__require_index(start_id)
+        target = self.__require_index(target_id)
+
+        costs, parent = self.__dijkstra(start, target, heuristic)
+        if parent[target] == -1:  # path not found
+            return None
+
+        path = [target]
+        while path[-1] != start:
+            path.append(parent[path[-1]])
+        ids = self.__ids
+        return costs[target], [ids[i] for i in reversed(path)]
+
+    def find_path_costs(self, start_id):
+        """
+        Find the cost of the cheapest path from start_id to every vertex (Dijkstra's algorithm).
+        Parameters:
+        start_id (string): The id of the start vertex.
+        Returns:
+        array<float>: The path cost of every vertex index; unreachable vertices cost infinity.
+        """
+        start = self.get_index(start_id)
+        if start is None:
+            raise KeyError("Vertex not found")
+
+        costs, _ = self.__dijkstra(start)
+        return costs
+
+    def __dijkstra(self, start, target=-1, heuristic=None):
+        """
+        Settle vertices in order of path cost, stopping early once `target` is settled. A
+        heuristic that is admissible but not consistent can settle a vertex before its cheapest
+        path is found; the vertex is then reopened when that path turns up.
+        Returns the cost and parent arrays.
+        """
+        n = self.num_vertices()
+        costs = array('d', [INFINITY]) * n
+        parent = array('i', [-1]) * n
+        costs[start] = 0.0
+        parent[start] = start
+        target_id = self.__ids[target] if heuristic is not None else None
+
+        heap = [(0.0, 0.0, start)]  # (priority, cost, vertex)
+        while heap:
+            _, cost, current = heappop(heap)
+            if cost > costs[current]:
+                continue  # stale entry, a cheaper path to the vertex was found since
+            if current == target:
+                break
+
+            weights = self.neighbor_weights(current)
+            for position, neighbor in enumerate(self.neighbor_indices(current)):
+                weight = 1.0 if weights is None else weights[position]
+                if weight < 0:
+                    raise ValueError('Cheapest paths need non-negative edge weights')
+                next_cost = cost + weight
+                if next_cost < costs[neighbor]:
+                    costs[neighbor] = next_cost
+                    parent[neighbor] = current
+                    if heuristic is not None:
+                        heappush(heap, (next_cost + heuristic(self.__ids[neighbor], target_id), next_cost, neighbor))
+                    else:
+                        heappush(heap, (next_cost, next_cost, neighbor))
+
+        return costs, parent
+
+    def find_vertices_n_away(self, start_id, target_distance, direction=TOP_DOWN):
+        """
+        Find and return all vertices n distance away.
+        Arguments:
+        start_id (string): The id of the start vertex.
+        target_distance (integer): The distance from the start vertex we are looking for
+        direction (string): TOP_DOWN, BOTTOM_UP or DIRECTION_OPTIMIZING (see `bfs_tree`).
+        Returns:
+        list<string>: All vertex ids that are `target_distance` away from the start vertex
+        """
+        start = self.get_index(start_id)
+        if start is None:
+            raise KeyError("Vertex not found")
+        if target_distance < 0:
+            return []
+
+        if direction != TOP_DOWN:
+            _, _, levels, _ = self.__bfs(start, target_distance, -1, direction)
+            ids = self.__ids
+            return [ids[i] for i in levels[target_distance]] if target_distance < len(levels) else []
+
+        seen = bytearray(self.num_vertices())
+        seen[start] = 1
+        frontier = [start]
+
+        # expand one whole level at a time and stop as soon as the target level is reached
+        for _ in range(target_distance):
+            next_frontier = []
+            for current in frontier:
+                for neighbor in self.neighbor_indices(current):
+                    if not seen[neighbor]:
+                        seen[neighbor] = 1
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+            if not frontier:
+                break
+
+        ids = self.__ids
+        return [ids[i] for i in frontier]
+
+    def bfs_levels(self, start_ids, max_depth=None):
+        """
+        Breadth-first search from several start vertices at once, treated as one combined source.
+        Parameters:
+        start_ids (iterable<string>): The ids of the start vertices.
+        max_depth (integer): The last level to expand to, or None for no limit.
+        Returns:
+        list<list<string>>: The vertex ids at each distance from the nearest start vertex;
+            level 0 holds the start vertices.
+        """
+        seen = bytearray(self.num_vertices())
+        frontier = []
+        for start_id in start_ids:
+            start = self.__require_index(start_id)
+            if not seen[start]:
+                seen[start] = 1
+                frontier.append(start)
+
+        ids = self.__ids
+        levels = []
+        while frontier:
+            levels.append([ids[i] for i in frontier])
+            if max_depth is not None and len(levels) > max_depth:
+                break
+
+            next_frontier = []
+            for current in frontier:
+                for neighbor in self.neighbor_indices(current):
+                    if not seen[neighbor]:
+                        seen[neighbor] = 1
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+
+        return levels
+
+    def batch_distances(self, start_ids, max_depth=None, batch_size=BFS_BATCH_SIZE):
+        """
+        Find the hop distance from each of many start vertices to every vertex.
+        Start vertices are searched `batch_size` at a time with a bit-parallel BFS: every vertex
+        carries a bitset of the searches that have reached it, so one scan of an edge advances
+        all the searches in the batch together.
+        Parameters:
+        start_ids (list<string>): The ids of the start vertices.
+        max_depth (integer): The greatest distance to search to, or None for no limit.
+        batch_size (integer): The number of searches run together.
+        Returns:
+        list<array>: For each start vertex, the distance to every vertex index (-1 if unreached).
+        """
+        n = self.num_vertices()
+        start_ids = list(start_ids)
+        distances = []
+
+        def record(level, reached):
+            for vertex, bits in reached.items():
+                while bits:
+                    lowest = bits & -bits
+                    batch_arrays[lowest.bit_length() - 1][vertex] = level
+                    bits ^= lowest
+
+        for first in range(0, len(start_ids), batch_size):
+            batch = start_ids[first:first + batch_size]
+            batch_arrays = [array('i', [-1]) * n for _ in batch]
+            self.__bit_parallel_bfs(batch, max_depth, record)
+            distances.extend(batch_arrays)
+
+        return distances
+
+    def batch_vertices_n_away(self, start_ids, target_distance, batch_size=BFS_BATCH_SIZE):
+        """
+        Answer `find_vertices_n_away` for many start vertices, with the bit-parallel BFS of
+        `batch_distances`. No search goes past `target_distance`.
+        Parameters:
+        start_ids (list<string>): The ids of the start vertices.
+        target_distance (integer): The distance from the start vertices we are looking for.
+        batch_size (integer): The number of searches run together.
+        Returns:
+        list<list<string>>: For each start vertex, the ids of the vertices `target_distance` away.
+        """
+        ids = self.__ids
+        start_ids = list(start_ids)
+        results = []
+
+        def record(level, reached):
+            if level != target_distance:
+                return
+            for vertex, bits in reached.items():
+                while bits:
+                    lowest = bits & -bits
+                    batch_results[lowest.bit_length() - 1].append(ids[vertex])
+                    bits ^= lowest
+
+        for first in range(0, len(start_ids), batch_size):
+            batch = start_ids[first:first + batch_size]
+            batch_results = [[] for _ in batch]
+            self.__bit_parallel_bfs(batch, target_distance, record)
+            results.extend(batch_results)
+
+        return results
+
+    def __bit_parallel_bfs(self, start_ids, max_depth, record):
+        """
+        Run one BFS per start vertex, all advancing level by level together. Bit i of a vertex's
+        bitset stands for the search from start_ids[i]. `record` is called with each level number
+        and a dict mapping every vertex reached at that level to the bitset of searches reaching it.
+        """
+        seen = [0] * self.num_vertices()  # bitset of searches that have reached each vertex
+        frontier = {}
+        for bit, start_id in enumerate(start_ids):
+            start = self.__require_index(start_id)
+            frontier[start] = frontier.get(start, 0) | (1 << bit)
+            seen[start] |= 1 << bit
+
+        level = 0
+        while frontier:
+            record(level, frontier)
+            if max_depth is not None and level >= max_depth:
+                break
+
+            next_frontier = {}
+            for current, bits in frontier.items():
+                for neighbor in self.neighbor_indices(current):
+                    new_bits = bits & ~seen[neighbor]
+                    if new_bits:
+                        seen[neighbor] |= new_bits
+                        next_frontier[neighbor] = next_frontier.get(neighbor, 0) | new_bits
+            frontier = next_frontier
+            level += 1
+
+    def find_connected_components(self):
+        """
+        Return a list of all connected components, with each connected component represented as a list of vertex ids.
+        Edge direction is ignored, so components of a directed graph are its weakly connected components.
+        """
+        reverse = self.transpose()
+        n = self.num_vertices()
+        ids = self.__ids
+        seen = bytearray(n)
+        components = []
+
+        for start in range(n):
+            if seen[start]:
+                continue
+            seen[start] = 1
+            component = [start]
+            stack = [start]
+
+            while stack:
+                current = stack.pop()
+                for neighbors in (self.neighbor_indices(current), reverse.neighbor_indices(current)):
+                    for neighbor in neighbors:
+                        if not seen[neighbor]:
+                            seen[neighbor] = 1
+                            component.append(neighbor)
+                            stack.append(neighbor)
+
+            components.append([ids[i] for i in component])
+
+        return components
+
+    def topological_sort(self):
+        """
+        Return a valid ordering of vertices in a directed acyclic graph. If the graph contains a cycle, throw a ValueError.
+        """
+        n = self.num_vertices()
+        in_degree = array('i', bytes(4 * n))
+        for neighbor in self.__targets_view:
+            in_degree[neighbor] += 1
+
+        order = [i for i in range(n) if in_degree[i] == 0]
+        head = 0
+        while head < len(order):
+            current = order[head]
+            head += 1
+            for neighbor in self.neighbor_indices(current):
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    order.append(neighbor)
+
+        # vertices left with incoming edges lie on (or behind) a cycle
+        if len(order) != n:
+            raise ValueError('Graph not DAG')
+
+        ids = self.__ids
+        return [ids[i] for i in order]
+
+
+def build_csr(num_vertices, sources, destinations, weights=None):
+    """
+    Group parallel (source, destination) index arrays into CSR offset and target arrays.
+    The sort is stable, so each vertex keeps its neighbors in insertion order; a repeated
+    edge keeps its first position and its last weight, as it would in Graph.
+    Parameters:
+    num_vertices (integer): The number of vertices.
+    sources (array): The source index of every edge.
+    destinations (array): The destination index of every edge.
+    weights (array): The weight of every edge, or None for an unweighted graph.
+    Returns:
+    tuple<array, array, array>: The offsets, targets and weights (None if unweighted) arrays.
+    """
+    counts = array('q', bytes(8 * (num_vertices + 1)))
+    for source in sources:
+        counts[source + 1] += 1
+    for i in range(num_vertices):
+        counts[i + 1] += counts[i]
+
+    # counting sort: place every edge in its source's slot
+    position = array('q', counts)
+    targets = array('i', bytes(4 * len(destinations)))
+    sorted_weights = None if weights is None else array('d', bytes(8 * len(destinations)))
+    for edge, (source, destination) in enumerate(zip(sources, destinations)):
+        targets[position[source]] = destination
+        if weights is not None:
+            sorted_weights[position[source]] = weights[edge]
+        position[source] += 1
+
+    # drop repeated edges, marking the targets already written for the current source
+    last_source = array('i', [-1]) * num_vertices
+    written_at = array('q', bytes(8 * num_vertices))  # where each marked target was written
+    offsets = array('q', [0])
+    write = 0
+    for source in range(num_vertices):
+        for read in range(counts[source], counts[source + 1]):
+            destination = targets[read]
+            if last_source[destination] != source:
+                last_source[destination] = source
+                written_at[destination] = write
+                targets[write] = destination
+                if weights is not None:
+                    sorted_weights[write] = sorted_weights[read]
+                write += 1
+            elif weights is not None:
+                sorted_weights[written_at[destination]] = sorted_weights[read]
+        offsets.append(write)
+
+    del targets[write:]
+    if weights is not None:
+        del sorted_weights[write:]
+    return offsets, targets, sorted_weights
@@ -0,0 +1,84 @@
+import random
+
+
+def erdos_renyi_edges(num_vertices, num_edges, seed=0):
+    """
+    Return `num_edges` uniformly random (vertex_id1, vertex_id2) pairs over the integers
+    0..num_vertices-1, like the Erdős–Rényi G(n, m) model. Pairs may repeat or be self-loops.
+    """
+    rng = random.Random(seed)
+    return [(rng.randrange(num_vertices), rng.randrange(num_vertices)) for _ in range(num_edges)]
+
+
+def barabasi_albert_edges(num_vertices, edges_per_vertex=3, seed=0):
+    """
+    Return the edges of a Barabási–Albert preferential-attachment graph: every new vertex links to
+    `edges_per_vertex` distinct earlier vertices picked with probability proportional to their
+    degree, which gives a power-law degree distribution with a few very large hubs.
+    """
+    rng = random.Random(seed)
+    edges = []
+    endpoints = list(range(edges_per_vertex))  # every vertex appears once per edge it touches
+    for vertex in range(edges_per_vertex, num_vertices):
+        targets = set()
+        while len(targets) < edges_per_vertex:
+            targets.add(rng.choice(endpoints))
+        for target in targets:
+            edges.append((vertex, target))
+            endpoints.append(target)
+            endpoints.append(vertex)
+    return edges
+
+
+def grid_edges(rows, cols, seed=0, max_weight=None):
+    """
+    Return the edges of a `rows` x `cols` grid with (row, col) vertex ids. With `max_weight`,
+    each edge is a (vertex_id1, vertex_id2, weight) triple with a random weight in 1..max_weight.
+    """
+    rng = random.Random(seed)
+    edges = []
+    for row in range(rows):
+        for col in range(cols):
+            for neighbor in ((row + 1, col), (row, col + 1)):
+                if neighbor[0] < rows and neighbor[1] < cols:
+                    if max_weight is None:
+                        edges.append(((row, col), neighbor))
+                    else:
+                        edges.append(((row, col), neighbor, rng.randint(1, max_weight)))
+    return edges
+
+
+def chain_edges(num_vertices):
+    """Return the edges of a path 0 -> 1 -> ... -> num_vertices-1, the worst case for recursion depth."""
+    return [(vertex, vertex + 1) for vertex in range(num_vertices - 1)]
+
+
+def random_dag_edges(num_vertices, num_edges, seed=0):
+    """
+    Return `num_edges` random edges of a directed acyclic graph over the integers
+    0..num_vertices-1. Edges follow a hidden random order of the vertices, so sorting the ids
+    doesn't give a topological order. Pairs may repeat.
+    """
+    rng = random.Random(seed)
+    order = list(range(num_vertices))
+    rng.shuffle(order)
+    edges = []
+    for _ in range(num_edges):
+        first, second = sorted(rng.sample(range(num_vertices), 2))
+        edges.append((order[first], order[second]))
+    return edges
+
+
+def random_grid(rows, cols, fill=0.5, seed=0, value=1):
+    """Return a grid as a list of bytes rows, each cell equal to `value` with probability `fill`, else 0."""
+    rng = random.Random(seed)
+    threshold = int(256 * fill)
+    table = bytes(value if byte < threshold else 0 for byte in range(256))
+    return [rng.getrandbits(8 * cols).to_bytes(cols, 'little').translate(table) for _ in range(rows)]
+
+
+def random_words(num_words, length=5, alphabet='abcdefghijklmnop', seed=0):
+    """Return up to `num_words` distinct random words, in a stable order."""
+    rng = random.Random(seed)
+    words = {''.join(rng.choice(alphabet) for _ in range(length)) for _ in range(num_words)}
+    return sorted(words)
@@ -0,0 +1,44 @@
+import unittest
+
+import benchmarks
+import generators
+from graph import Graph
+
+
+class GeneratorTests(unittest.TestCase):
+    def test_seeded(self):
+        """The same seed gives the same workload, so runs can be compared."""
+        assert generators.erdos_renyi_edges(50, 100, seed=1) == generators.erdos_renyi_edges(50, 100, seed=1)
+        assert generators.barabasi_albert_edges(50, 2, seed=1) == generators.barabasi_albert_edges(50, 2, seed=1)
+        assert generators.random_words(20, seed=1) == generators.random_words(20, seed=1)
+
+    def test_shapes(self):
+        edges = generators.barabasi_albert_edges(100, 3)
+        assert len(edges) == 97 * 3
+        assert all(target < vertex for vertex, target in edges)
+        assert len(generators.grid_edges(3, 4)) == 3 * 3 + 2 * 4
+        assert generators.chain_edges(3) == [(0, 1), (1, 2)]
+        assert len(generators.random_grid(5, 7)) == 5 and len(generators.random_grid(5, 7)[0]) == 7
+
+    def test_random_dag(self):
+        graph = Graph()
+        graph.add_edges_from(generators.random_dag_edges(30, 100))
+        assert not graph.contains_cycle()
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_find_regressions(self):
+        baseline = {'a': {'seconds': 1.0, 'peak_bytes': 100}, 'b': {'seconds': 1.0, 'peak_bytes': 100}}
+        results = {'a': {'seconds': 1.2, 'peak_bytes': 100}, 'b': {'seconds': 0.5, 'peak_bytes': 200},
+                   'c': {'seconds': 9.0, 'peak_bytes': 100}}
+        regressions = benchmarks.find_regressions(results, baseline, tolerance=0.25)
+        assert len(regressions) == 1 and regressions[0].startswith('b: peak_bytes')
+
+    def test_suite_runs(self):
+        results = benchmarks.run_suite(scale=1, repeat=1, only='topological_sort', report=lambda line: None)
+        assert list(results) == ['Graph.topological_sort (random DAG)']
+        assert results['Graph.topological_sort (random DAG)']['seconds'] > 0
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,21 @@
+import gc
+from array import array
 from collections import deque
-from random import choice
+from contextlib import contextmanager
+from heapq import heappop, heappush
+
+import graph_io
+from compact_graph import CompactGraph
+from graph_views import ReversedVertices, SubgraphVertices, UndirectedVertices, ViewPredecessors
+from components import UnionFind, bipartite_coloring
+from incremental import IncrementalIndex
+from instrumentation import DEFAULT_HISTORY, Instrumentation, instrumented_query
+from query_cache import QueryCache, cached_query
+
+# depth-first search colors
+WHITE = 0
+GRAY = 1
+BLACK = 2
 
 
 class Vertex(object):
@@ -15,16 +31,71 @@ class Vertex(object):
         """
         self.__id = vertex_id
         self.__neighbors_dict = {}  # id -> object
+        self.__weights_dict = None  # id -> weight, created for the first weighted edge
 
-    def add_neighbor(self, vertex_obj):
+    def add_neighbor(self, vertex_obj, weight=None):
         """
         Add a neighbor by storing it in the neighbors dictionary.
         Parameters:
         vertex_obj (Vertex): An instance of Vertex to be stored as a neighbor.
+        weight (number): The weight of the edge to the neighbor. Unweighted edges weigh 1.
         """
 
         self.__neighbors_dict[vertex_obj.__id] = vertex_obj
 
+        if weight is not None:
+            if self.__weights_dict is None:
+                self.__weights_dict = {}
+            self.__weights_dict[vertex_obj.__id] = weight
+        elif self.__weights_dict is not None:
+            self.__weights_dict.pop(vertex_obj.__id, None)
+
+    def remove_neighbor(self, neighbor_id):
+        """
+        Remove the edge to a neighbor.
+        Parameters:
+        neighbor_id (string): The id of the neighbor.
+        Returns:
+        boolean: True if there was such an edge.
+        """
+        if self.__neighbors_dict.pop(neighbor_id, None) is None:
+            return False
+        if self.__weights_dict is not None:
+            self.__weights_dict.pop(neighbor_id, None)
+        return True
+
+    def clear_neighbors(self):
+        """Remove every edge from this vertex, dropping its references to the neighbors."""
+        self.__neighbors_dict = {}
+        self.__weights_dict = None
+
+    def compact(self):
+        """
+        Rebuild the neighbor dictionaries at their current size. Dictionaries never shrink when
+        entries are removed, so a vertex that lost many neighbors keeps their slots until then.
+        """
+        self.__neighbors_dict = dict(self.__neighbors_dict)
+        self.__weights_dict = dict(self.__weights_dict) if self.__weights_dict else None
+
+    def copy_neighbors(self, vertex_obj, vertex_dict):
+        """
+        Replace the edges of this vertex with those of another vertex that lead into `vertex_dict`,
+        keeping their weights. Copies whole dictionaries instead of adding edges one by one.
+        Parameters:
+        vertex_obj (Vertex): The vertex whose edges are copied.
+        vertex_dict (dict): The id -> Vertex dictionary of the graph this vertex belongs to.
+        """
+        self.__neighbors_dict = {neighbor_id: vertex_dict[neighbor_id]
+                                 for neighbor_id in vertex_obj.__neighbors_dict if neighbor_id in vertex_dict}
+        weights = vertex_obj.__weights_dict
+        if weights:
+            weights = {neighbor_id: weight for neighbor_id, weight in weights.items() if neighbor_id in vertex_dict}
+        self.__weights_dict = weights or None
+
+    def get_degree(self):
+        """Return the number of neighbors of this vertex."""
+        return len(self.__neighbors_dict)
+
     def __str__(self):
         """Output the list of neighbors of this vertex."""
         neighbor_ids = list(self.__neighbors_dict.keys())
@@ -38,6 +109,25 @@ class Vertex(object):
         """Return the neighbors of this vertex."""
         return list(self.__neighbors_dict.values())
 
+    def get_weighted_neighbors(self):
+        """Return (neighbor, edge weight) pairs for the neighbors of this vertex."""
+        if self.__weights_dict is None:
+            return [(neighbor, 1) for neighbor in self.__neighbors_dict.values()]
+        weights = self.__weights_dict
+        return [(neighbor, weights.get(neighbor_id, 1)) for neighbor_id, neighbor in self.__neighbors_dict.items()]
+
+    def get_edge_weight(self, neighbor_id):
+        """Return the weight of the edge to the given neighbor (1 if unweighted), or None if there is no such edge."""
+        if neighbor_id not in self.__neighbors_dict:
+            return None
+        if self.__weights_dict is None:
+            return 1
+        return self.__weights_dict.get(neighbor_id, 1)
+
+    def is_weighted(self):
+        """Return True if any edge from this vertex was given a weight."""
+        return bool(self.__weights_dict)
+
     def get_id(self):
         """Return the id of this vertex."""
         return self.__id
@@ -56,6 +146,33 @@ class Graph:
         """
         self.__vertex_dict = {}  # id -> object
         self.__is_directed = is_directed
+        self.__version = 0  # bumped on every change, so cached query results go stale
+        self.__query_cache = None
+        self.__incremental = None  # components and topological order kept up to date, if enabled
+        self.__incremental_stale = False  # set by removals, which the incremental index can't undo
+        self.__predecessors = None  # id -> {predecessor id: Vertex} for directed graphs, if enabled
+        self.__instrumentation = None  # per-query counters, if enabled
+
+    @classmethod
+    def from_edge_list(cls, path, is_directed=True, delimiter=None, comments='#', skip_header=False,
+                       parse_id=None, chunk_size=graph_io.DEFAULT_CHUNK_SIZE):
+        """
+        Build a graph from an edge-list file (text, CSV or TSV, optionally gzipped), streaming it in chunks.
+        Parameters:
+        path (string): The file to read; see graph_io.read_edge_chunks for the accepted format.
+        is_directed (boolean): Whether the graph is directed (edges go in only one direction).
+        delimiter (string): The field separator. Defaults to one guessed from the file extension.
+        comments (string): Lines starting with this prefix are skipped.
+        skip_header (boolean): Whether to skip the first line of the file.
+        parse_id (callable): Converts each id field, e.g. `int`. By default ids are interned strings.
+        chunk_size (integer): The number of edges read and added at a time.
+        Returns:
+        Graph: The new graph.
+        """
+        graph = cls(is_directed=is_directed)
+        for chunk in graph_io.read_edge_chunks(path, delimiter, comments, skip_header, parse_id, chunk_size):
+            graph.add_edges_from(chunk)
+        return graph
 
     def add_vertex(self, vertex_id):
         """
@@ -67,6 +184,9 @@ class Graph:
         """
         vertex = Vertex(vertex_id)
         self.__vertex_dict[vertex_id] = vertex
+        self.__version += 1
+        if self.__incremental is not None:
+            self.__current_incremental().add_vertex(vertex_id)
         return vertex
 
     def get_vertex(self, vertex_id):
@@ -77,23 +197,164 @@ class Graph:
         vertex_obj = self.__vertex_dict[vertex_id]
         return vertex_obj
 
-    def add_edge(self, vertex_id1, vertex_id2):
+    def add_edge(self, vertex_id1, vertex_id2, weight=None):
         """
         Add an edge from vertex with id `vertex_id1` to vertex with id `vertex_id2`.
         Parameters:
         vertex_id1 (string): The unique identifier of the first vertex.
         vertex_id2 (string): The unique identifier of the second vertex.
+        weight (number): The weight (cost) of the edge. Unweighted edges weigh 1.
         """
+        # checked before any vertex or the edge is stored, so a rejected edge leaves the graph unchanged
+        if self.__incremental is not None:
+            self.__current_incremental().add_edge(vertex_id1, vertex_id2)
+
         if vertex_id1 not in self.__vertex_dict:
             self.add_vertex(vertex_id1)
         if vertex_id2 not in self.__vertex_dict:
             self.add_vertex(vertex_id2)
 
         # Add vertex_id2 as neighbor to vertex_id1 to make link/edge
-        self.__vertex_dict[vertex_id1].add_neighbor(self.__vertex_dict[vertex_id2])
+        self.__vertex_dict[vertex_id1].add_neighbor(self.__vertex_dict[vertex_id2], weight)
+
+        if not self.__is_directed:
+            self.__vertex_dict[vertex_id2].add_neighbor(self.__vertex_dict[vertex_id1], weight)
+        elif self.__predecessors is not None:
+            self.__predecessors.setdefault(vertex_id2, {})[vertex_id1] = self.__vertex_dict[vertex_id1]
+
+        self.__version += 1
+
+    def add_edges_from(self, edges):
+        """
+        Add many edges at once. Equivalent to calling `add_edge` for each edge, but with lookups
+        bound locally and the cyclic garbage collector paused, since a bulk load only creates
+        objects and gives collection passes nothing to free.
+        Parameters:
+        edges (iterable): (vertex_id1, vertex_id2) pairs.
+        """
+        self.__add_edges(((vertex_id1, vertex_id2, None) for vertex_id1, vertex_id2 in edges))
+
+    def add_weighted_edges_from(self, edges):
+        """
+        Add many weighted edges at once, like `add_edges_from`.
+        Parameters:
+        edges (iterable): (vertex_id1, vertex_id2, weight) triples.
+        """
+        self.__add_edges(edges)
+
+    def __add_edges(self, edges):
+        if self.__incremental is not None:
+            # every edge has to go through the incremental checks
+            for vertex_id1, vertex_id2, weight in edges:
+                self.add_edge(vertex_id1, vertex_id2, weight)
+            return
+
+        vertex_dict = self.__vertex_dict
+        get_vertex = vertex_dict.get
+        is_directed = self.__is_directed
+        predecessors = self.__predecessors
+
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for vertex_id1, vertex_id2, weight in edges:
+                vertex1 = get_vertex(vertex_id1)
+                if vertex1 is None:
+                    vertex1 = vertex_dict[vertex_id1] = Vertex(vertex_id1)
+                vertex2 = get_vertex(vertex_id2)
+                if vertex2 is None:
+                    vertex2 = vertex_dict[vertex_id2] = Vertex(vertex_id2)
+
+                vertex1.add_neighbor(vertex2, weight)
+                if not is_directed:
+                    vertex2.add_neighbor(vertex1, weight)
+                elif predecessors is not None:
+                    predecessors.setdefault(vertex_id2, {})[vertex_id1] = vertex1
+        finally:
+            self.__version += 1
+            if gc_was_enabled:
+                gc.enable()
+
+    def remove_edge(self, vertex_id1, vertex_id2):
+        """
+        Remove the edge from vertex `vertex_id1` to vertex `vertex_id2` (in both directions for
+        an undirected graph), in O(1).
+        Parameters:
+        vertex_id1 (string): The unique identifier of the first vertex.
+        vertex_id2 (string): The unique identifier of the second vertex.
+        """
+        if vertex_id1 not in self.__vertex_dict or vertex_id2 not in self.__vertex_dict:
+            raise KeyError("One or both vertices are not in the graph!")
+        if not self.__vertex_dict[vertex_id1].remove_neighbor(vertex_id2):
+            raise KeyError("Edge not found")
+
+        if not self.__is_directed:
+            self.__vertex_dict[vertex_id2].remove_neighbor(vertex_id1)
+        elif self.__predecessors is not None:
+            self.__predecessors[vertex_id2].pop(vertex_id1)
+
+        self.__removed()
+
+    def remove_vertex(self, vertex_id):
+        """
+        Remove a vertex and every edge into or out of it. This takes O(degree) for undirected
+        graphs, and for directed graphs with the reverse index enabled (see
+        `enable_reverse_index`); otherwise finding the edges into the vertex takes a pass over
+        every vertex.
+        Parameters:
+        vertex_id (string): The unique identifier of the vertex.
+        """
+        if vertex_id not in self.__vertex_dict:
+            raise KeyError("Vertex not found")
+        vertex = self.__vertex_dict.pop(vertex_id)
 
         if not self.__is_directed:
-            self.__vertex_dict[vertex_id2].add_neighbor(self.__vertex_dict[vertex_id1])
+            for neighbor in vertex.get_neighbors():
+                neighbor.remove_neighbor(vertex_id)
+        elif self.__predecessors is not None:
+            for neighbor in vertex.get_neighbors():
+                self.__predecessors[neighbor.get_id()].pop(vertex_id, None)
+            for predecessor in self.__predecessors.pop(vertex_id, {}).values():
+                predecessor.remove_neighbor(vertex_id)
+        else:
+            for other in self.__vertex_dict.values():
+                other.remove_neighbor(vertex_id)
+
+        # a removed vertex can't keep its neighbors alive, even if the caller holds on to it
+        vertex.clear_neighbors()
+        self.__removed()
+
+    def __removed(self):
+        """Record a removal: cached results go stale and the incremental index must be rebuilt."""
+        self.__version += 1
+        if self.__incremental is not None:
+            self.__incremental_stale = True
+
+    def compact(self):
+        """
+        Reclaim the memory freed by removals. Python dictionaries keep their size when entries
+        are removed, so a graph under continuous insertion and removal grows until its
+        dictionaries are rebuilt; call this periodically (e.g. after every large batch of
+        removals) to bring memory back to what the current vertices and edges need. Also
+        rebuilds the incremental index, if enabled, dropping the ids of removed vertices.
+        """
+        self.__vertex_dict = dict(self.__vertex_dict)
+        for vertex in self.__vertex_dict.values():
+            vertex.compact()
+        if self.__predecessors is not None:
+            self.__predecessors = {vertex_id: dict(predecessors)
+                                   for vertex_id, predecessors in self.__predecessors.items() if predecessors}
+        if self.__incremental is not None:
+            self.__current_incremental()
+
+    def save(self, path):
+        """
+        Save the graph in the binary graph format. Reopen it with CompactGraph.open for
+        zero-copy, read-only access.
+        Parameters:
+        path (string): The file to write.
+        """
+        CompactGraph.from_graph(self).save(path)
 
     def get_vertices(self):
         """
@@ -103,9 +364,281 @@ class Graph:
         """
         return list(self.__vertex_dict.values())
 
+    def get_vertex_ids(self):
+        """Return the ids of all vertices in the graph."""
+        return list(self.__vertex_dict)
+
+    def subgraph_view(self, vertex_ids=None, edge_filter=None):
+        """
+        Return a read-only view of part of the graph, without copying it. Every query works on
+        the view as on a graph, and later changes to the graph show through.
+        Parameters:
+        vertex_ids (iterable): The ids of the vertices to keep, with the edges between them.
+            None keeps every vertex.
+        edge_filter (callable): Called with (vertex_id1, vertex_id2, weight) for each edge; only
+            edges it returns True for are kept. For an undirected graph it should not depend
+            on which end comes first.
+        Returns:
+        GraphView: The view.
+        """
+        vertices = SubgraphVertices(self, vertex_ids, edge_filter)
+        return self.__view(vertices, self.__is_directed)
+
+    def reversed_view(self):
+        """
+        Return a read-only view of the graph with every edge pointing the other way, without
+        copying it. Following edges in it means finding predecessors in the graph, so enable
+        the reverse index first (see `enable_reverse_index`) unless the graph is small.
+        Returns:
+        GraphView: The view.
+        """
+        return self.__view(ReversedVertices(self), self.__is_directed)
+
+    def undirected_view(self):
+        """
+        Return a read-only undirected view of the graph, without copying it: each edge can be
+        followed both ways. As with `reversed_view`, enable the reverse index first on large
+        directed graphs.
+        Returns:
+        GraphView: The view.
+        """
+        return self.__view(UndirectedVertices(self), False)
+
+    def __view(self, vertices, is_directed):
+        view = GraphView(self, is_directed)
+        view.__vertex_dict = vertices
+        if is_directed and vertices.has_reverse_index():
+            view.__predecessors = ViewPredecessors(vertices)
+        return view
+
+    def induced_subgraph(self, vertex_ids):
+        """
+        Copy some vertices and the edges between them into a new graph, a vertex at a time
+        rather than edge by edge through `add_edge`. Prefer `subgraph_view` when a copy isn't needed.
+        Parameters:
+        vertex_ids (iterable): The ids of the vertices to copy. Ids not in the graph are ignored.
+        Returns:
+        Graph: The new graph, with the reverse index enabled if this graph has it.
+        """
+        subgraph = Graph(self.__is_directed)
+        vertex_dict = subgraph.__vertex_dict
+        for vertex_id in vertex_ids:
+            if vertex_id in self.__vertex_dict and vertex_id not in vertex_dict:
+                vertex_dict[vertex_id] = Vertex(vertex_id)
+
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for vertex_id, vertex in vertex_dict.items():
+                vertex.copy_neighbors(self.__vertex_dict[vertex_id], vertex_dict)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        if self.__predecessors is not None:
+            subgraph.enable_reverse_index()
+        return subgraph
+
     def contains_id(self, vertex_id):
         return vertex_id in self.__vertex_dict
 
+    def is_directed(self):
+        """Return True if the graph is directed."""
+        return self.__is_directed
+
+    def is_weighted(self):
+        """Return True if any edge in the graph was given a weight."""
+        return any(vertex.is_weighted() for vertex in self.__vertex_dict.values())
+
+    def get_version(self):
+        """Return a counter that changes whenever a vertex or edge is added or removed."""
+        return self.__version
+
+    def enable_query_cache(self, max_entries=128):
+        """
+        Start memoizing query results (shortest paths, n-away vertices, components, ...). Results
+        are keyed by the query arguments and the graph version, so a change to the graph is never
+        answered from the cache. Edges must be added through the graph, not through Vertex directly.
+        Parameters:
+        max_entries (integer): The most results kept before the least recently used is evicted.
+        Returns:
+        QueryCache: The new cache, whose `stats()` report hits, misses and evictions.
+        """
+        self.__query_cache = QueryCache(max_entries)
+        return self.__query_cache
+
+    def disable_query_cache(self):
+        """Stop memoizing query results and drop the cache."""
+        self.__query_cache = None
+
+    def get_query_cache(self):
+        """Return the query cache, or None if caching is disabled."""
+        return self.__query_cache
+
+    def enable_incremental(self, reject_cycles=False):
+        """
+        Keep connected components (and, for directed graphs, a topological order) up to date as
+        vertices and edges are added, so `find_connected_components` and `topological_sort` no
+        longer recompute from scratch. Existing edges are indexed once, in O(V + E).
+        Parameters:
+        reject_cycles (boolean): Whether `add_edge` raises ValueError for an edge that would close
+            a cycle, leaving the graph unchanged. Otherwise the edge is added and flagged in
+            `get_incremental().get_cycle_edges()`.
+        Returns:
+        IncrementalIndex: The index, which can also be queried directly.
+        """
+        incremental = IncrementalIndex(self.__is_directed, reject_cycles)
+        for vertex_id in self.__vertex_dict:
+            incremental.add_vertex(vertex_id)
+        for vertex_id, vertex in self.__vertex_dict.items():
+            for neighbor in vertex.get_neighbors():
+                incremental.add_edge(vertex_id, neighbor.get_id())
+
+        self.__incremental = incremental
+        self.__incremental_stale = False
+        return incremental
+
+    def disable_incremental(self):
+        """Stop maintaining the incremental index."""
+        self.__incremental = None
+
+    def get_incremental(self):
+        """
+        Return the incremental index, or None if it is disabled. Union-find and the topological
+        order can't undo an edge, so after a removal the index is rebuilt, in O(V + E), the
+        next time it is used.
+        """
+        return None if self.__incremental is None else self.__current_incremental()
+
+    def __current_incremental(self):
+        """Return the incremental index, first rebuilding it if a removal made it stale."""
+        if self.__incremental_stale:
+            self.enable_incremental(self.__incremental.rejects_cycles())
+        return self.__incremental
+
+    def enable_reverse_index(self):
+        """
+        Keep, for every vertex of a directed graph, the vertices with an edge into it, so
+        `get_predecessors`, `get_in_degree`, `find_ancestors` and `remove_vertex` take time
+        proportional to their answer instead of a pass over the whole graph, and
+        `find_shortest_path` can search bidirectionally. Undirected graphs don't need it: every
+        edge is stored at both ends. Existing edges are indexed once, in O(V + E).
+        """
+        if not self.__is_directed:
+            return
+        predecessors = {}
+        for vertex_id, vertex in self.__vertex_dict.items():
+            for neighbor in vertex.get_neighbors():
+                predecessors.setdefault(neighbor.get_id(), {})[vertex_id] = vertex
+        self.__predecessors = predecessors
+
+    def disable_reverse_index(self):
+        """Stop maintaining the reverse index."""
+        self.__predecessors = None
+
+    def has_reverse_index(self):
+        """Return True if the edges into each vertex can be found without a pass over the graph."""
+        return not self.__is_directed or self.__predecessors is not None
+
+    def get_predecessors(self, vertex_id):
+        """
+        Return the vertices with an edge into the given vertex. For an undirected graph these
+        are its neighbors. Takes O(in-degree) with the reverse index, otherwise a pass over
+        every vertex.
+        Parameters:
+        vertex_id (string): The id of the vertex.
+        Returns:
+        List<Vertex>: The predecessor vertex objects.
+        """
+        if vertex_id not in self.__vertex_dict:
+            raise KeyError("Vertex not found")
+        return self.__predecessor_vertices(vertex_id)
+
+    def __predecessor_vertices(self, vertex_id):
+        if not self.__is_directed:
+            return self.__vertex_dict[vertex_id].get_neighbors()
+        if self.__predecessors is not None:
+            return list(self.__predecessors.get(vertex_id, {}).values())
+        return [vertex for vertex in self.__vertex_dict.values() if vertex.get_edge_weight(vertex_id) is not None]
+
+    def get_in_degree(self, vertex_id):
+        """Return the number of edges into a vertex (see `get_predecessors` for the cost)."""
+        if vertex_id not in self.__vertex_dict:
+            raise KeyError("Vertex not found")
+        if self.__is_directed and self.__predecessors is not None:
+            return len(self.__predecessors.get(vertex_id, ()))
+        return len(self.__predecessor_vertices(vertex_id))
+
+    def get_out_degree(self, vertex_id):
+        """Return the number of edges out of a vertex."""
+        if vertex_id not in self.__vertex_dict:
+            raise KeyError("Vertex not found")
+        return self.__vertex_dict[vertex_id].get_degree()
+
+    def get_degrees(self):
+        """
+        Return the in- and out-degree of every vertex, in O(V) with the reverse index (or for an
+        undirected graph, where both are the number of neighbors) and O(V + E) without it.
+        Returns:
+        tuple<list, array, array>: The vertex ids, in the order of `get_vertices`, and their
+            in-degrees and out-degrees as int arrays.
+        """
+        vertex_ids = list(self.__vertex_dict)
+        out_degrees = array('i', [vertex.get_degree() for vertex in self.__vertex_dict.values()])
+        if not self.__is_directed:
+            return vertex_ids, array('i', out_degrees), out_degrees
+
+        if self.__predecessors is not None:
+            predecessors = self.__predecessors
+            in_degrees = array('i', [len(predecessors.get(vertex_id, ())) for vertex_id in vertex_ids])
+        else:
+            position = {vertex_id: i for i, vertex_id in enumerate(vertex_ids)}
+            in_degrees = array('i', bytes(4 * len(vertex_ids)))
+            for vertex in self.__vertex_dict.values():
+                for neighbor in vertex.get_neighbors():
+                    in_degrees[position[neighbor.get_id()]] += 1
+        return vertex_ids, in_degrees, out_degrees
+
+    def enable_instrumentation(self, callback=None, history=DEFAULT_HISTORY):
+        """
+        Start recording, for every query, the vertices expanded, edges scanned, peak queue size
+        and time per phase. Queries answered from the query cache expand nothing.
+        Parameters:
+        callback (callable): Called with the QueryStats of every finished query, e.g.
+            instrumentation.log_stats() to write them to a log.
+        history (integer): How many finished queries to keep.
+        Returns:
+        Instrumentation: The recorder, whose `get_history()` and `summary()` report the queries.
+        """
+        self.__instrumentation = Instrumentation(callback, history)
+        return self.__instrumentation
+
+    def disable_instrumentation(self):
+        """Stop recording queries."""
+        self.__instrumentation = None
+
+    def get_instrumentation(self):
+        """Return the instrumentation recorder, or None if instrumentation is disabled."""
+        return self.__instrumentation
+
+    @contextmanager
+    def instrumented(self, callback=None, history=DEFAULT_HISTORY):
+        """
+        Record the queries run inside a with block, restoring the previous recorder afterward:
+            with graph.instrumented() as recorder:
+                graph.find_shortest_path('A', 'B')
+            print(recorder.get_history()[0].as_dict())
+        """
+        previous = self.__instrumentation
+        try:
+            yield self.enable_instrumentation(callback, history)
+        finally:
+            self.__instrumentation = previous
+
+    def __stats(self):
+        """Return the stats of the query being recorded, or None when instrumentation is off."""
+        return None if self.__instrumentation is None else self.__instrumentation.current()
+
     def __str__(self):
         """Return a string representation of the graph."""
         return f'Graph with vertices: {self.get_vertices()}'
@@ -116,51 +649,132 @@ class Graph:
 
     def bfs_traversal(self, start_id):
         """
-        Traverse the graph using breadth-first search.
+        Traverse the graph using breadth-first search, printing each vertex.
         """
-        if not self.contains_id(start_id):
-            raise KeyError("One or both vertices are not in the graph!")
+        for vertex_id in self.iter_bfs(start_id):
+            # Process current node
+            print('Processing vertex {}'.format(vertex_id))
 
-        # Keep a set to denote which vertices we've seen before
-        seen = set()
-        seen.add(start_id)
+    def iter_bfs(self, start_id, max_depth=None, with_details=False, visitor=None):
+        """
+        Lazily traverse the graph using breadth-first search. Stop early by breaking out of the
+        loop, or by returning True from the visitor.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        max_depth (integer): The greatest distance from the start to visit, or None for no limit.
+        with_details (boolean): Yield (vertex_id, depth, parent_id) tuples instead of vertex ids.
+        visitor (callable): Called with (vertex_id, depth, parent_id) before each vertex is yielded.
+        Returns:
+        iterator: The vertex ids (or tuples) in breadth-first order.
+        """
+        if not self.contains_id(start_id):
+            raise KeyError("Vertex not found")
 
-        # Keep a queue so that we visit vertices in the appropriate order
-        queue = deque()
-        queue.append(self.get_vertex(start_id))
+        return self.__bfs_generator(start_id, max_depth, with_details, visitor)
 
-        while queue:
-            current_vertex_obj = queue.popleft()
-            current_vertex_id = current_vertex_obj.get_id()
+    def __bfs_generator(self, start_id, max_depth, with_details, visitor):
+        # Keep a set to denote which vertices we've seen before
+        seen = {start_id}
+
+        # Visit one level at a time, so depths need no bookkeeping per vertex
+        frontier = [(self.__vertex_dict[start_id], None)]
+        depth = 0
+
+        while frontier:
+            next_frontier = []
+            for vertex, parent_id in frontier:
+                vertex_id = vertex.get_id()
+                if visitor is not None and visitor(vertex_id, depth, parent_id):
+                    return
+                yield (vertex_id, depth, parent_id) if with_details else vertex_id
+
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                for neighbor in vertex.get_neighbors():
+                    if neighbor.get_id() not in seen:
+                        seen.add(neighbor.get_id())
+                        next_frontier.append((neighbor, vertex_id))
+
+            frontier = next_frontier
+            depth += 1
+
+    def iter_dfs(self, start_id, max_depth=None, with_details=False, visitor=None):
+        """
+        Lazily traverse the graph using depth-first search, yielding vertices in preorder.
+        Stop early by breaking out of the loop, or by returning True from the visitor.
+        With `max_depth`, a vertex first reached along a path longer than the limit is skipped even
+        if a shorter path to it exists, as in any depth-limited DFS.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        max_depth (integer): The greatest path length from the start to follow, or None for no limit.
+        with_details (boolean): Yield (vertex_id, depth, parent_id) tuples instead of vertex ids.
+        visitor (callable): Called with (vertex_id, depth, parent_id) before each vertex is yielded.
+        Returns:
+        iterator: The vertex ids (or tuples) in depth-first preorder.
+        """
+        if not self.contains_id(start_id):
+            raise KeyError("Vertex not found")
 
-            # Process current node
-            print('Processing vertex {}'.format(current_vertex_id))
+        return self.__dfs_generator(start_id, max_depth, with_details, visitor)
 
-            # Add its neighbors to the queue
-            for neighbor in current_vertex_obj.get_neighbors():
-                if neighbor.get_id() not in seen:
-                    seen.add(neighbor.get_id())
-                    queue.append(neighbor)
+    def __dfs_generator(self, start_id, max_depth, with_details, visitor):
+        if visitor is not None and visitor(start_id, 0, None):
+            return
+        yield (start_id, 0, None) if with_details else start_id
+        if max_depth is not None and max_depth <= 0:
+            return
 
-        return  # everything has been processed
+        seen = {start_id}
+        # each stack entry is a vertex on the current path, its depth, and its unscanned neighbors
+        stack = [(start_id, 0, iter(self.__vertex_dict[start_id].get_neighbors()))]
 
-    def find_shortest_path(self, start_id, target_id):
+        while stack:
+            vertex_id, depth, neighbors = stack[-1]
+            for neighbor in neighbors:
+                neighbor_id = neighbor.get_id()
+                if neighbor_id in seen:
+                    continue
+                seen.add(neighbor_id)
+
+                if visitor is not None and visitor(neighbor_id, depth + 1, vertex_id):
+                    return
+                yield (neighbor_id, depth + 1, vertex_id) if with_details else neighbor_id
+
+                if max_depth is None or depth + 1 < max_depth:
+                    stack.append((neighbor_id, depth + 1, iter(neighbor.get_neighbors())))
+                    break
+            else:
+                stack.pop()
+
+    @instrumented_query
+    @cached_query
+    def find_shortest_path(self, start_id, target_id, bidirectional=False):
         """
         Find and return the shortest path from start_id to target_id.
         Parameters:
         start_id (string): The id of the start vertex.
         target_id (string): The id of the target (end) vertex.
+        bidirectional (boolean): Search from both ends at once and meet in the middle, which
+            touches far fewer vertices on large graphs. Directed graphs need the reverse index
+            (see `enable_reverse_index`) to search backward from the target.
         Returns:
         list<string>: A list of all vertex ids in the shortest path, from start to end.
         """
         if not self.contains_id(start_id) or not self.contains_id(target_id):
             raise KeyError("One or both vertices are not in the graph!")
 
-        # vertex keys we've seen before and their paths from the start vertex
-        vertex_id_to_path = {
-            start_id: [start_id]  # only one thing in the path
+        if bidirectional:
+            return self.__find_shortest_path_bidirectional(start_id, target_id)
+
+        # vertex keys we've seen before and the vertex we reached them from
+        parents = {
+            start_id: None  # the start has no parent
         }
 
+        stats = self.__stats()
+        if stats is not None:
+            stats.phase('search')
+
         # queue of vertices to visit next
         queue = deque()
         queue.append(self.get_vertex(start_id))
@@ -176,19 +790,166 @@ class Graph:
 
             neighbors = current_vertex_obj.get_neighbors()
             for neighbor in neighbors:
-                if neighbor.get_id() not in vertex_id_to_path:
-                    current_path = vertex_id_to_path[current_vertex_id]
-                    # extend the path by 1 vertex
-                    next_path = current_path + [neighbor.get_id()]
-                    vertex_id_to_path[neighbor.get_id()] = next_path
+                if neighbor.get_id() not in parents:
+                    parents[neighbor.get_id()] = current_vertex_id
                     queue.append(neighbor)
-                    # print(vertex_id_to_path)
+            if stats is not None:
+                stats.expand(len(neighbors), len(queue))
+
+        if target_id not in parents:  # path not found
+            return None
+
+        if stats is not None:
+            stats.phase('path')
+        return path_from_parents(parents, target_id)
+
+    def __find_shortest_path_bidirectional(self, start_id, target_id):
+        """
+        Breadth-first search from both ends, expanding one whole level of the smaller frontier
+        at a time. The first level in which the two searches meet holds a shortest path.
+        """
+        if not self.has_reverse_index():
+            raise ValueError('Bidirectional search needs an undirected graph or the reverse index')
+
+        if start_id == target_id:
+            return [start_id]
+
+        stats = self.__stats()
+        if stats is not None:
+            stats.phase('search')
+
+        # index 0 searches forward from the start, index 1 backward from the target
+        expand = (lambda vertex_id: self.__vertex_dict[vertex_id].get_neighbors(), self.__predecessor_vertices)
+        parents = ({start_id: None}, {target_id: None})
+        depths = ({start_id: 0}, {target_id: 0})
+        frontiers = ([start_id], [target_id])
+
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            seen, depth = parents[side], depths[side]
+            other_depth = depths[1 - side]
+
+            meeting_id = None
+            next_frontier = []
+            for vertex_id in frontiers[side]:
+                neighbors = expand[side](vertex_id)
+                for neighbor in neighbors:
+                    neighbor_id = neighbor.get_id()
+                    if neighbor_id in seen:
+                        continue
+                    seen[neighbor_id] = vertex_id
+                    depth[neighbor_id] = depth[vertex_id] + 1
+                    next_frontier.append(neighbor_id)
+
+                    # keep the meeting point with the shortest total length in this level
+                    if neighbor_id in other_depth and (
+                            meeting_id is None or other_depth[neighbor_id] < other_depth[meeting_id]):
+                        meeting_id = neighbor_id
+                if stats is not None:
+                    stats.expand(len(neighbors), len(next_frontier) + len(frontiers[1 - side]))
+
+            if meeting_id is not None:
+                if stats is not None:
+                    stats.phase('path')
+                forward = path_from_parents(parents[0], meeting_id)
+                backward = path_from_parents(parents[1], meeting_id)
+                return forward + backward[-2::-1]
+
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+
+        return None  # path not found
+
+    @instrumented_query
+    @cached_query
+    def find_cheapest_path(self, start_id, target_id, heuristic=None):
+        """
+        Find the lowest-cost path from start_id to target_id using Dijkstra's algorithm, or A*
+        when a heuristic is given. The search stops as soon as the target is settled.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target (end) vertex.
+        heuristic (callable): Takes (vertex_id, target_id) and returns a lower bound on the cost
+            between them. It must never overestimate; a settled vertex is reopened if a cheaper
+            path to it turns up later, so the path found is the cheapest.
+        Returns:
+        tuple<number, list<string>>: The total cost and the vertex ids on the path, or None if
+            the target can't be reached.
+        """
+        if not self.contains_id(start_id) or not self.contains_id(target_id):
+            raise KeyError("One or both vertices are not in the graph!")
 
-        if target_id not in vertex_id_to_path:  # path not found
+        costs, parents = self.__dijkstra(start_id, target_id, heuristic)
+        if target_id not in parents:  # path not found
             return None
 
-        return vertex_id_to_path[target_id]
+        stats = self.__stats()
+        if stats is not None:
+            stats.phase('path')
+        return costs[target_id], path_from_parents(parents, target_id)
+
+    @instrumented_query
+    @cached_query
+    def find_path_costs(self, start_id):
+        """
+        Find the cost of the cheapest path from start_id to every reachable vertex (Dijkstra's algorithm).
+        Parameters:
+        start_id (string): The id of the start vertex.
+        Returns:
+        dict: Maps each reachable vertex id to its path cost.
+        """
+        if not self.contains_id(start_id):
+            raise KeyError("Vertex not found")
+
+        costs, _ = self.__dijkstra(start_id)
+        return costs
+
+    def __dijkstra(self, start_id, target_id=None, heuristic=None):
+        """
+        Settle vertices in order of path cost, stopping early once `target_id` is settled. A
+        heuristic that is admissible but not consistent can settle a vertex before its cheapest
+        path is found; the vertex is then reopened when that path turns up.
+        Returns the settled costs and parent pointers.
+        """
+        stats = self.__stats()
+        if stats is not None:
+            stats.phase('search')
+
+        costs = {}  # settled vertex id -> cost
+        best = {start_id: 0}  # cheapest cost found so far
+        parents = {start_id: None}
+
+        # heap entries are (priority, tie breaker, cost, vertex id); the tie breaker keeps ids from being compared
+        heap = [(0, 0, 0, start_id)]
+        pushes = 1
+
+        while heap:
+            _, _, cost, vertex_id = heappop(heap)
+            if cost > best[vertex_id]:
+                continue  # stale entry, a cheaper path to the vertex was found since
+            costs[vertex_id] = cost
+
+            if vertex_id == target_id:
+                break
 
+            neighbors = self.__vertex_dict[vertex_id].get_weighted_neighbors()
+            for neighbor, weight in neighbors:
+                if weight < 0:
+                    raise ValueError('Cheapest paths need non-negative edge weights')
+                neighbor_id = neighbor.get_id()
+                next_cost = cost + weight
+                if neighbor_id not in best or next_cost < best[neighbor_id]:
+                    best[neighbor_id] = next_cost
+                    parents[neighbor_id] = vertex_id
+                    priority = next_cost if heuristic is None else next_cost + heuristic(neighbor_id, target_id)
+                    heappush(heap, (priority, pushes, next_cost, neighbor_id))
+                    pushes += 1
+            if stats is not None:
+                stats.expand(len(neighbors), len(heap))
+
+        return costs, parents
+
+    @instrumented_query
+    @cached_query
     def find_vertices_n_away(self, start_id, target_distance):
         """
         Find and return all vertices n distance away.
@@ -201,6 +962,8 @@ class Graph:
         if not self.contains_id(start_id):
             raise KeyError("Vertex not found")
 
+        stats = self.__stats()
+
         # vertex keys we've seen before
         visited = set()
         # list of vertices that are the target_distance away from start vertex
@@ -220,9 +983,10 @@ class Graph:
             current_vertex_id = current_vertex_obj[0]
             vertex_distance = current_vertex_obj[1]
 
-            # if distances match, add to n_away_vertices
+            # if distances match, add to n_away_vertices; nothing further out is needed
             if vertex_distance == target_distance:
                 n_away_vertices.append(current_vertex_id)
+                continue
 
             # get neighbors of current vertex
             neighbors = self.get_vertex(current_vertex_id).get_neighbors()
@@ -232,93 +996,156 @@ class Graph:
                 if neighbor.get_id() not in visited:
                     queue.append((neighbor.get_id(), vertex_distance + 1))
                     visited.add(neighbor.get_id())
+            if stats is not None:
+                stats.expand(len(neighbors), len(queue))
 
         return n_away_vertices
 
-    def is_bipartite(self):
+    @instrumented_query
+    @cached_query
+    def find_descendants(self, start_id, max_depth=None):
         """
-        Return True if the graph is bipartite, and False otherwise.
+        Find the vertices reachable from a vertex, e.g. everything that depends on it when edges
+        point from a dependency to its dependents. Takes time proportional to the answer.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        max_depth (integer): The most edges to follow, or None for no limit.
+        Returns:
+        list<string>: The ids of the reachable vertices, nearest first, without the start.
         """
-        queue = deque()
-        visited = {}
-        # visited = set()
-
-        current_color = 0
-
-        current_vertex_id = choice(list(self.__vertex_dict.keys()))
-
-        queue.append(current_vertex_id)
-        visited[current_vertex_id] = current_color
-        # visited.add((current_vertex_id, current_color))
-
-        while queue:
-            # use bitwise operator to 'change color' (toggle 0 and 1)
-            current_color ^= 1
-
-            # grab next in queue
-            current_vertex_id = queue.popleft()
-
-            # get neighbors
-            neighbors = self.get_vertex(current_vertex_id).get_neighbors()
+        if not self.contains_id(start_id):
+            raise KeyError("Vertex not found")
+        return self.__reach(start_id, max_depth, lambda vertex_id: self.__vertex_dict[vertex_id].get_neighbors())
 
-            for neighbor in neighbors:
-                # if not already visited,
-                if neighbor.get_id() not in visited.keys():
-                    # tag neighbor with alt color, add to visited
-                    visited[neighbor.get_id()] = current_color
+    @instrumented_query
+    @cached_query
+    def find_ancestors(self, start_id, max_depth=None):
+        """
+        Find the vertices that can reach a vertex, by following edges backward. Takes time
+        proportional to the answer with the reverse index (see `enable_reverse_index`); without
+        it, the edges are first reversed in O(V + E).
+        Parameters:
+        start_id (string): The id of the start vertex.
+        max_depth (integer): The most edges to follow, or None for no limit.
+        Returns:
+        list<string>: The ids of the vertices that reach the start, nearest first, without the start.
+        """
+        if not self.contains_id(start_id):
+            raise KeyError("Vertex not found")
+        if self.has_reverse_index():
+            return self.__reach(start_id, max_depth, self.__predecessor_vertices)
 
-                    # add to queue
-                    queue.append(neighbor.get_id())
-                else:
-                    # is neighbor same color as current vertex color?
-                    if visited[current_vertex_id] == visited[neighbor.get_id()]:
-                        return False
+        predecessors = {}
+        for vertex in self.__vertex_dict.values():
+            for neighbor in vertex.get_neighbors():
+                predecessors.setdefault(neighbor.get_id(), []).append(vertex)
+        return self.__reach(start_id, max_depth, lambda vertex_id: predecessors.get(vertex_id, ()))
+
+    def __reach(self, start_id, max_depth, expand):
+        """Breadth-first search one level at a time, following `expand(vertex_id)` to the next vertices."""
+        stats = self.__stats()
+        if stats is not None:
+            stats.phase('search')
+
+        seen = {start_id}
+        reached = []
+        frontier = [start_id]
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            next_frontier = []
+            for vertex_id in frontier:
+                vertices = expand(vertex_id)
+                for vertex in vertices:
+                    next_id = vertex.get_id()
+                    if next_id not in seen:
+                        seen.add(next_id)
+                        next_frontier.append(next_id)
+                if stats is not None:
+                    stats.expand(len(vertices), len(next_frontier))
+            reached.extend(next_frontier)
+            frontier = next_frontier
+            depth += 1
+        return reached
+
+    @instrumented_query
+    def is_bipartite(self):
+        """
+        Return True if the graph is bipartite, and False otherwise.
+        Every component is checked; edge direction is ignored.
+        """
+        return self.find_odd_cycle() is None
 
-        return True
+    @instrumented_query
+    @cached_query
+    def find_bipartition(self):
+        """
+        Split the vertices into two sides with every edge between the sides, checking every
+        component in O(V + E) time. Edge direction is ignored. The split is the same on every run:
+        the first vertex of each component goes on the first side.
+        Returns:
+        tuple<list, list>: The vertex ids of each side, or None if the graph is not bipartite.
+        """
+        compact = CompactGraph.from_graph(self)
+        colors, _ = bipartite_coloring(compact)
+        if colors is None:
+            return None
+        sides = ([], [])
+        for vertex_id, color in zip(compact.get_vertex_ids(), colors):
+            sides[color].append(vertex_id)
+        return sides
+
+    @instrumented_query
+    @cached_query
+    def find_odd_cycle(self):
+        """
+        Return a cycle of odd length, which proves the graph is not bipartite. Edge direction is ignored.
+        Returns:
+        list: The vertex ids of the cycle, each adjacent to the next and the last to the first,
+            or None if the graph is bipartite.
+        """
+        compact = CompactGraph.from_graph(self)
+        _, cycle = bipartite_coloring(compact)
+        if cycle is None:
+            return None
+        return [compact.get_id(vertex) for vertex in cycle]
 
+    @instrumented_query
+    @cached_query
     def find_connected_components(self):
         """
         Return a list of all connected components, with each connected component represented as a list of vertex ids.
+        Edge direction is ignored, so components of a directed graph are its weakly connected components.
+        Runs in O(V + E) time using union-find, or reads the incremental index if enabled.
         """
-        vertices = set(self.__vertex_dict.keys())
-
-        components = []
-
-        # while there are unvisited vertices
-        while vertices:
-            component = []
-            queue = []
-
-            start_id = vertices.pop()
+        if self.__incremental is not None:
+            return self.__current_incremental().get_components()
 
-            # add initial vertex to queue and component lists
-            queue.append(start_id)
-            component.append(start_id)
+        stats = self.__stats()
+        if stats is not None:
+            stats.phase('union')
 
-            # while queue is not empty
-            while queue:
-                # pop vertex in queue
-                current_id = queue.pop()
-                current_vertex = self.get_vertex(current_id)
+        index = {vertex_id: i for i, vertex_id in enumerate(self.__vertex_dict)}
+        union_find = UnionFind(len(index))
 
-                # get neighbors
-                for neighbor in current_vertex.get_neighbors():
-                    neighbor_id = neighbor.get_id()
-
-                    # if neighbor unvisited, remove from vertices list
-                    if neighbor_id in vertices:
-                        vertices.remove(neighbor_id)
-
-                    # if neighbor not already in component, add to queue for processing, add to component list
-                    if neighbor_id not in component:
-                        queue.append(neighbor_id)
-                        component.append(neighbor_id)
+        # merge the endpoints of every edge
+        for vertex_id, vertex in self.__vertex_dict.items():
+            vertex_index = index[vertex_id]
+            neighbors = vertex.get_neighbors()
+            for neighbor in neighbors:
+                union_find.union(vertex_index, index[neighbor.get_id()])
+            if stats is not None:
+                stats.expand(len(neighbors))
 
-            # add component group to components
-            components.append(component)
+        if stats is not None:
+            stats.phase('labels')
+        count, labels = union_find.labels()
+        components = [[] for _ in range(count)]
+        for vertex_id, label in zip(index, labels):
+            components[label].append(vertex_id)
 
         return components
 
+    @instrumented_query
     def find_path_dfs_iter(self, start_id, target_id):
         """
         Use DFS with a stack to find a path from start_id to target_id.
@@ -327,13 +1154,15 @@ class Graph:
         if not self.contains_id(start_id) or not self.contains_id(target_id):
             raise KeyError("One or both vertices are not in the graph!")
 
+        stats = self.__stats()
+
         # stack of vertices to visit next
         stack = deque()
         stack.append(self.get_vertex(start_id))
 
-        # vertex keys we've seen before and their paths from the start vertex
-        path_to_target = {
-            start_id: [start_id]
+        # vertex keys we've seen before and the vertex we reached them from
+        parents = {
+            start_id: None
         }
 
         # while stack is not empty
@@ -347,108 +1176,215 @@ class Graph:
 
             neighbors = current_vertex_obj.get_neighbors()
             for neighbor in neighbors:
-                if neighbor.get_id() not in path_to_target:
+                if neighbor.get_id() not in parents:
                     stack.append(neighbor)
-                    # print(vertex_id_to_path)
+                    parents[neighbor.get_id()] = current_vertex_id
+            if stats is not None:
+                stats.expand(len(neighbors), len(stack))
 
-                    current_path = path_to_target[current_vertex_id]
-                    # extend the path by 1 vertex
-                    next_path = current_path + [neighbor.get_id()]
-                    path_to_target[neighbor.get_id()] = next_path
-
-        if target_id not in path_to_target:  # path not found
+        if target_id not in parents:  # path not found
             return None
 
-        return path_to_target[target_id]
+        return path_from_parents(parents, target_id)
 
-    def dfs_traversal(self, start_id):
-        """Visit each vertex, starting with start_id, in DFS order."""
+    @instrumented_query
+    def depth_first_search(self, start_ids=None, pre_visit=None, post_visit=None, back_edge=None):
+        """
+        Run an iterative depth-first search, coloring vertices white (unseen), gray (on the
+        current path) and black (finished). An explicit stack replaces recursion, so paths of
+        any depth are fine.
+        Any hook may return True to stop the search early.
+        Parameters:
+        start_ids (iterable<string>): Where to start, in order. Defaults to every vertex, so the
+            whole graph is covered.
+        pre_visit (callable): Called with a vertex id when the vertex is discovered.
+        post_visit (callable): Called with a vertex id once all its neighbors are finished.
+        back_edge (callable): Called with (vertex_id, neighbor_id) for an edge to a gray vertex,
+            i.e. an edge closing a cycle. In undirected graphs the edge back to the DFS parent is skipped.
+        Returns:
+        boolean: True if a hook stopped the search, False otherwise.
+        """
+        if start_ids is None:
+            start_ids = list(self.__vertex_dict)
 
-        visited = set()  # set of vertices we've visited so far
+        color = {}  # vertex id -> GRAY or BLACK; missing means WHITE
+        stats = self.__stats()
 
-        def dfs_traversal_recursive(start_vertex):
-            print(f'Visiting vertex {start_vertex.get_id()}')
+        for start_id in start_ids:
+            if start_id in color:
+                continue
+            if start_id not in self.__vertex_dict:
+                raise KeyError("Vertex not found")
 
-            # recurse for each vertex in neighbors
-            for neighbor in start_vertex.get_neighbors():
-                if neighbor.get_id() not in visited:
-                    visited.add(neighbor.get_id())
-                    dfs_traversal_recursive(neighbor)
-            return
+            color[start_id] = GRAY
+            if pre_visit is not None and pre_visit(start_id):
+                return True
 
-        visited.add(start_id)
-        start_vertex = self.get_vertex(start_id)
-        dfs_traversal_recursive(start_vertex)
+            # each stack entry is a vertex on the current path, its DFS parent, and its unscanned neighbors
+            stack = [(start_id, None, iter(self.__vertex_dict[start_id].get_neighbors()))]
 
-        return
+            while stack:
+                vertex_id, parent_id, neighbors = stack[-1]
 
-    def contains_cycle(self):
+                for neighbor in neighbors:
+                    neighbor_id = neighbor.get_id()
+                    neighbor_color = color.get(neighbor_id, WHITE)
+
+                    if neighbor_color == WHITE:
+                        color[neighbor_id] = GRAY
+                        if pre_visit is not None and pre_visit(neighbor_id):
+                            return True
+                        stack.append((neighbor_id, vertex_id, iter(neighbor.get_neighbors())))
+                        break
+
+                    if neighbor_color == GRAY and back_edge is not None:
+                        if not self.__is_directed and neighbor_id == parent_id:
+                            continue
+                        if back_edge(vertex_id, neighbor_id):
+                            return True
+                else:
+                    # all neighbors done, so the vertex is finished
+                    if stats is not None:
+                        stats.expand(len(self.__vertex_dict[vertex_id].get_neighbors()), len(stack))
+                    stack.pop()
+                    color[vertex_id] = BLACK
+                    if post_visit is not None and post_visit(vertex_id):
+                        return True
 
-        visited = set()
-        stack = set()
+        return False
 
-        start_id = choice(list(self.__vertex_dict.keys()))
+    def dfs_traversal(self, start_id):
+        """Visit each vertex, starting with start_id, in DFS order, printing each one."""
+        for vertex_id in self.iter_dfs(start_id):
+            print(f'Visiting vertex {vertex_id}')
 
-        def dfs_cycle_check(vertex):
-            # print(f'Visiting vertex {start_vertex.get_id()}')
+    @instrumented_query
+    def contains_cycle(self):
+        """
+        Return True if the graph contains a cycle. Every component is checked.
+        """
+        return self.depth_first_search(back_edge=lambda vertex_id, neighbor_id: True)
 
-            # if it's already visited, it's been cleared for no cycle
-            if vertex in visited:
-                return False
+    @instrumented_query
+    @cached_query
+    def topological_sort(self):
+        """
+        Return a valid ordering of vertices in a directed acyclic graph. If the graph contains a cycle, throw a ValueError.
+        Uses Kahn's algorithm, which detects cycles in the same linear pass, or reads the
+        incremental index if enabled.
+        """
+        if self.__incremental is not None and self.__is_directed:
+            incremental = self.__current_incremental()
+            if incremental.has_cycle():
+                raise ValueError('Graph not DAG')
+            return incremental.get_topological_order()
+
+        stats = self.__stats()
+        if stats is not None:
+            stats.phase('in_degrees')
+
+        in_degree = dict.fromkeys(self.__vertex_dict, 0)
+        for vertex in self.__vertex_dict.values():
+            neighbors = vertex.get_neighbors()
+            for neighbor in neighbors:
+                in_degree[neighbor.get_id()] += 1
+            if stats is not None:
+                stats.scan(len(neighbors))
 
-            # else, add vertex to visited and to stack
-            visited.add(vertex)
-            stack.add(vertex)
+        if stats is not None:
+            stats.phase('ordering')
 
-            # recurse for each vertex in neighbors
-            for neighbor in vertex.get_neighbors():
-                # if neighbor is already in the stack or seen during the recurse, it's a cycle
-                if neighbor in stack or dfs_cycle_check(neighbor):
-                    return True
-            # otherwise, no cycle, recurse done, pop from stack
-            stack.remove(vertex)
-            return False
+        # start from the vertices with no incoming edges
+        order = [vertex_id for vertex_id, degree in in_degree.items() if degree == 0]
+
+        # `order` grows while we walk it: each vertex is appended once its last incoming edge is removed
+        for position, vertex_id in enumerate(order):
+            neighbors = self.__vertex_dict[vertex_id].get_neighbors()
+            for neighbor in neighbors:
+                neighbor_id = neighbor.get_id()
+                in_degree[neighbor_id] -= 1
+                if in_degree[neighbor_id] == 0:
+                    order.append(neighbor_id)
+            if stats is not None:
+                stats.expand(len(neighbors), len(order) - position - 1)  # the queue is the unwalked tail
+
+        # vertices never freed lie on (or behind) a cycle
+        if len(order) != len(in_degree):
+            raise ValueError('Graph not DAG')
 
-        stack.add(start_id)
-        start_vertex = self.get_vertex(start_id)
+        return order
 
-        if dfs_cycle_check(start_vertex):
-            return True
-        return False
 
-        # An alternative: any() function returns True if any element of an iterable is True, returns False if any is False
+def _read_only(self, *args, **kwargs):
+    raise TypeError('Graph views are read-only')
 
-        # return any(dfs_cycle_check(start_vertex) for start_vertex in self.__vertex_dict.values())
 
-    def topological_sort(self):
+class GraphView(Graph):
+    """
+    A read-only view of a graph, made by Graph.subgraph_view, reversed_view or undirected_view.
+    It answers every query a Graph does, straight from the graph it views, so changes to that
+    graph show through; methods that would change the view raise TypeError.
+    """
+
+    def __init__(self, source, is_directed):
         """
-        Return a valid ordering of vertices in a directed acyclic graph. If the graph contains a cycle, throw a ValueError.
+        Parameters:
+        source (Graph): The graph (or view) being viewed.
+        is_directed (boolean): Whether the view is directed.
         """
+        super().__init__(is_directed)
+        self.__source = source
 
-        stack = []
-        visited = set()
+    def get_source(self):
+        """Return the graph being viewed."""
+        return self.__source
 
-        if self.contains_cycle():
-            raise ValueError('Graph not DAG')
+    def get_version(self):
+        """Return the version of the graph being viewed, which is what the view's results depend on."""
+        return self.__source.get_version()
 
-        def dfs_topo_sort(vertex):
-            # print(f'Visiting vertex {vertex.get_id()}')
-            visited.add(vertex.get_id())
+    def induced_subgraph(self, vertex_ids):
+        """
+        Copy some vertices of the view and the edges between them into a new graph.
+        Parameters:
+        vertex_ids (iterable): The ids of the vertices to copy. Ids not in the view are ignored.
+        Returns:
+        Graph: The new graph.
+        """
+        subgraph = Graph(self.is_directed())
+        for vertex_id in vertex_ids:
+            if self.contains_id(vertex_id) and not subgraph.contains_id(vertex_id):
+                subgraph.add_vertex(vertex_id)
 
-            # recurse for each vertex in neighbors
-            for neighbor in vertex.get_neighbors():
-                if neighbor.get_id() not in visited:
-                    dfs_topo_sort(neighbor)
+        is_weighted = self.is_weighted()
+        subgraph.add_weighted_edges_from(
+            (vertex_id, neighbor.get_id(), weight if is_weighted else None)
+            for vertex_id in subgraph.get_vertex_ids()
+            for neighbor, weight in self.get_vertex(vertex_id).get_weighted_neighbors()
+            if subgraph.contains_id(neighbor.get_id()))
+        return subgraph
+
+    def to_graph(self):
+        """Copy the whole view into a new graph."""
+        return self.induced_subgraph(self.get_vertex_ids())
 
-            # On the way back up the recursion tree (that is, after visiting a vertex's neighbors), add the vertex to the stack.
-            # print(f'Visited: {visited} \nAdding {vertex.get_id()} to stack {stack}')
-            stack.append(vertex.get_id())
+    add_vertex = add_edge = add_edges_from = add_weighted_edges_from = _read_only
+    remove_edge = remove_vertex = compact = _read_only
+    enable_incremental = enable_reverse_index = _read_only
 
-        # For each unvisited vertex, execute a DFS from that vertex.
-        for vertex in list(self.__vertex_dict.values()):
-            # print(vertex.get_id(), visited)
-            if vertex.get_id() not in visited:
-                dfs_topo_sort(vertex)
 
-        # Reverse the contents of the stack and return it as a valid ordering.
-        return stack[::-1]
\ No newline at end of file
+def path_from_parents(parents, vertex_id):
+    """
+    Walk parent pointers back from a vertex to the root of its search.
+    Parameters:
+    parents (dict): Maps each discovered vertex id to the id it was reached from; the root maps to None.
+    vertex_id (string): The vertex to end the path at.
+    Returns:
+    list<string>: The vertex ids from the root to `vertex_id`.
+    """
+    path = []
+    while vertex_id is not None:
+        path.append(vertex_id)
+        vertex_id = parents[vertex_id]
+    path.reverse()
+    return path
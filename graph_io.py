@@ -0,0 +1,225 @@
+import gzip
+import mmap
+import struct
+import sys
+from array import array
+
+DEFAULT_CHUNK_SIZE = 65536
+
+
+def open_text(path):
+    """Open a text file for reading, decompressing it on the fly if its name ends in .gz."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+
+def guess_delimiter(path):
+    """Return the field delimiter for a path: ',' for .csv, tab for .tsv, otherwise any whitespace."""
+    name = str(path)
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.csv'):
+        return ','
+    if name.endswith('.tsv'):
+        return '\t'
+    return None
+
+
+def read_edge_chunks(path, delimiter=None, comments='#', skip_header=False, parse_id=None,
+                     chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream the edges of an edge-list file in chunks.
+    Each non-blank, non-comment line holds two vertex ids; any further fields are ignored.
+    Parameters:
+    path (string): The file to read. Files ending in .gz are decompressed on the fly.
+    delimiter (string): The field separator. Defaults to one guessed from the file extension.
+    comments (string): Lines starting with this prefix are skipped.
+    skip_header (boolean): Whether to skip the first line of the file.
+    parse_id (callable): Converts each id field, e.g. `int`. By default ids are kept as interned strings.
+    chunk_size (integer): The number of edges in each yielded chunk.
+    Returns:
+    iterator<list<tuple>>: Lists of at most `chunk_size` (vertex_id1, vertex_id2) pairs.
+    """
+    if delimiter is None:
+        delimiter = guess_delimiter(path)
+    if parse_id is None:
+        parse_id = sys.intern
+
+    with open_text(path) as lines:
+        if skip_header:
+            next(lines, None)
+
+        chunk = []
+        for line_number, line in enumerate(lines, 2 if skip_header else 1):
+            if not line.strip() or (comments and line.startswith(comments)):
+                continue
+
+            fields = line.split(delimiter)
+            if len(fields) < 2:
+                raise ValueError(f'{path}:{line_number}: expected two vertex ids, got {line.strip()!r}')
+            chunk.append((parse_id(fields[0].strip()), parse_id(fields[1].strip())))
+
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
+
+# Binary CSR format, little-endian, every section aligned to 8 bytes:
+#   header:   magic, version, flags, id kind, vertex count n, edge count m
+#   offsets:  n + 1 int64
+#   targets:  m int32
+#   weights:  m float64, only if the weighted flag is set (version 2 and up)
+#   id table: nothing (ids are 0..n-1), n int64, or n + 1 int64 string offsets followed by UTF-8 bytes
+BINARY_MAGIC = b'GRAPHCSR'
+BINARY_VERSION = 2
+HEADER = struct.Struct('<8sHHIqq')
+
+FLAG_DIRECTED = 1
+FLAG_WEIGHTED = 2
+
+IDS_RANGE = 0
+IDS_INT = 1
+IDS_STR = 2
+
+
+class StringTable(object):
+    """
+    A read-only sequence of strings decoded on access from a packed UTF-8 buffer.
+    """
+
+    def __init__(self, offsets, data):
+        """
+        Parameters:
+        offsets (memoryview): n + 1 int64 offsets into `data`.
+        data (memoryview): The concatenated UTF-8 encoded strings.
+        """
+        self.__offsets = offsets
+        self.__data = data
+
+    def __len__(self):
+        return len(self.__offsets) - 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('string table index out of range')
+        return str(self.__data[self.__offsets[index]:self.__offsets[index + 1]], 'utf-8')
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+def _padding(size):
+    return -size % 8
+
+
+def _id_kind(vertex_ids):
+    if all(type(vertex_id) is int for vertex_id in vertex_ids):
+        if all(vertex_id == i for i, vertex_id in enumerate(vertex_ids)):
+            return IDS_RANGE
+        return IDS_INT
+    if all(isinstance(vertex_id, str) for vertex_id in vertex_ids):
+        return IDS_STR
+    raise TypeError('vertex ids must be all integers or all strings to be saved')
+
+
+def _little_endian(values, typecode):
+    if sys.byteorder == 'little' and isinstance(values, array) and values.typecode == typecode:
+        return values
+    values = array(typecode, values)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+def write_binary(path, vertex_ids, offsets, targets, is_directed=True, weights=None):
+    """
+    Write CSR adjacency to `path` in the binary graph format.
+    Parameters:
+    path (string): The file to write.
+    vertex_ids (sequence): The vertex id at each index; all integers or all strings.
+    offsets (array): n + 1 int64 offsets into `targets`.
+    targets (array): The int32 neighbor index of every edge.
+    is_directed (boolean): Whether the graph is directed.
+    weights (array): The float64 weight of every edge, or None if the graph is unweighted.
+    """
+    id_kind = _id_kind(vertex_ids)
+    flags = (FLAG_DIRECTED if is_directed else 0) | (FLAG_WEIGHTED if weights is not None else 0)
+
+    with open(path, 'wb') as out:
+        out.write(HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, id_kind, len(vertex_ids), len(targets)))
+        out.write(bytes(_padding(HEADER.size)))
+
+        _little_endian(offsets, 'q').tofile(out)
+        _little_endian(targets, 'i').tofile(out)
+        out.write(bytes(_padding(4 * len(targets))))
+        if weights is not None:
+            _little_endian(weights, 'd').tofile(out)
+
+        if id_kind == IDS_INT:
+            _little_endian(vertex_ids, 'q').tofile(out)
+        elif id_kind == IDS_STR:
+            encoded = [vertex_id.encode('utf-8') for vertex_id in vertex_ids]
+            string_offsets = array('q', [0])
+            for data in encoded:
+                string_offsets.append(string_offsets[-1] + len(data))
+            _little_endian(string_offsets, 'q').tofile(out)
+            out.write(b''.join(encoded))
+
+
+def _section(buffer, start, count, typecode):
+    size = count * array(typecode).itemsize
+    view = buffer[start:start + size]
+    if sys.byteorder != 'little':
+        values = array(typecode, bytes(view))
+        values.byteswap()
+        return values, start + size + _padding(size)
+    return view.cast(typecode), start + size + _padding(size)
+
+
+def read_binary(path):
+    """
+    Open a file in the binary graph format by memory-mapping it. Adjacency arrays and integer ids
+    are zero-copy views of the mapping, so processes opening the same file share the page cache.
+    Parameters:
+    path (string): The file to open.
+    Returns:
+    tuple: The vertex ids (a sequence), offsets, targets, whether the graph is directed, and the
+        weights (None if the graph is unweighted).
+    """
+    with open(path, 'rb') as graph_file:
+        mapping = mmap.mmap(graph_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    buffer = memoryview(mapping)
+    if len(buffer) < HEADER.size:
+        raise ValueError(f'{path} is not a binary graph file')
+    magic, version, flags, id_kind, n, m = HEADER.unpack_from(buffer)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f'{path} is not a binary graph file')
+    if not 1 <= version <= BINARY_VERSION:
+        raise ValueError(f'{path} has unsupported binary graph version {version}')
+
+    position = HEADER.size + _padding(HEADER.size)
+    offsets, position = _section(buffer, position, n + 1, 'q')
+    targets, position = _section(buffer, position, m, 'i')
+    weights = None
+    if flags & FLAG_WEIGHTED:
+        weights, position = _section(buffer, position, m, 'd')
+
+    if id_kind == IDS_RANGE:
+        vertex_ids = range(n)
+    elif id_kind == IDS_INT:
+        vertex_ids, position = _section(buffer, position, n, 'q')
+    elif id_kind == IDS_STR:
+        string_offsets, position = _section(buffer, position, n + 1, 'q')
+        vertex_ids = StringTable(string_offsets, buffer[position:])
+    else:
+        raise ValueError(f'{path} has unknown id table kind {id_kind}')
+
+    return vertex_ids, offsets, targets, bool(flags & FLAG_DIRECTED), weights
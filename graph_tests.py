@@ -0,0 +1,841 @@
+
+from compact_graph import CompactGraph
+from graph import Graph
+import compact_graph
+import components
+import generators
+import gzip
+import instrumentation
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+import unittest
+
+
+def make_graph(edges, is_directed=True):
+    graph = Graph(is_directed=is_directed)
+    for vertex_id1, vertex_id2 in edges:
+        graph.add_edge(vertex_id1, vertex_id2)
+    return graph
+
+
+class CompactGraphTests(unittest.TestCase):
+    def test_from_graph_matches_graph(self):
+        """A compact copy answers the same queries as the Graph it came from."""
+        edges = [('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D'), ('D', 'E'), ('F', 'G')]
+        graph = make_graph(edges, is_directed=False)
+        compact = CompactGraph.from_graph(graph)
+
+        assert compact.num_vertices() == 7
+        assert compact.get_neighbors('A') == ['B', 'C']
+        assert compact.find_shortest_path('A', 'E') == graph.find_shortest_path('A', 'E')
+        assert compact.find_shortest_path('A', 'F') is None
+        assert sorted(compact.find_vertices_n_away('A', 2)) == sorted(graph.find_vertices_n_away('A', 2))
+        for direction in (compact_graph.TOP_DOWN, compact_graph.BOTTOM_UP, compact_graph.DIRECTION_OPTIMIZING):
+            assert compact.find_vertices_n_away('A', -1, direction) == graph.find_vertices_n_away('A', -1) == []
+        assert sorted(map(sorted, compact.find_connected_components())) == [
+            ['A', 'B', 'C', 'D', 'E'], ['F', 'G']]
+
+    def test_from_edges(self):
+        """Edges are grouped by source in insertion order and repeats are dropped."""
+        compact = CompactGraph.from_edges([(1, 2), (1, 3), (2, 3), (1, 2)], vertex_ids=[4])
+
+        assert compact.num_vertices() == 4
+        assert compact.num_edges() == 3
+        assert compact.get_neighbors(1) == [2, 3]
+        assert compact.get_neighbors(4) == []
+        assert compact.transpose().get_neighbors(3) == [1, 2]
+        # direction is ignored for components
+        assert sorted(map(sorted, compact.find_connected_components())) == [[1, 2, 3], [4]]
+
+    def test_topological_sort(self):
+        compact = CompactGraph.from_edges([(0, 1), (0, 2), (1, 3), (2, 3)])
+        assert compact.topological_sort() == [0, 1, 2, 3]
+
+        with self.assertRaises(ValueError):
+            CompactGraph.from_edges([(0, 1), (1, 2), (2, 0)]).topological_sort()
+
+
+class EdgeListTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_add_edges_from(self):
+        """Bulk insertion gives the same graph as repeated add_edge calls."""
+        edges = [('A', 'B'), ('B', 'C'), ('A', 'C'), ('A', 'B'), ('D', 'D')]
+        bulk = Graph(is_directed=False)
+        bulk.add_edges_from(edges)
+
+        assert str(bulk) == str(make_graph(edges, is_directed=False))
+
+    def test_from_edge_list(self):
+        """Edge lists are read in chunks from plain, CSV and gzipped files."""
+        path = os.path.join(self.directory.name, 'edges.csv.gz')
+        with gzip.open(path, 'wt') as edge_file:
+            edge_file.write('source,target\n# a comment\n1,2\n2,3\n\n3,1,extra\n')
+
+        graph = Graph.from_edge_list(path, skip_header=True, parse_id=int, chunk_size=2)
+        assert [vertex.get_id() for vertex in graph.get_vertices()] == [1, 2, 3]
+        assert graph.find_shortest_path(1, 3) == [1, 2, 3]
+
+        path = os.path.join(self.directory.name, 'edges.txt')
+        with open(path, 'w') as edge_file:
+            edge_file.write('a b\nb c\n')
+
+        compact = CompactGraph.from_edge_list(path, is_directed=False)
+        assert compact.get_neighbors('b') == ['a', 'c']
+
+        with open(path, 'w') as edge_file:
+            edge_file.write('a\n')
+        with self.assertRaises(ValueError):
+            Graph.from_edge_list(path)
+
+
+class BinaryFormatTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'graph.bin')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_save_and_open(self):
+        """Saved graphs reopen with the same ids and adjacency, for every kind of id table."""
+        for edges in ([(0, 1), (1, 2)], [(10, 20), (20, 5)], [('a', 'b'), ('b', 'é')]):
+            graph = make_graph(edges)
+            graph.save(self.path)
+            compact = CompactGraph.open(self.path)
+
+            assert list(compact.get_vertex_ids()) == [vertex.get_id() for vertex in graph.get_vertices()]
+            assert compact.find_shortest_path(edges[0][0], edges[1][1]) == [edges[0][0], edges[0][1], edges[1][1]]
+            assert compact.is_directed()
+
+            del compact
+
+    def test_undirected_round_trip(self):
+        original = CompactGraph.from_edges([('x', 'y'), ('y', 'z')], is_directed=False)
+        original.save(self.path)
+        reopened = CompactGraph.open(self.path)
+
+        assert not reopened.is_directed()
+        assert reopened.get_neighbors('y') == ['x', 'z']
+        assert list(reopened.get_offsets()) == list(original.get_offsets())
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as out:
+            out.write(b'not a graph file at all, clearly')
+        with self.assertRaises(ValueError):
+            CompactGraph.open(self.path)
+
+        with self.assertRaises(TypeError):
+            CompactGraph.from_edges([(1, 'a')]).save(self.path)
+
+
+class ComponentsTests(unittest.TestCase):
+    def setUp(self):
+        self.graph = make_graph([(1, 2), (3, 2), (4, 5), (5, 6), (6, 4), (6, 7), (8, 8)])
+        self.graph.add_vertex(9)
+
+    def test_find_connected_components(self):
+        """Directed graphs are split into weakly connected components."""
+        assert self.graph.find_connected_components() == [[1, 2, 3], [4, 5, 6, 7], [8], [9]]
+
+    def test_component_labels(self):
+        """Union-find, BFS and process-pool labeling agree."""
+        expected = (4, [0, 0, 0, 1, 1, 1, 1, 2, 3])
+        for labeler in (components.connected_component_labels, components.bfs_component_labels):
+            count, labels = labeler(self.graph)
+            assert (count, list(labels)) == expected
+
+        count, labels = components.parallel_component_labels(self.graph, processes=2, blocks=3)
+        assert (count, list(labels)) == expected
+
+        graph = CompactGraph.from_edges(generators.erdos_renyi_edges(500, 400, seed=4), vertex_ids=range(500))
+        assert components.parallel_component_labels(graph, processes=2, blocks=7) == \
+            components.connected_component_labels(graph)
+
+    def test_strongly_connected_components(self):
+        compact = CompactGraph.from_graph(self.graph)
+        count, labels = components.strongly_connected_component_labels(compact)
+
+        groups = components.group_by_label(compact, count, labels)
+        assert sorted(map(sorted, groups)) == [[1], [2], [3], [4, 5, 6], [7], [8], [9]]
+        # edges between components go from higher to lower labels
+        assert labels[compact.get_index(6)] > labels[compact.get_index(7)]
+
+    def test_union_find(self):
+        union_find = components.UnionFind(3)
+        assert union_find.union(0, 1)
+        assert not union_find.union(1, 0)
+        assert union_find.add() == 3
+        assert union_find.count() == 3
+        assert union_find.connected(0, 1) and not union_find.connected(1, 2)
+
+
+class DepthFirstSearchTests(unittest.TestCase):
+    def test_deep_paths(self):
+        """Long chains no longer hit the recursion limit."""
+        graph = Graph()
+        graph.add_edges_from((i, i + 1) for i in range(20000))
+
+        assert not graph.contains_cycle()
+        assert graph.topological_sort() == list(range(20001))
+
+        post_order = []
+        graph.depth_first_search([0], post_visit=post_order.append)
+        assert post_order == list(range(20000, -1, -1))
+
+    def test_contains_cycle(self):
+        """Cycles are found in any component, not just the one a search happens to start in."""
+        graph = make_graph([(1, 2), (3, 4), (4, 5), (5, 3)])
+        assert graph.contains_cycle()
+        with self.assertRaises(ValueError):
+            graph.topological_sort()
+
+        assert not make_graph([('A', 'B'), ('B', 'C'), ('B', 'D')], is_directed=False).contains_cycle()
+        assert make_graph([('A', 'B'), ('B', 'C'), ('C', 'A')], is_directed=False).contains_cycle()
+
+    def test_topological_sort(self):
+        graph = make_graph([('shirt', 'tie'), ('tie', 'jacket'), ('pants', 'shoes'), ('pants', 'belt'),
+                            ('belt', 'jacket'), ('socks', 'shoes')])
+        order = graph.topological_sort()
+
+        assert sorted(order) == sorted(vertex.get_id() for vertex in graph.get_vertices())
+        for vertex in graph.get_vertices():
+            for neighbor in vertex.get_neighbors():
+                assert order.index(vertex.get_id()) < order.index(neighbor.get_id())
+
+
+class ShortestPathTests(unittest.TestCase):
+    def test_bidirectional_matches_bfs(self):
+        """Bidirectional search finds paths as short as plain BFS."""
+        rng = random.Random(7)
+        edges = [(rng.randrange(60), rng.randrange(60)) for _ in range(90)]
+        graph = make_graph(edges, is_directed=False)
+        compact = CompactGraph.from_edges(edges, is_directed=False)
+        directed = CompactGraph.from_edges(edges)
+
+        for start_id in range(0, 60, 7):
+            for target_id in range(0, 60, 5):
+                if not graph.contains_id(start_id) or not graph.contains_id(target_id):
+                    continue
+                expected = graph.find_shortest_path(start_id, target_id)
+                for path in (graph.find_shortest_path(start_id, target_id, bidirectional=True),
+                             compact.find_shortest_path(start_id, target_id, bidirectional=True)):
+                    if expected is None:
+                        assert path is None
+                        continue
+                    assert len(path) == len(expected)
+                    assert path[0] == start_id and path[-1] == target_id
+                    for vertex_id, next_id in zip(path, path[1:]):
+                        assert next_id in compact.get_neighbors(vertex_id)
+
+                expected = directed.find_shortest_path(start_id, target_id)
+                path = directed.find_shortest_path(start_id, target_id, bidirectional=True)
+                assert (path is None) == (expected is None)
+                if path is not None:
+                    assert len(path) == len(expected)
+
+    def test_bidirectional_needs_undirected_graph(self):
+        with self.assertRaises(ValueError):
+            make_graph([(1, 2)]).find_shortest_path(1, 2, bidirectional=True)
+
+    def test_bidirectional_directed_with_reverse_index(self):
+        rng = random.Random(11)
+        edges = [(rng.randrange(60), rng.randrange(60)) for _ in range(150)]
+        graph = make_graph(edges)
+        graph.enable_reverse_index()
+        for start_id in range(0, 60, 7):
+            for target_id in range(0, 60, 5):
+                if not graph.contains_id(start_id) or not graph.contains_id(target_id):
+                    continue
+                expected = graph.find_shortest_path(start_id, target_id)
+                path = graph.find_shortest_path(start_id, target_id, bidirectional=True)
+                assert (path is None) == (expected is None)
+                if path is not None:
+                    assert len(path) == len(expected)
+                    assert path[0] == start_id and path[-1] == target_id
+                    for vertex_id, next_id in zip(path, path[1:]):
+                        assert graph.get_vertex(vertex_id).get_edge_weight(next_id) is not None
+
+    def test_find_path_dfs_iter(self):
+        graph = make_graph([(1, 2), (2, 3), (1, 4), (4, 3), (5, 1)])
+        path = graph.find_path_dfs_iter(1, 3)
+
+        assert path in ([1, 2, 3], [1, 4, 3])
+        assert graph.find_path_dfs_iter(3, 1) is None
+        assert graph.find_path_dfs_iter(1, 1) == [1]
+
+
+class WeightedPathTests(unittest.TestCase):
+    def setUp(self):
+        self.edges = [('A', 'B', 4), ('A', 'C', 1), ('C', 'B', 2), ('B', 'D', 1), ('C', 'D', 5), ('D', 'E', 3)]
+        self.graph = Graph()
+        self.graph.add_weighted_edges_from(self.edges)
+
+    def test_find_cheapest_path(self):
+        """Dijkstra prefers cheaper paths over ones with fewer edges, on both backends."""
+        compact = CompactGraph.from_graph(self.graph)
+        for backend in (self.graph, compact, CompactGraph.from_edges(self.edges, weighted=True)):
+            assert backend.find_cheapest_path('A', 'E') == (7, ['A', 'C', 'B', 'D', 'E'])
+            assert backend.find_cheapest_path('E', 'A') is None
+            # a zero heuristic turns A* back into Dijkstra
+            assert backend.find_cheapest_path('A', 'D', lambda vertex_id, target_id: 0) == (4, ['A', 'C', 'B', 'D'])
+
+        assert self.graph.find_path_costs('A') == {'A': 0, 'C': 1, 'B': 3, 'D': 4, 'E': 7}
+        assert list(compact.find_path_costs('B')) == [float('inf'), 0, float('inf'), 1, 4]
+
+    def test_inconsistent_heuristic(self):
+        """An admissible heuristic that isn't consistent still finds the cheapest path, by reopening B."""
+        edges = [('S', 'A', 1), ('A', 'B', 1), ('S', 'B', 3), ('B', 'G', 3)]
+        graph = Graph()
+        graph.add_weighted_edges_from(edges)
+
+        def heuristic(vertex_id, target_id):
+            return 4 if vertex_id == 'A' else 0
+
+        for backend in (graph, CompactGraph.from_edges(edges, weighted=True)):
+            assert backend.find_cheapest_path('S', 'G', heuristic) == (5, ['S', 'A', 'B', 'G'])
+
+    def test_large_weights(self):
+        """A first path is recorded even when one more unit of cost can't be told apart in a float."""
+        edges = [('A', 'B', float(2 ** 57)), ('B', 'C', 1.0)]
+        graph = Graph()
+        graph.add_weighted_edges_from(edges)
+        for backend in (graph, CompactGraph.from_edges(edges, weighted=True)):
+            assert backend.find_cheapest_path('A', 'C') == (float(2 ** 57), ['A', 'B', 'C'])
+        assert graph.find_path_costs('A') == {'A': 0, 'B': float(2 ** 57), 'C': float(2 ** 57)}
+
+    def test_edge_weights(self):
+        """Unweighted edges weigh 1, and re-adding an edge replaces its weight."""
+        graph = Graph(is_directed=False)
+        graph.add_edge(1, 2)
+        assert not graph.is_weighted()
+        graph.add_edge(2, 3, 2.5)
+        graph.add_edge(1, 2, 4)
+
+        assert graph.get_vertex(3).get_edge_weight(2) == 2.5
+        assert graph.get_vertex(1).get_edge_weight(2) == 4
+        assert graph.get_vertex(1).get_edge_weight(3) is None
+        assert graph.find_cheapest_path(1, 3) == (6.5, [1, 2, 3])
+
+        compact = CompactGraph.from_edges([(1, 2, 5), (1, 3, 1), (1, 2, 2)], weighted=True)
+        assert list(compact.get_weights()) == [2, 1]
+        assert list(compact.transpose().get_weights()) == [2, 1]
+
+    def test_negative_weights(self):
+        self.graph.add_edge('E', 'F', -1)
+        with self.assertRaises(ValueError):
+            self.graph.find_path_costs('A')
+
+    def test_save_weighted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weighted.bin')
+            self.graph.save(path)
+            compact = CompactGraph.open(path)
+            assert compact.find_cheapest_path('A', 'E') == (7, ['A', 'C', 'B', 'D', 'E'])
+            del compact
+
+
+class BatchedBfsTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.edges = [(rng.randrange(80), rng.randrange(80)) for _ in range(160)]
+        self.graph = make_graph(self.edges)
+        self.compact = CompactGraph.from_graph(self.graph)
+
+    def test_batch_matches_single_queries(self):
+        """Bit-parallel batches agree with one BFS per start vertex, across batch boundaries."""
+        start_ids = [vertex.get_id() for vertex in self.graph.get_vertices()][:40] * 2
+        for distance in range(4):
+            batched = self.compact.batch_vertices_n_away(start_ids, distance, batch_size=7)
+            for start_id, result in zip(start_ids, batched):
+                assert sorted(result) == sorted(self.graph.find_vertices_n_away(start_id, distance))
+
+        distances = self.compact.batch_distances(start_ids[:5], max_depth=2)
+        for start_id, row in zip(start_ids, distances):
+            for distance in range(3):
+                expected = self.compact.find_vertices_n_away(start_id, distance)
+                assert sorted(self.compact.get_id(i) for i, d in enumerate(row) if d == distance) == sorted(expected)
+            assert max(row) <= 2
+
+    def test_bfs_levels(self):
+        compact = CompactGraph.from_edges([(1, 2), (2, 3), (3, 4), (5, 4)])
+        assert compact.bfs_levels([1, 5]) == [[1, 5], [2, 4], [3]]
+        assert compact.bfs_levels([1, 5], max_depth=0) == [[1, 5]]
+
+
+class DirectionOptimizingBfsTests(unittest.TestCase):
+    def test_directions_agree(self):
+        """Every direction finds the same distances, with parents one level closer along an edge."""
+        for is_directed in (True, False):
+            compact = CompactGraph.from_edges(generators.barabasi_albert_edges(400, 3, seed=2), is_directed)
+            expected, _, _ = compact.bfs_tree(0, direction=compact_graph.TOP_DOWN)
+            for direction in (compact_graph.BOTTOM_UP, compact_graph.DIRECTION_OPTIMIZING):
+                distances, parents, _ = compact.bfs_tree(0, direction=direction)
+                assert distances == expected
+                for vertex, distance in enumerate(distances):
+                    if distance > 0:
+                        assert distances[parents[vertex]] == distance - 1
+                        assert vertex in compact.neighbor_indices(parents[vertex])
+
+                for start_id in (0, 5, 399):
+                    for target_distance in range(4):
+                        assert sorted(compact.find_vertices_n_away(start_id, target_distance, direction)) == \
+                            sorted(compact.find_vertices_n_away(start_id, target_distance))
+                    for target_id in (1, 100, 398):
+                        path = compact.find_shortest_path(start_id, target_id, direction=direction)
+                        expected_path = compact.find_shortest_path(start_id, target_id)
+                        assert (path is None) == (expected_path is None)
+                        if path is not None:
+                            assert len(path) == len(expected_path) and path[-1] == target_id
+
+    def test_fewer_edges_on_skewed_graphs(self):
+        compact = CompactGraph.from_edges(generators.barabasi_albert_edges(5000, 8, seed=1), is_directed=False)
+        _, _, top_down = compact.bfs_tree(0, direction=compact_graph.TOP_DOWN)
+        _, _, optimized = compact.bfs_tree(0, direction=compact_graph.DIRECTION_OPTIMIZING)
+        assert top_down == compact.num_edges()
+        assert optimized * 2 < top_down
+
+    def test_max_depth_and_bad_direction(self):
+        compact = CompactGraph.from_edges([(1, 2), (2, 3), (3, 4)])
+        distances, _, _ = compact.bfs_tree(1, max_depth=2, direction=compact_graph.BOTTOM_UP)
+        assert list(distances) == [0, 1, 2, -1]
+        assert compact.find_vertices_n_away(1, 5, compact_graph.DIRECTION_OPTIMIZING) == []
+        with self.assertRaises(ValueError):
+            compact.bfs_tree(1, direction='sideways')
+
+
+class QueryCacheTests(unittest.TestCase):
+    def test_cached_results(self):
+        """Repeated queries are served from the cache until the graph changes."""
+        graph = make_graph([(1, 2), (2, 3)])
+        cache = graph.enable_query_cache(max_entries=2)
+
+        assert graph.find_shortest_path(1, 3) == [1, 2, 3]
+        path = graph.find_shortest_path(1, 3)
+        path.append('mutated')  # callers get a copy
+        assert graph.find_shortest_path(1, 3) == [1, 2, 3]
+        assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+        graph.add_edge(1, 3)
+        assert graph.find_shortest_path(1, 3) == [1, 3]
+        assert cache.stats()['invalidations'] == 1
+
+        graph.find_vertices_n_away(1, 1)
+        graph.find_connected_components()
+        assert cache.stats()['evictions'] == 1
+        assert len(cache) == 2
+
+        graph.disable_query_cache()
+        assert graph.get_query_cache() is None
+        assert graph.find_shortest_path(1, 3) == [1, 3]
+
+    def test_equivalent_calls_share_an_entry(self):
+        graph = make_graph([(1, 2), (2, 3)])
+        cache = graph.enable_query_cache()
+        graph.find_shortest_path(1, 3)
+        graph.find_shortest_path(1, 3, False)
+        graph.find_shortest_path(1, 3, bidirectional=False)
+        assert cache.stats()['misses'] == 1 and len(cache) == 1
+
+        # a heuristic is a new function object every call, so it never hits and isn't stored
+        graph.find_cheapest_path(1, 3, lambda vertex_id, target_id: 0)
+        assert len(cache) == 1
+
+    def test_nested_results_are_copied(self):
+        graph = make_graph([(1, 2), (3, 4)])
+        graph.enable_query_cache()
+        components = graph.find_connected_components()
+        components[0].append('mutated')
+        assert graph.find_connected_components() == [[1, 2], [3, 4]]
+        graph.find_connected_components()[1].append('mutated')
+        assert graph.find_connected_components() == [[1, 2], [3, 4]]
+        assert graph.find_cheapest_path(1, 2) == graph.find_cheapest_path(1, 2) == (1, [1, 2])
+        assert graph.find_path_costs(1) == {1: 0, 2: 1}
+
+    def test_bulk_changes_invalidate(self):
+        graph = make_graph([(1, 2)])
+        graph.enable_query_cache()
+        assert graph.find_connected_components() == [[1, 2]]
+
+        graph.add_edges_from([(3, 4)])
+        assert graph.find_connected_components() == [[1, 2], [3, 4]]
+        graph.add_vertex(5)
+        assert graph.find_connected_components() == [[1, 2], [3, 4], [5]]
+
+
+class IncrementalTests(unittest.TestCase):
+    def assert_topological(self, graph, order):
+        position = {vertex_id: i for i, vertex_id in enumerate(order)}
+        assert len(position) == len(graph.get_vertices())
+        for vertex in graph.get_vertices():
+            for neighbor in vertex.get_neighbors():
+                assert position[vertex.get_id()] < position[neighbor.get_id()]
+
+    def test_order_maintained_under_insertions(self):
+        """Edges inserted against the current order are accommodated by local reordering."""
+        graph = Graph()
+        graph.enable_incremental(reject_cycles=True)
+        rng = random.Random(5)
+        for _ in range(300):
+            vertex_id1, vertex_id2 = rng.randrange(60), rng.randrange(60)
+            try:
+                graph.add_edge(vertex_id1, vertex_id2)
+            except ValueError:
+                # rejected edges would close a cycle and are not stored
+                assert vertex_id1 == vertex_id2 or graph.find_shortest_path(vertex_id2, vertex_id1)
+                assert graph.get_vertex(vertex_id1).get_edge_weight(vertex_id2) is None
+
+        self.assert_topological(graph, graph.topological_sort())
+        assert not graph.contains_cycle()
+
+    def test_rejected_edge_adds_no_vertices(self):
+        graph = make_graph([('a', 'b')])
+        incremental = graph.enable_incremental(reject_cycles=True)
+        for vertex_id1, vertex_id2 in (('x', 'x'), ('b', 'a')):
+            with self.assertRaises(ValueError):
+                graph.add_edge(vertex_id1, vertex_id2)
+        assert list(graph.get_vertex_ids()) == ['a', 'b']
+        assert incremental.get_topological_order() == ['a', 'b']
+
+    def test_cycle_edges_flagged(self):
+        graph = make_graph([('a', 'b'), ('b', 'c')])
+        incremental = graph.enable_incremental()
+        graph.add_edges_from([('c', 'a'), ('d', 'a')])
+
+        assert incremental.get_cycle_edges() == [('c', 'a')]
+        assert graph.get_vertex('c').get_edge_weight('a') == 1
+        with self.assertRaises(ValueError):
+            graph.topological_sort()
+        assert incremental.get_topological_order().index('d') < incremental.get_topological_order().index('a')
+
+    def test_components(self):
+        graph = Graph(is_directed=False)
+        incremental = graph.enable_incremental()
+        graph.add_edges_from([(1, 2), (3, 4)])
+        graph.add_vertex(5)
+        assert incremental.num_components() == 3
+        assert not incremental.connected(1, 3)
+
+        graph.add_edge(2, 3)
+        assert incremental.connected(1, 4)
+        assert graph.find_connected_components() == [[1, 2, 3, 4], [5]]
+
+
+class RemovalTests(unittest.TestCase):
+    def edges(self, graph):
+        return sorted((vertex.get_id(), neighbor.get_id())
+                      for vertex in graph.get_vertices() for neighbor in vertex.get_neighbors())
+
+    def test_remove_edge(self):
+        graph = make_graph([('a', 'b'), ('b', 'c'), ('c', 'a')], is_directed=False)
+        graph.remove_edge('b', 'a')
+        assert self.edges(graph) == [('a', 'c'), ('b', 'c'), ('c', 'a'), ('c', 'b')]
+        with self.assertRaises(KeyError):
+            graph.remove_edge('a', 'b')
+        with self.assertRaises(KeyError):
+            graph.remove_edge('a', 'z')
+
+    def test_remove_vertex_matches_rebuild(self):
+        """Removing vertices, with or without the reverse index, leaves the graph a rebuild would give."""
+        rng = random.Random(7)
+        for is_directed in (True, False):
+            for reverse_index in (False, True):
+                edges = [(rng.randrange(30), rng.randrange(30)) for _ in range(120)]
+                graph = make_graph(edges, is_directed)
+                if reverse_index:
+                    graph.enable_reverse_index()
+                removed = set(rng.sample(range(30), 10))
+                for vertex_id in removed:
+                    if graph.contains_id(vertex_id):
+                        graph.remove_vertex(vertex_id)
+
+                expected = make_graph([edge for edge in edges if not removed.intersection(edge)], is_directed)
+                assert self.edges(graph) == self.edges(expected)
+                assert not any(graph.contains_id(vertex_id) for vertex_id in removed)
+
+    def test_removals_invalidate_queries(self):
+        graph = make_graph([('a', 'b'), ('b', 'c'), ('c', 'd')])
+        graph.enable_query_cache()
+        incremental = graph.enable_incremental()
+        assert graph.find_shortest_path('a', 'd') == ['a', 'b', 'c', 'd']
+        version = graph.get_version()
+
+        graph.remove_edge('b', 'c')
+        assert graph.get_version() != version
+        assert graph.find_shortest_path('a', 'd') is None
+        assert graph.find_connected_components() == [['a', 'b'], ['c', 'd']]
+        assert graph.get_incremental() is not incremental  # rebuilt after the removal
+
+        graph.remove_vertex('a')
+        graph.add_edge('d', 'b')
+        assert graph.topological_sort() == ['c', 'd', 'b']
+
+    def test_churn_keeps_memory_steady(self):
+        """Under continuous insertion and removal, compaction keeps the graph at its working size."""
+        graph = Graph()
+        graph.enable_reverse_index()
+        tracemalloc.start()
+        try:
+            sizes = []
+            for round_number in range(6):
+                first = round_number * 2000
+                graph.add_edges_from((vertex_id, vertex_id + 1) for vertex_id in range(first, first + 2000))
+                for vertex_id in range(first - 2000, first):
+                    if graph.contains_id(vertex_id):
+                        graph.remove_vertex(vertex_id)
+                graph.compact()
+                sizes.append(tracemalloc.get_traced_memory()[0])
+        finally:
+            tracemalloc.stop()
+        assert len(graph.get_vertices()) == 2001
+        assert sizes[-1] < sizes[1] * 1.2
+
+
+class ReverseIndexTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(3)
+        self.edges = [(rng.randrange(40), rng.randrange(40)) for _ in range(100)]
+
+    def test_predecessors_and_degrees(self):
+        """Answers with the reverse index, built up front or kept by add_edge, match a full scan."""
+        scanned = make_graph(self.edges)
+        indexed = make_graph(self.edges[:50])
+        indexed.enable_reverse_index()
+        indexed.add_edges_from(self.edges[50:80])
+        for vertex_id1, vertex_id2 in self.edges[80:]:
+            indexed.add_edge(vertex_id1, vertex_id2)
+
+        for vertex in scanned.get_vertices():
+            vertex_id = vertex.get_id()
+            expected = sorted(predecessor.get_id() for predecessor in scanned.get_predecessors(vertex_id))
+            assert sorted(predecessor.get_id() for predecessor in indexed.get_predecessors(vertex_id)) == expected
+            assert indexed.get_in_degree(vertex_id) == scanned.get_in_degree(vertex_id) == len(expected)
+            assert indexed.get_out_degree(vertex_id) == vertex.get_degree()
+
+        vertex_ids, in_degrees, out_degrees = scanned.get_degrees()
+        degrees = dict(zip(vertex_ids, zip(in_degrees, out_degrees)))
+        vertex_ids, in_degrees, out_degrees = indexed.get_degrees()
+        assert dict(zip(vertex_ids, zip(in_degrees, out_degrees))) == degrees
+        assert sum(in_degrees) == sum(out_degrees)
+
+    def test_ancestors_and_descendants(self):
+        graph = make_graph([('lib', 'app'), ('lib', 'tool'), ('core', 'lib'), ('app', 'site')])
+        assert graph.find_descendants('core') == ['lib', 'app', 'tool', 'site']
+        assert graph.find_descendants('core', max_depth=1) == ['lib']
+        assert graph.find_ancestors('site') == ['app', 'lib', 'core']
+        graph.enable_reverse_index()
+        assert graph.find_ancestors('site', max_depth=2) == ['app', 'lib']
+        assert graph.find_ancestors('core') == []
+
+        graph.remove_edge('core', 'lib')
+        assert graph.find_ancestors('site') == ['app', 'lib']
+        with self.assertRaises(KeyError):
+            graph.find_ancestors('missing')
+
+    def test_undirected_predecessors_are_neighbors(self):
+        graph = make_graph([(1, 2), (2, 3)], is_directed=False)
+        assert graph.has_reverse_index()
+        assert sorted(vertex.get_id() for vertex in graph.get_predecessors(2)) == [1, 3]
+        assert graph.find_ancestors(1) == graph.find_descendants(1) == [2, 3]
+
+
+class GraphViewTests(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(9)
+        self.edges = [(rng.randrange(40), rng.randrange(40), rng.randint(1, 5)) for _ in range(120)]
+        self.graph = Graph()
+        self.graph.add_weighted_edges_from(self.edges)
+
+    def assert_same(self, view, expected):
+        assert sorted(view.get_vertex_ids()) == sorted(expected.get_vertex_ids())
+        assert sorted(map(sorted, view.find_connected_components())) == \
+            sorted(map(sorted, expected.find_connected_components()))
+        for start_id in expected.get_vertex_ids()[::5]:
+            assert view.find_path_costs(start_id) == expected.find_path_costs(start_id)
+            for target_id in expected.get_vertex_ids()[::7]:
+                path = view.find_shortest_path(start_id, target_id)
+                expected_path = expected.find_shortest_path(start_id, target_id)
+                assert (path is None) == (expected_path is None)
+                if path is not None:
+                    assert len(path) == len(expected_path)
+
+    def copy(self, edges, vertex_ids, is_directed=True):
+        graph = Graph(is_directed)
+        for vertex_id in vertex_ids:
+            graph.add_vertex(vertex_id)
+        graph.add_weighted_edges_from(edges)
+        return graph
+
+    def test_subgraph_view(self):
+        kept = set(range(0, 40, 2)) & set(self.graph.get_vertex_ids())
+        view = self.graph.subgraph_view(kept, edge_filter=lambda vertex_id1, vertex_id2, weight: weight < 5)
+        expected = self.copy([edge for edge in self.edges if {edge[0], edge[1]} <= kept and edge[2] < 5], kept)
+        self.assert_same(view, expected)
+        self.assert_same(self.graph.induced_subgraph(kept), self.copy(
+            [edge for edge in self.edges if {edge[0], edge[1]} <= kept], kept))
+
+    def test_reversed_and_undirected_views(self):
+        self.graph.enable_reverse_index()
+        vertex_ids = self.graph.get_vertex_ids()
+        self.assert_same(self.graph.reversed_view(), self.copy([(b, a, w) for a, b, w in self.edges], vertex_ids))
+        # an edge stored both ways keeps the weight it has going out, so compare unweighted paths only
+        undirected = self.graph.undirected_view()
+        assert not undirected.is_directed()
+        expected = make_graph([(a, b) for a, b, _ in self.edges], is_directed=False)
+        for start_id in vertex_ids[::3]:
+            assert sorted(undirected.find_descendants(start_id)) == sorted(expected.find_descendants(start_id))
+
+    def test_views_are_live_and_read_only(self):
+        dag = make_graph([('a', 'b'), ('b', 'c'), ('a', 'c')])
+        view = dag.reversed_view()
+        assert view.topological_sort() == ['c', 'b', 'a']
+        assert view.find_ancestors('a') == ['b', 'c']
+
+        dag.add_edge('c', 'd')
+        assert view.topological_sort()[0] == 'd'
+        assert view.get_version() == dag.get_version()
+        with self.assertRaises(TypeError):
+            view.add_edge('a', 'd')
+
+        copy = view.to_graph()
+        copy.add_edge('a', 'e')
+        assert not dag.contains_id('e') and not copy.is_weighted()
+
+
+class TraversalGeneratorTests(unittest.TestCase):
+    def setUp(self):
+        self.graph = make_graph([(1, 2), (1, 3), (2, 4), (3, 4), (4, 5), (5, 6)])
+        self.compact = CompactGraph.from_graph(self.graph)
+
+    def test_iter_bfs(self):
+        for backend in (self.graph, self.compact):
+            assert list(backend.iter_bfs(1)) == [1, 2, 3, 4, 5, 6]
+            assert list(backend.iter_bfs(1, max_depth=2)) == [1, 2, 3, 4]
+            assert list(backend.iter_bfs(4, with_details=True)) == [(4, 0, None), (5, 1, 4), (6, 2, 5)]
+
+    def test_iter_dfs(self):
+        for backend in (self.graph, self.compact):
+            assert list(backend.iter_dfs(1)) == [1, 2, 4, 5, 6, 3]
+            assert list(backend.iter_dfs(1, max_depth=2)) == [1, 2, 4, 3]
+            assert list(backend.iter_dfs(1, with_details=True))[:3] == [(1, 0, None), (2, 1, 1), (4, 2, 2)]
+
+    def test_early_termination(self):
+        """Traversals stop lazily, from the consumer or from a visitor."""
+        visited = []
+
+        def visitor(vertex_id, depth, parent_id):
+            visited.append(vertex_id)
+            return vertex_id == 4
+
+        for backend in (self.graph, self.compact):
+            visited.clear()
+            assert list(backend.iter_bfs(1, visitor=visitor)) == [1, 2, 3]
+            assert visited == [1, 2, 3, 4]
+            assert next(backend.iter_dfs(1)) == 1
+
+        with self.assertRaises(KeyError):
+            self.graph.iter_bfs('missing')
+
+
+class BipartiteTests(unittest.TestCase):
+    def test_every_component_is_checked(self):
+        """A bipartite first component doesn't hide an odd cycle in a later one."""
+        graph = make_graph([('A', 'B'), ('B', 'C'), ('D', 'E'), ('E', 'F'), ('F', 'D')], is_directed=False)
+        assert not graph.is_bipartite()
+        assert graph.find_bipartition() is None
+        assert sorted(graph.find_odd_cycle()) == ['D', 'E', 'F']
+
+    def test_partition(self):
+        """Colors alternate by BFS level, not by dequeue order."""
+        graph = make_graph([('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D'), ('E', 'F')], is_directed=False)
+        assert graph.is_bipartite()
+        assert graph.find_bipartition() == (['A', 'D', 'E'], ['B', 'C', 'F'])
+        assert graph.find_odd_cycle() is None
+
+    def test_directed_graphs_ignore_direction(self):
+        assert not make_graph([(1, 2), (2, 3), (1, 3)]).is_bipartite()
+        assert make_graph([(1, 2), (3, 2), (3, 4)]).is_bipartite()
+        assert make_graph([(1, 1)]).find_odd_cycle() == [1]
+
+    def test_odd_cycle_witness(self):
+        rng = random.Random(16)
+        for _ in range(100):
+            n = rng.randint(1, 12)
+            edges = [(rng.randrange(n), rng.randrange(n)) for _ in range(rng.randint(0, 12))]
+            graph = make_graph(edges, is_directed=False)
+            cycle = graph.find_odd_cycle()
+            if cycle is None:
+                left, right = map(set, graph.find_bipartition())
+                assert all((u in left) != (v in left) for u, v in edges)
+                assert left | right == {vertex.get_id() for vertex in graph.get_vertices()}
+            else:
+                assert len(cycle) % 2 == 1
+                for position, vertex_id in enumerate(cycle):
+                    following = cycle[(position + 1) % len(cycle)]
+                    assert (vertex_id, following) in edges or (following, vertex_id) in edges
+
+
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self):
+        self.graph = make_graph([('A', 'B'), ('A', 'C'), ('B', 'D'), ('C', 'D'), ('D', 'E')])
+
+    def test_counters(self):
+        with self.graph.instrumented() as recorder:
+            assert self.graph.find_shortest_path('A', 'E') == ['A', 'B', 'D', 'E']
+            self.graph.topological_sort()
+
+        path_stats, sort_stats = recorder.get_history()
+        assert path_stats.get_query() == 'find_shortest_path'
+        assert path_stats.get_arguments() == ('A', 'E')
+        assert path_stats.get_vertices_expanded() == 4  # the target is never expanded
+        assert path_stats.get_edges_scanned() == 5
+        assert path_stats.get_queue_peak() == 2
+        assert set(path_stats.get_phase_times()) == {'search', 'path'}
+
+        assert sort_stats.get_vertices_expanded() == 5
+        assert sort_stats.get_edges_scanned() == 10  # once counting in-degrees, once ordering
+        assert self.graph.get_instrumentation() is None
+
+    def test_nested_queries_count_once(self):
+        recorder = self.graph.enable_instrumentation()
+        assert not self.graph.contains_cycle()
+        assert [stats.get_query() for stats in recorder.get_history()] == ['contains_cycle']
+        assert recorder.get_history()[0].get_vertices_expanded() == 5
+
+    def test_callback_and_errors(self):
+        self.graph.add_edge('E', 'A')
+        finished = []
+        self.graph.enable_instrumentation(callback=finished.append)
+        with self.assertRaises(ValueError):
+            self.graph.topological_sort()
+        self.graph.find_vertices_n_away('A', 1)
+
+        assert [stats.get_query() for stats in finished] == ['topological_sort', 'find_vertices_n_away']
+        record = finished[0].as_dict()
+        assert record['error'] == repr(ValueError('Graph not DAG'))
+        assert json.loads(json.dumps(record)) == record
+        assert self.graph.get_instrumentation().summary()['find_vertices_n_away']['calls'] == 1
+
+    def test_log_stats(self):
+        self.graph.enable_instrumentation(callback=instrumentation.log_stats())
+        with self.assertLogs('graph.queries') as logs:
+            self.graph.find_cheapest_path('A', 'E')
+        assert json.loads(logs.records[0].getMessage())['query'] == 'find_cheapest_path'
+
+    def test_disabled_by_default(self):
+        assert self.graph.get_instrumentation() is None
+        self.graph.enable_instrumentation()
+        self.graph.disable_instrumentation()
+        self.graph.find_shortest_path('A', 'E')
+        assert self.graph.get_instrumentation() is None
+
+
+if __name__ == '__main__':
+    unittest.main()
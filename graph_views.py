@@ -0,0 +1,232 @@
+from abc import abstractmethod
+from collections.abc import Mapping
+
+
+class ViewVertex(object):
+    """
+    A vertex as seen through a graph view. It answers the same queries as Vertex, but only
+    with the neighbors and edges the view lets through.
+    """
+
+    def __init__(self, vertices, vertex_id):
+        """
+        Parameters:
+        vertices (ViewVertices): The vertices of the view.
+        vertex_id (string): The id of the vertex.
+        """
+        self.__vertices = vertices
+        self.__id = vertex_id
+
+    def __str__(self):
+        """Output the list of neighbors of this vertex."""
+        neighbor_ids = [neighbor_id for neighbor_id, _ in self.__vertices.weighted_neighbor_ids(self.__id)]
+        return f'{self.__id} adjacent to {neighbor_ids}'
+
+    def __repr__(self):
+        """Output the list of neighbors of this vertex."""
+        return self.__str__()
+
+    def get_neighbors(self):
+        """Return the neighbors of this vertex in the view."""
+        vertices = self.__vertices
+        return [ViewVertex(vertices, neighbor_id) for neighbor_id, _ in vertices.weighted_neighbor_ids(self.__id)]
+
+    def get_weighted_neighbors(self):
+        """Return (neighbor, edge weight) pairs for the neighbors of this vertex in the view."""
+        vertices = self.__vertices
+        return [(ViewVertex(vertices, neighbor_id), weight)
+                for neighbor_id, weight in vertices.weighted_neighbor_ids(self.__id)]
+
+    def get_edge_weight(self, neighbor_id):
+        """Return the weight of the edge to the given neighbor (1 if unweighted), or None if the view has no such edge."""
+        return self.__vertices.edge_weight(self.__id, neighbor_id)
+
+    def get_degree(self):
+        """Return the number of neighbors of this vertex in the view."""
+        return len(self.__vertices.weighted_neighbor_ids(self.__id))
+
+    def is_weighted(self):
+        """Return True if any edge from this vertex in the view weighs something other than 1."""
+        return any(weight != 1 for _, weight in self.__vertices.weighted_neighbor_ids(self.__id))
+
+    def get_id(self):
+        """Return the id of this vertex."""
+        return self.__id
+
+
+class ViewVertices(Mapping):
+    """
+    The vertex dictionary of a graph view: a read-only mapping from id to ViewVertex, computed
+    from the source graph on every lookup, so changes to the source show through. By default
+    it has the same vertices as the source; subclasses decide the edges by implementing the abstract
+    edge methods.
+    """
+
+    def __init__(self, source):
+        """
+        Parameters:
+        source (Graph): The graph (or view) being viewed.
+        """
+        self.__source = source
+
+    def get_source(self):
+        """Return the graph being viewed."""
+        return self.__source
+
+    def __getitem__(self, vertex_id):
+        if vertex_id not in self:
+            raise KeyError(vertex_id)
+        return ViewVertex(self, vertex_id)
+
+    def __contains__(self, vertex_id):
+        return self.get_source().contains_id(vertex_id)
+
+    def __iter__(self):
+        return iter(self.get_source().get_vertex_ids())
+
+    def __len__(self):
+        return len(self.get_source().get_vertex_ids())
+
+    @abstractmethod
+    def weighted_neighbor_ids(self, vertex_id):
+        """Return (neighbor id, edge weight) pairs for the edges out of a vertex in the view."""
+
+    @abstractmethod
+    def edge_weight(self, vertex_id1, vertex_id2):
+        """Return the weight of an edge in the view, or None if the view has no such edge."""
+
+    @abstractmethod
+    def weighted_predecessor_ids(self, vertex_id):
+        """Return (predecessor id, edge weight) pairs for the edges into a vertex in the view."""
+
+    def has_reverse_index(self):
+        """Return True if `weighted_predecessor_ids` avoids a pass over the whole graph."""
+        return self.get_source().has_reverse_index()
+
+
+class SubgraphVertices(ViewVertices):
+    """The vertices of a subgraph view: some or all of the source's vertices, and the edges a filter keeps."""
+
+    def __init__(self, source, vertex_ids=None, edge_filter=None):
+        """
+        Parameters:
+        source (Graph): The graph (or view) being viewed.
+        vertex_ids (iterable): The ids of the vertices to keep, or None to keep them all.
+        edge_filter (callable): Called with (vertex_id1, vertex_id2, weight) for an edge; the
+            edge is kept if it returns True. None keeps every edge.
+        """
+        super().__init__(source)
+        self.__ids = None if vertex_ids is None else dict.fromkeys(vertex_ids)  # keeps their order
+        self.__edge_filter = edge_filter
+
+    def __contains__(self, vertex_id):
+        return (self.__ids is None or vertex_id in self.__ids) and self.get_source().contains_id(vertex_id)
+
+    def __iter__(self):
+        if self.__ids is None:
+            return super().__iter__()
+        contains_id = self.get_source().contains_id
+        return (vertex_id for vertex_id in self.__ids if contains_id(vertex_id))
+
+    def __len__(self):
+        if self.__ids is None:
+            return super().__len__()
+        return sum(1 for _ in self)
+
+    def __keeps(self, vertex_id1, vertex_id2, weight):
+        if self.__ids is not None and vertex_id2 not in self.__ids:
+            return False
+        return self.__edge_filter is None or self.__edge_filter(vertex_id1, vertex_id2, weight)
+
+    def weighted_neighbor_ids(self, vertex_id):
+        pairs = ((neighbor.get_id(), weight)
+                 for neighbor, weight in self.get_source().get_vertex(vertex_id).get_weighted_neighbors())
+        return [(neighbor_id, weight) for neighbor_id, weight in pairs if self.__keeps(vertex_id, neighbor_id, weight)]
+
+    def edge_weight(self, vertex_id1, vertex_id2):
+        if vertex_id1 not in self or vertex_id2 not in self:
+            return None
+        weight = self.get_source().get_vertex(vertex_id1).get_edge_weight(vertex_id2)
+        if weight is None or not self.__keeps(vertex_id1, vertex_id2, weight):
+            return None
+        return weight
+
+    def weighted_predecessor_ids(self, vertex_id):
+        pairs = ((predecessor.get_id(), predecessor.get_edge_weight(vertex_id))
+                 for predecessor in self.get_source().get_predecessors(vertex_id))
+        return [(predecessor_id, weight) for predecessor_id, weight in pairs
+                if (self.__ids is None or predecessor_id in self.__ids) and self.__keeps(predecessor_id, vertex_id, weight)]
+
+
+class ReversedVertices(ViewVertices):
+    """The vertices of a reversed view, where every edge points the other way."""
+
+    def weighted_neighbor_ids(self, vertex_id):
+        return [(predecessor.get_id(), predecessor.get_edge_weight(vertex_id))
+                for predecessor in self.get_source().get_predecessors(vertex_id)]
+
+    def edge_weight(self, vertex_id1, vertex_id2):
+        if vertex_id1 not in self or vertex_id2 not in self:
+            return None
+        return self.get_source().get_vertex(vertex_id2).get_edge_weight(vertex_id1)
+
+    def weighted_predecessor_ids(self, vertex_id):
+        return [(neighbor.get_id(), weight)
+                for neighbor, weight in self.get_source().get_vertex(vertex_id).get_weighted_neighbors()]
+
+    def has_reverse_index(self):
+        return True  # the edges into a vertex are its edges out of it in the source
+
+
+class UndirectedVertices(ViewVertices):
+    """
+    The vertices of an undirected view of a directed graph, where every edge can be followed
+    both ways. An edge present in both directions is seen once, with the weight it has going out.
+    """
+
+    def weighted_neighbor_ids(self, vertex_id):
+        source = self.get_source()
+        neighbors = {neighbor.get_id(): weight for neighbor, weight in source.get_vertex(vertex_id).get_weighted_neighbors()}
+        for predecessor in source.get_predecessors(vertex_id):
+            predecessor_id = predecessor.get_id()
+            if predecessor_id not in neighbors:
+                neighbors[predecessor_id] = predecessor.get_edge_weight(vertex_id)
+        return list(neighbors.items())
+
+    def edge_weight(self, vertex_id1, vertex_id2):
+        if vertex_id1 not in self or vertex_id2 not in self:
+            return None
+        weight = self.get_source().get_vertex(vertex_id1).get_edge_weight(vertex_id2)
+        if weight is None:
+            weight = self.get_source().get_vertex(vertex_id2).get_edge_weight(vertex_id1)
+        return weight
+
+    def weighted_predecessor_ids(self, vertex_id):
+        return self.weighted_neighbor_ids(vertex_id)
+
+
+class ViewPredecessors(Mapping):
+    """
+    The reverse index of a directed graph view: a read-only mapping from vertex id to a
+    dictionary of its predecessors in the view, in the shape Graph keeps its own reverse index.
+    """
+
+    def __init__(self, vertices):
+        """
+        Parameters:
+        vertices (ViewVertices): The vertices of the view.
+        """
+        self.__vertices = vertices
+
+    def __getitem__(self, vertex_id):
+        vertices = self.__vertices
+        if vertex_id not in vertices:
+            raise KeyError(vertex_id)
+        return {predecessor_id: ViewVertex(vertices, predecessor_id)
+                for predecessor_id, _ in vertices.weighted_predecessor_ids(vertex_id)}
+
+    def __iter__(self):
+        return iter(self.__vertices)
+
+    def __len__(self):
+        return len(self.__vertices)
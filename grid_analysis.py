@@ -0,0 +1,176 @@
+import re
+from array import array
+
+from components import UnionFind
+
+
+def grid_rows(grid):
+    """
+    Return the rows of a 2D grid of small integers as bytes objects (see row_bytes).
+    Parameters:
+    grid: A list of rows (lists, bytes or bytearrays), or a 2D NumPy array.
+    Returns:
+    list<bytes>: One bytes object per row, all the same length.
+    """
+    if hasattr(grid, 'astype'):  # a NumPy array: convert whole rows without touching Python ints
+        grid = (grid * ((grid >= 0) & (grid <= 255))).astype('uint8')
+        rows = [grid[row].tobytes() for row in range(len(grid))]
+    else:
+        rows = [row_bytes(row) for row in grid]
+
+    if rows and any(len(row) != len(rows[0]) for row in rows):
+        raise ValueError('All grid rows must have the same length')
+    return rows
+
+
+def row_bytes(row):
+    """
+    Return a grid row as a bytes object. Cells outside 0-255 can't hold any value the grid
+    functions look for, so they become 0 (empty), as the list-based functions treat them.
+    Parameters:
+    row: A list, bytes, bytearray or 1D NumPy array of integers.
+    Returns:
+    bytes: One byte per cell.
+    """
+    if hasattr(row, 'astype'):
+        return (row * ((row >= 0) & (row <= 255))).astype('uint8').tobytes()
+    try:
+        return bytes(row)
+    except ValueError:  # a cell out of range
+        return bytes(cell if 0 <= cell <= 255 else 0 for cell in row)
+
+
+def _runs(rows, value):
+    """Yield, for each row, the (start, end) column ranges of its runs of cells equal to `value`."""
+    pattern = re.compile(re.escape(bytes([value])) + b'+')
+    for row in rows:
+        yield [match.span() for match in pattern.finditer(row)]
+
+
+def label_runs(rows, value, connectivity):
+    """
+    First pass of the two-pass labeling: give every run of `value` cells a provisional label and
+    union the labels of runs that touch a run in the previous row.
+    Returns the union-find over run labels and, for each row, its runs as (start, end, label).
+    """
+    if connectivity not in (4, 8):
+        raise ValueError('connectivity must be 4 or 8')
+    reach = 1 if connectivity == 8 else 0  # how far diagonal contact extends a run
+
+    union_find = UnionFind()
+    labeled_rows = []
+    previous = []
+    for runs in _runs(rows, value):
+        current = []
+        above = 0
+        for start, end in runs:
+            label = union_find.add()
+            current.append((start, end, label))
+
+            # runs above that end before this one starts can't touch this run or any later one
+            while above < len(previous) and previous[above][1] + reach <= start:
+                above += 1
+            touching = above
+            while touching < len(previous) and previous[touching][0] < end + reach:
+                union_find.union(label, previous[touching][2])
+                touching += 1
+
+        labeled_rows.append(current)
+        previous = current
+
+    return union_find, labeled_rows
+
+
+def count_regions(grid, value=1, connectivity=4):
+    """
+    Count the connected regions of cells equal to `value`, e.g. islands of land.
+    Cells are grouped into horizontal runs found by a regular-expression scan, and runs in
+    neighboring rows are merged with union-find, so the work is per run rather than per cell.
+    Parameters:
+    grid: A list of rows or a 2D NumPy array (see grid_rows).
+    value (integer): The cell value making up regions.
+    connectivity (integer): 4 to join cells sharing an edge, 8 to also join diagonal neighbors.
+    Returns:
+    integer: The number of regions.
+    """
+    union_find, _ = label_runs(grid_rows(grid), value, connectivity)
+    return union_find.count()
+
+
+def label_regions(grid, value=1, connectivity=4):
+    """
+    Label the connected regions of cells equal to `value` with a two-pass union-find.
+    Parameters:
+    grid: A list of rows or a 2D NumPy array (see grid_rows).
+    value (integer): The cell value making up regions.
+    connectivity (integer): 4 to join cells sharing an edge, 8 to also join diagonal neighbors.
+    Returns:
+    tuple<integer, list<array>>: The number of regions, and one array of labels per row, where 0
+        is background and regions are numbered from 1 in order of their first cell.
+    """
+    rows = grid_rows(grid)
+    union_find, labeled_rows = label_runs(rows, value, connectivity)
+    _, run_labels = union_find.labels()
+
+    # second pass: write each run's final label over its cells
+    width = len(rows[0]) if rows else 0
+    labels = []
+    for runs in labeled_rows:
+        row = array('i', bytes(4 * width))
+        for start, end, label in runs:
+            row[start:end] = array('i', [run_labels[label] + 1]) * (end - start)
+        labels.append(row)
+
+    # run labels are numbered by first run, which is also the order of the regions' first cells
+    return union_find.count(), labels
+
+
+def cell_bitmask(rows, value):
+    """
+    Pack the cells equal to `value` into one integer bitset, one bit per cell, with a zero
+    padding bit after every row so that shifting by one never wraps between rows.
+    """
+    table = bytearray(b'0' * 256)
+    table[value] = ord('1')
+    text = b'0'.join(row.translate(table) for row in rows) + b'0'
+    return int(text, 2)
+
+
+def spread_time(grid, source=2, target=1, connectivity=4):
+    """
+    Simulate a multi-source spread: every step, each `source` cell converts its `target`
+    neighbors into sources. The whole frontier advances at once with bitwise operations on
+    grid-sized integer bitsets instead of cell by cell.
+    Parameters:
+    grid: A list of rows or a 2D NumPy array (see grid_rows). It is not modified.
+    source (integer): The value of cells that spread.
+    target (integer): The value of cells that can be converted.
+    connectivity (integer): 4 to spread across edges, 8 to also spread diagonally.
+    Returns:
+    integer: The number of steps until no target cells remain, or -1 if some can never be reached.
+    """
+    if connectivity not in (4, 8):
+        raise ValueError('connectivity must be 4 or 8')
+
+    rows = grid_rows(grid)
+    if not rows:
+        return 0
+    width = len(rows[0]) + 1  # including the padding bit
+    shifts = (1, width) if connectivity == 4 else (1, width - 1, width, width + 1)
+
+    remaining = cell_bitmask(rows, target)
+    frontier = cell_bitmask(rows, source)
+    steps = 0
+
+    while remaining and frontier:
+        reached = 0
+        for shift in shifts:
+            reached |= (frontier << shift) | (frontier >> shift)
+        # padding bits are never in `remaining`, so wrapped or out-of-grid bits fall away here
+        frontier = reached & remaining
+        if not frontier:
+            break
+        remaining &= ~frontier
+        steps += 1
+
+    return -1 if remaining else steps
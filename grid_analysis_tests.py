@@ -0,0 +1,64 @@
+
+import grid_analysis
+import unittest
+
+
+class GridAnalysisTests(unittest.TestCase):
+    def test_count_regions(self):
+        """Non-square grids work, and 8-connectivity joins diagonal neighbors."""
+        grid = [
+            [1, 0, 0, 1, 1, 0],
+            [0, 1, 0, 0, 1, 0],
+            [0, 0, 0, 0, 0, 1],
+        ]
+        assert grid_analysis.count_regions(grid) == 4
+        assert grid_analysis.count_regions(grid, connectivity=8) == 2
+        assert grid_analysis.count_regions([bytes([1, 1]), bytes([0, 1])]) == 1
+        assert grid_analysis.count_regions([]) == 0
+
+    def test_label_regions(self):
+        grid = [
+            [1, 1, 0, 1],
+            [0, 1, 0, 1],
+            [1, 1, 0, 0],
+        ]
+        count, labels = grid_analysis.label_regions(grid)
+        assert count == 2
+        assert [list(row) for row in labels] == [
+            [1, 1, 0, 2],
+            [0, 1, 0, 2],
+            [1, 1, 0, 0],
+        ]
+
+    def test_spread_time(self):
+        """The input grid is left untouched."""
+        grid = [
+            [2, 1, 1],
+            [1, 1, 0],
+            [0, 1, 1],
+        ]
+        assert grid_analysis.spread_time(grid) == 4
+        assert grid[0] == [2, 1, 1]
+        assert grid_analysis.spread_time(grid, connectivity=8) == 2
+        assert grid_analysis.spread_time([[1, 0, 2]]) == -1
+        assert grid_analysis.spread_time([[0, 0]]) == 0
+
+    def test_out_of_range_cells(self):
+        """Cells outside 0-255 are neither land nor oranges, as in the list-based functions."""
+        grid = [
+            [1, 256, 1],
+            [-1, 257, 0],
+            [1, 1, 2],
+        ]
+        assert grid_analysis.count_regions(grid) == 3
+        assert grid_analysis.spread_time(grid) == -1
+        assert grid_analysis.spread_time([[2, 1, -1], [300, 1, 1]]) == 3
+        assert grid_analysis.grid_rows(grid)[1] == bytes(3)
+
+    def test_ragged_grid(self):
+        with self.assertRaises(ValueError):
+            grid_analysis.count_regions([[1, 0], [1]])
+
+
+if __name__ == '__main__':
+    unittest.main()
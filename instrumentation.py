@@ -0,0 +1,211 @@
+import json
+import logging
+import time
+from collections import deque
+from functools import wraps
+
+DEFAULT_HISTORY = 1000
+
+
+class QueryStats(object):
+    """
+    Counters and phase timings for one graph query.
+    """
+
+    def __init__(self, query, arguments):
+        """
+        Start timing a query.
+        Parameters:
+        query (string): The name of the query method.
+        arguments (tuple): The arguments it was called with.
+        """
+        self.__query = query
+        self.__arguments = arguments
+        self.__vertices_expanded = 0
+        self.__edges_scanned = 0
+        self.__queue_peak = 0
+        self.__phases = {}  # phase name -> seconds, in the order the phases ran
+        self.__phase = None
+        self.__start = self.__phase_start = time.perf_counter()
+        self.__seconds = None
+        self.__error = None
+
+    def expand(self, edges_scanned, queue_size=0):
+        """
+        Record that a vertex was expanded.
+        Parameters:
+        edges_scanned (integer): The number of edges looked at while expanding it.
+        queue_size (integer): The size of the queue, stack or heap afterward.
+        """
+        self.__vertices_expanded += 1
+        self.__edges_scanned += edges_scanned
+        if queue_size > self.__queue_peak:
+            self.__queue_peak = queue_size
+
+    def scan(self, edges_scanned):
+        """Record edges looked at outside of any vertex expansion, e.g. while counting degrees."""
+        self.__edges_scanned += edges_scanned
+
+    def phase(self, name):
+        """End the current phase, if any, and start timing a new one."""
+        now = time.perf_counter()
+        if self.__phase is not None:
+            self.__phases[self.__phase] = self.__phases.get(self.__phase, 0) + now - self.__phase_start
+        self.__phase = name
+        self.__phase_start = now
+
+    def finish(self, error=None):
+        """Stop timing, ending the current phase. `error` is the exception the query raised, if any."""
+        self.phase(None)
+        self.__seconds = time.perf_counter() - self.__start
+        self.__error = error
+
+    def get_query(self):
+        """Return the name of the query method."""
+        return self.__query
+
+    def get_arguments(self):
+        """Return the arguments the query was called with."""
+        return self.__arguments
+
+    def get_vertices_expanded(self):
+        """Return the number of vertices whose edges were scanned."""
+        return self.__vertices_expanded
+
+    def get_edges_scanned(self):
+        """Return the number of edges looked at."""
+        return self.__edges_scanned
+
+    def get_queue_peak(self):
+        """Return the largest size of the queue, stack or heap."""
+        return self.__queue_peak
+
+    def get_phase_times(self):
+        """Return the seconds spent in each phase, by phase name."""
+        return dict(self.__phases)
+
+    def get_seconds(self):
+        """Return the total seconds the query took, or None while it is still running."""
+        return self.__seconds
+
+    def get_error(self):
+        """Return the exception the query raised, or None."""
+        return self.__error
+
+    def as_dict(self):
+        """Return the stats as a dict of plain values, ready for JSON or a structured log."""
+        return {
+            'query': self.__query,
+            'arguments': [repr(argument) for argument in self.__arguments],
+            'seconds': self.__seconds,
+            'vertices_expanded': self.__vertices_expanded,
+            'edges_scanned': self.__edges_scanned,
+            'queue_peak': self.__queue_peak,
+            'phases': self.get_phase_times(),
+            'error': None if self.__error is None else repr(self.__error),
+        }
+
+
+class Instrumentation(object):
+    """
+    Collects the stats of the queries run on a graph and passes each one to the registered
+    callbacks. Queries called by other queries count toward the outermost one.
+    """
+
+    def __init__(self, callback=None, history=DEFAULT_HISTORY):
+        """
+        Parameters:
+        callback (callable): Called with the QueryStats of every finished query.
+        history (integer): How many finished queries to keep, most recent last.
+        """
+        self.__callbacks = [] if callback is None else [callback]
+        self.__history = deque(maxlen=history)
+        self.__current = None
+
+    def add_callback(self, callback):
+        """Call `callback` with the QueryStats of every query finished from now on."""
+        self.__callbacks.append(callback)
+
+    def current(self):
+        """Return the stats of the query running now, or None."""
+        return self.__current
+
+    def begin(self, query, arguments):
+        """Start recording a query and return its stats."""
+        self.__current = QueryStats(query, arguments)
+        return self.__current
+
+    def end(self, stats, error=None):
+        """Finish recording a query, keep its stats and pass them to the callbacks."""
+        stats.finish(error)
+        self.__current = None
+        self.__history.append(stats)
+        for callback in self.__callbacks:
+            callback(stats)
+
+    def get_history(self):
+        """Return the stats of the most recent finished queries, oldest first."""
+        return list(self.__history)
+
+    def clear(self):
+        """Forget the finished queries."""
+        self.__history.clear()
+
+    def summary(self):
+        """
+        Aggregate the finished queries by query name.
+        Returns:
+        dict: For each query name, the number of calls, total and slowest seconds, total vertices
+            expanded and edges scanned, and the largest queue.
+        """
+        totals = {}
+        for stats in self.__history:
+            total = totals.setdefault(stats.get_query(), {
+                'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                'vertices_expanded': 0, 'edges_scanned': 0, 'queue_peak': 0})
+            total['calls'] += 1
+            total['seconds'] += stats.get_seconds()
+            total['max_seconds'] = max(total['max_seconds'], stats.get_seconds())
+            total['vertices_expanded'] += stats.get_vertices_expanded()
+            total['edges_scanned'] += stats.get_edges_scanned()
+            total['queue_peak'] = max(total['queue_peak'], stats.get_queue_peak())
+        return totals
+
+
+def log_stats(logger=None, level=logging.INFO):
+    """
+    Return a callback that writes each query's stats to a logger as one JSON line.
+    Parameters:
+    logger (logging.Logger): Where to log. Defaults to the 'graph.queries' logger.
+    level (integer): The logging level.
+    """
+    logger = logger or logging.getLogger('graph.queries')
+
+    def callback(stats):
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(stats.as_dict(), sort_keys=True))
+
+    return callback
+
+
+def instrumented_query(method):
+    """
+    Decorate a graph query so it is recorded while instrumentation is enabled. The graph must
+    provide `get_instrumentation()`. When instrumentation is disabled this costs one call.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        instrumentation = self.get_instrumentation()
+        if instrumentation is None or instrumentation.current() is not None:
+            return method(self, *args, **kwargs)
+
+        stats = instrumentation.begin(method.__name__, args + tuple(kwargs.values()))
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as error:
+            instrumentation.end(stats, error)
+            raise
+        instrumentation.end(stats)
+        return result
+
+    return wrapper
@@ -0,0 +1,224 @@
+import mmap
+import os
+import shutil
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from compact_graph import CompactGraph
+
+PARALLEL_FRONTIER = 4096  # smaller frontiers are expanded in the calling process
+CHUNKS_PER_PROCESS = 4
+
+# set in every worker process by _start_worker
+_worker_graph = None
+_worker_states = {}  # search state file -> (mapping, distances, parents)
+
+
+def _open_state(path, num_vertices):
+    """Map a search state file: n int32 distances followed by n int32 parents."""
+    with open(path, 'r+b') as state_file:
+        mapping = mmap.mmap(state_file.fileno(), 0)
+    view = memoryview(mapping).cast('i')
+    return mapping, view[:num_vertices], view[num_vertices:]
+
+
+def _start_worker(graph_path):
+    global _worker_graph
+    _worker_graph = CompactGraph.open(graph_path)
+
+
+def _expand_chunk(state_path, level, frontier):
+    """Expand part of a frontier in a worker process, against the shared search state."""
+    if state_path not in _worker_states:
+        _worker_states.clear()  # a new search began; dropping the views unmaps the old state
+        _worker_states[state_path] = _open_state(state_path, _worker_graph.num_vertices())
+    _, distances, parents = _worker_states[state_path]
+    return expand_frontier(_worker_graph, distances, parents, frontier, level)
+
+
+def _batch_distances(start_ids, max_depth):
+    """Run a bit-parallel BFS from a batch of start vertices in a worker process."""
+    return _worker_graph.batch_distances(start_ids, max_depth)
+
+
+def expand_frontier(graph, distances, parents, frontier, level):
+    """
+    Claim the unvisited neighbors of a frontier for the next level, writing their distance and
+    parent. Workers sharing the state may race to claim the same vertex; they write the same
+    distance and equally valid parents, and the vertex merely appears twice in the next frontier.
+    Parameters:
+    graph (CompactGraph): The graph.
+    distances (memoryview): The int32 distance of every vertex index, -1 if unvisited.
+    parents (memoryview): The int32 parent of every vertex index.
+    frontier (array): The vertex indices at distance `level`.
+    level (integer): The distance of the frontier.
+    Returns:
+    array: The vertex indices claimed at distance level + 1.
+    """
+    next_frontier = array('i')
+    next_level = level + 1
+    for current in frontier:
+        for neighbor in graph.neighbor_indices(current):
+            if distances[neighbor] == -1:
+                distances[neighbor] = next_level
+                parents[neighbor] = current
+                next_frontier.append(neighbor)
+    return next_frontier
+
+
+class ParallelBfs(object):
+    """
+    Level-synchronous breadth-first search over a process pool. Workers map the graph's binary
+    file (see CompactGraph.save), so the adjacency arrays are shared through the page cache
+    rather than copied, and they claim vertices in a shared, memory-mapped state file. Each
+    level's frontier is split into chunks that are expanded in parallel.
+    Use it as a context manager, or call `close` to stop the workers.
+    """
+
+    def __init__(self, graph, processes=None, parallel_frontier=PARALLEL_FRONTIER):
+        """
+        Start the worker processes.
+        Parameters:
+        graph (CompactGraph, Graph or string): The graph, or the path of a binary graph file. A
+            graph is saved to a temporary file first; its vertex ids must be all integers or all strings.
+        processes (integer): The number of worker processes. Defaults to the number of CPUs.
+        parallel_frontier (integer): The smallest frontier handed to the workers; smaller ones
+            cost less to expand in this process than to send out.
+        """
+        self.__directory = tempfile.mkdtemp(prefix='parallel_bfs')
+        if isinstance(graph, str):
+            graph_path = graph
+        else:
+            if not isinstance(graph, CompactGraph):
+                graph = CompactGraph.from_graph(graph)
+            graph_path = os.path.join(self.__directory, 'graph.bin')
+            graph.save(graph_path)
+
+        self.__graph = CompactGraph.open(graph_path)
+        self.__processes = processes or os.cpu_count() or 1
+        self.__pool = ProcessPoolExecutor(self.__processes, initializer=_start_worker, initargs=(graph_path,))
+        self.__parallel_frontier = parallel_frontier
+        self.__searches = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the workers and remove temporary files."""
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
+            shutil.rmtree(self.__directory, ignore_errors=True)
+
+    def get_graph(self):
+        """Return the memory-mapped CompactGraph the workers search."""
+        return self.__graph
+
+    def __search(self, start, max_depth=None, target=-1):
+        """
+        Run the parallel BFS from a vertex index, stopping after level `max_depth` or once `target` is reached.
+        Returns:
+        tuple<array, array>: Copies of the distance and parent arrays.
+        """
+        n = self.__graph.num_vertices()
+        self.__searches += 1
+        state_path = os.path.join(self.__directory, f'search{self.__searches}.state')
+        unvisited = array('i', [-1]) * min(n, 1 << 20)
+        with open(state_path, 'wb') as state_file:
+            for _ in range(2):
+                for first in range(0, n, len(unvisited)):
+                    state_file.write(unvisited[:min(len(unvisited), n - first)].tobytes())
+
+        mapping, distances, parents = _open_state(state_path, n)
+        try:
+            distances[start] = 0
+            frontier = array('i', [start])
+            level = 0
+            while frontier:
+                if (max_depth is not None and level >= max_depth) or (target != -1 and distances[target] != -1):
+                    break
+                if len(frontier) < self.__parallel_frontier:
+                    frontier = expand_frontier(self.__graph, distances, parents, frontier, level)
+                else:
+                    chunks = CHUNKS_PER_PROCESS * self.__processes
+                    size = -(-len(frontier) // chunks)
+                    futures = [self.__pool.submit(_expand_chunk, state_path, level, frontier[first:first + size])
+                               for first in range(0, len(frontier), size)]
+                    frontier = array('i')
+                    for future in futures:
+                        frontier.extend(future.result())
+                level += 1
+
+            return array('i', distances.tobytes()), array('i', parents.tobytes())
+        finally:
+            del distances, parents  # release the views so the mapping can close
+            mapping.close()
+            os.remove(state_path)
+
+    def find_distances(self, start_id, max_depth=None):
+        """
+        Find the hop distance from a start vertex to every vertex.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        max_depth (integer): The greatest distance to search to, or None for no limit.
+        Returns:
+        array: The distance of every vertex index, -1 if unreached.
+        """
+        distances, _ = self.__search(self.__require_index(start_id), max_depth)
+        return distances
+
+    def find_vertices_n_away(self, start_id, target_distance):
+        """Return the ids of the vertices `target_distance` hops from the start, as Graph.find_vertices_n_away does."""
+        if target_distance < 0:
+            self.__require_index(start_id)
+            return []
+        distances = self.find_distances(start_id, target_distance)
+        graph = self.__graph
+        return [graph.get_id(vertex) for vertex, distance in enumerate(distances) if distance == target_distance]
+
+    def find_shortest_path(self, start_id, target_id):
+        """
+        Find a shortest path, as Graph.find_shortest_path does.
+        Returns:
+        list<string>: The vertex ids on the path from start to target, or None if there is none.
+        """
+        start = self.__require_index(start_id)
+        target = self.__require_index(target_id)
+        distances, parents = self.__search(start, target=target)
+        if distances[target] == -1:
+            return None
+
+        path = [target]
+        while path[-1] != start:
+            path.append(parents[path[-1]])
+        return [self.__graph.get_id(vertex) for vertex in reversed(path)]
+
+    def find_many_distances(self, start_ids, max_depth=None, batch_size=None):
+        """
+        Find the hop distances from many start vertices, e.g. every vertex, by giving each worker
+        batches of start vertices to search with CompactGraph.batch_distances.
+        Parameters:
+        start_ids (list<string>): The ids of the start vertices.
+        max_depth (integer): The greatest distance to search to, or None for no limit.
+        batch_size (integer): The number of start vertices per batch. Defaults to spreading them
+            evenly over the workers, at most 256 at a time.
+        Returns:
+        list<array>: For each start vertex, the distance to every vertex index (-1 if unreached).
+        """
+        start_ids = list(start_ids)
+        for start_id in start_ids:
+            self.__require_index(start_id)
+        batch_size = batch_size or max(1, min(256, -(-len(start_ids) // self.__processes)))
+
+        futures = [self.__pool.submit(_batch_distances, start_ids[first:first + batch_size], max_depth)
+                   for first in range(0, len(start_ids), batch_size)]
+        return [distances for future in futures for distances in future.result()]
+
+    def __require_index(self, vertex_id):
+        if not self.__graph.contains_id(vertex_id):
+            raise KeyError("Vertex not found")
+        return self.__graph.get_index(vertex_id)
@@ -0,0 +1,50 @@
+import random
+import unittest
+
+from compact_graph import CompactGraph
+from generators import erdos_renyi_edges
+from graph import Graph
+from parallel_bfs import ParallelBfs
+
+
+class ParallelBfsTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.graph = Graph(is_directed=True)
+        cls.graph.add_edges_from(erdos_renyi_edges(300, 900, seed=19))
+        # a frontier of two vertices is enough to go to the pool, so small graphs exercise the workers
+        cls.bfs = ParallelBfs(cls.graph, processes=2, parallel_frontier=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bfs.close()
+
+    def test_matches_graph(self):
+        rng = random.Random(19)
+        ids = [vertex.get_id() for vertex in self.graph.get_vertices()]
+        for _ in range(10):
+            start_id, target_id = rng.choice(ids), rng.choice(ids)
+            expected = self.graph.find_shortest_path(start_id, target_id)
+            path = self.bfs.find_shortest_path(start_id, target_id)
+            if expected is None:
+                assert path is None
+            else:
+                assert len(path) == len(expected)
+                assert all(path[i + 1] in self.bfs.get_graph().get_neighbors(path[i]) for i in range(len(path) - 1))
+            for distance in range(-1, 4):
+                assert sorted(self.bfs.find_vertices_n_away(start_id, distance)) == \
+                    sorted(self.graph.find_vertices_n_away(start_id, distance))
+
+    def test_many_sources(self):
+        ids = [vertex.get_id() for vertex in self.graph.get_vertices()][:10]
+        distances = self.bfs.find_many_distances(ids, max_depth=3)
+        assert distances == [self.bfs.find_distances(start_id, 3) for start_id in ids]
+        assert distances == CompactGraph.from_graph(self.graph).batch_distances(ids, 3)
+
+    def test_missing_vertex(self):
+        with self.assertRaises(KeyError):
+            self.bfs.find_distances('missing')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+from functools import wraps
+from inspect import signature
+
+
+class QueryCache(object):
+    """
+    A size-bounded, least-recently-used cache of query results for one graph.
+    Every entry belongs to a graph version; once the graph changes, all entries are dropped.
+    """
+
+    def __init__(self, max_entries=128):
+        """
+        Initialize an empty cache.
+        Parameters:
+        max_entries (integer): The most results kept before the least recently used is evicted.
+        """
+        if max_entries < 1:
+            raise ValueError('A query cache needs room for at least one entry')
+
+        self.__entries = OrderedDict()  # key -> result, least recently used first
+        self.__max_entries = max_entries
+        self.__version = None
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__invalidations = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def lookup(self, key, version, compute):
+        """
+        Return the cached result for `key`, calling `compute()` to fill it in on a miss.
+        Parameters:
+        key (hashable): Identifies the query and its arguments.
+        version (integer): The current version of the graph.
+        compute (callable): Computes the result when it isn't cached.
+        Returns:
+        The result. Callers get their own copy of every list and dict in it, so changing it
+        can't corrupt the cache.
+        """
+        if version != self.__version:
+            if self.__entries:
+                self.__invalidations += 1
+            self.__entries.clear()
+            self.__version = version
+
+        if key in self.__entries:
+            self.__hits += 1
+            self.__entries.move_to_end(key)
+            return _thaw(self.__entries[key])
+
+        self.__misses += 1
+        result = compute()
+        self.__entries[key] = _freeze(result)  # a copy, so the caller keeps the result itself
+        if len(self.__entries) > self.__max_entries:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+        return result
+
+    def clear(self):
+        """Drop every cached result."""
+        self.__entries.clear()
+
+    def stats(self):
+        """
+        Return the cache counters.
+        Returns:
+        dict: hits, misses, evictions, invalidations (times the graph changed under cached
+            results), size and max_entries.
+        """
+        return {
+            'hits': self.__hits,
+            'misses': self.__misses,
+            'evictions': self.__evictions,
+            'invalidations': self.__invalidations,
+            'size': len(self.__entries),
+            'max_entries': self.__max_entries,
+        }
+
+
+_CONTAINERS = (list, tuple, dict)  # lists and dicts can be changed by callers, and tuples can hold them
+
+
+class _Frozen(object):
+    """
+    An immutable copy of a list, tuple or dict from a query result. Thawing it builds a new one,
+    which for a container of plain values is a single C-level copy rather than a deep copy.
+    """
+
+    def __init__(self, value):
+        if isinstance(value, dict):
+            self.__kind = dict
+            self.__nested = any(isinstance(item, _CONTAINERS) for item in value.values())
+            items = value.items()
+            self.__items = tuple((key, _freeze(item)) for key, item in items) if self.__nested else tuple(items)
+        else:
+            self.__kind = list if isinstance(value, list) else tuple
+            self.__nested = any(isinstance(item, _CONTAINERS) for item in value)
+            self.__items = tuple(_freeze(item) for item in value) if self.__nested else tuple(value)
+
+    def thaw(self):
+        """Return a new copy of the value."""
+        items = self.__items
+        if self.__kind is dict:
+            return {key: _thaw(item) for key, item in items} if self.__nested else dict(items)
+        if self.__nested:
+            items = [_thaw(item) for item in items]
+        return self.__kind(items)
+
+
+def _freeze(value):
+    """Return a _Frozen copy of a list, tuple or dict, or any other value as it is."""
+    return _Frozen(value) if isinstance(value, _CONTAINERS) else value
+
+
+def _thaw(value):
+    return value.thaw() if isinstance(value, _Frozen) else value
+
+
+def cached_query(method):
+    """
+    Decorate a read-only graph query so its results are memoized in the graph's query cache,
+    when one is enabled. The graph must provide `get_query_cache()` and `get_version()`.
+    Arguments are bound to the method's parameters, defaults included, so the same query
+    passed positionally or by keyword shares an entry. Calls with a callable argument (such as
+    a heuristic) aren't cached, since a new function object would never hit.
+    """
+    parameters = signature(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.get_query_cache()
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        try:
+            bound = parameters.bind(self, *args, **kwargs)
+        except TypeError:  # let the method report the bad arguments
+            return method(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple(bound.arguments.values())[1:]
+        if any(callable(argument) for argument in arguments):
+            return method(self, *args, **kwargs)
+
+        key = (method.__name__, arguments)
+        try:
+            hash(key)
+        except TypeError:  # unhashable arguments can't be cached
+            return method(self, *args, **kwargs)
+
+        return cache.lookup(key, self.get_version(), lambda: method(self, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,305 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from compact_graph import CompactGraph
+from reachability import ReachabilityIndex
+
+DEFAULT_MAX_BATCH = 64  # the width of one bit-parallel BFS
+DEFAULT_BATCH_DELAY = 0.002  # seconds a request waits for others to share its batch
+DEFAULT_THREADS = 2
+
+# set in every worker process by _start_worker
+_worker_graph = None
+
+
+def _start_worker(graph_path):
+    global _worker_graph
+    _worker_graph = CompactGraph.open(graph_path)
+    _worker_graph.transpose()
+
+
+def _run_in_worker(function, requests):
+    """Answer a batch of requests in a worker process, against its mapped copy of the graph."""
+    return function(_worker_graph, requests)
+
+
+def find_paths(graph, requests):
+    """
+    Answer a batch of shortest path requests with one bit-parallel BFS: every vertex carries a
+    bitset of the searches that have reached it, so one scan of an edge advances every search
+    in the batch (as in CompactGraph.batch_distances). Each search stops once it reaches its
+    target, and its path is walked back through the levels it was seen at.
+    Parameters:
+    graph (CompactGraph): The graph, with its transpose already built.
+    requests (list<tuple>): (start_id, target_id) pairs.
+    Returns:
+    list: For each request, the vertex ids on a shortest path from start to target, or None.
+    """
+    seen = [0] * graph.num_vertices()  # bitset of searches that have reached each vertex
+    frontier = {}
+    wanted = {}  # target vertex -> bitset of searches looking for it
+    for bit, (start_id, target_id) in enumerate(requests):
+        start = graph.get_index(start_id)
+        frontier[start] = frontier.get(start, 0) | (1 << bit)
+        seen[start] |= 1 << bit
+        target = graph.get_index(target_id)
+        wanted[target] = wanted.get(target, 0) | (1 << bit)
+
+    levels = []  # the frontier of every level: vertex -> bitset of searches reaching it then
+    found_at = [-1] * len(requests)
+    searching = (1 << len(requests)) - 1
+    while frontier and searching:
+        level = len(levels)
+        levels.append(frontier)
+        for target in wanted.keys() & frontier.keys():
+            found = frontier[target] & wanted[target] & searching
+            searching &= ~found
+            while found:
+                lowest = found & -found
+                found_at[lowest.bit_length() - 1] = level
+                found ^= lowest
+
+        next_frontier = {}
+        for current, bits in frontier.items():
+            bits &= searching
+            if not bits:
+                continue
+            for neighbor in graph.neighbor_indices(current):
+                new_bits = bits & ~seen[neighbor]
+                if new_bits:
+                    seen[neighbor] |= new_bits
+                    next_frontier[neighbor] = next_frontier.get(neighbor, 0) | new_bits
+        frontier = next_frontier
+
+    reverse = graph.transpose()
+    paths = []
+    for bit, (_, target_id) in enumerate(requests):
+        if found_at[bit] == -1:
+            paths.append(None)
+            continue
+        mask = 1 << bit
+        vertex = graph.get_index(target_id)
+        path = [vertex]
+        for level in range(found_at[bit] - 1, -1, -1):
+            # step back to any vertex this search reached one level earlier
+            vertex = next(previous for previous in reverse.neighbor_indices(vertex)
+                          if levels[level].get(previous, 0) & mask)
+            path.append(vertex)
+        paths.append([graph.get_id(vertex) for vertex in reversed(path)])
+    return paths
+
+
+def find_vertices_n_away(graph, requests):
+    """
+    Answer a batch of n-away requests, searching the start vertices of each distance together
+    (see CompactGraph.batch_vertices_n_away).
+    Parameters:
+    graph (CompactGraph): The graph.
+    requests (list<tuple>): (start_id, target_distance) pairs.
+    Returns:
+    list<list<string>>: For each request, the ids of the vertices that far from the start.
+    """
+    start_ids = {}  # target distance -> distinct start ids
+    for start_id, target_distance in requests:
+        start_ids.setdefault(target_distance, {})[start_id] = None
+
+    found = {}
+    for target_distance, starts in start_ids.items():
+        for start_id, vertex_ids in zip(starts, graph.batch_vertices_n_away(list(starts), target_distance)):
+            found[start_id, target_distance] = vertex_ids
+    return [list(found[request]) for request in requests]
+
+
+class QueryService(object):
+    """
+    Answers graph queries from asyncio code without blocking the event loop. Requests that
+    arrive within `batch_delay` of each other are coalesced into one bit-parallel traversal
+    per batch, run on a thread pool, or on a process pool whose workers map the graph's binary
+    file (see CompactGraph.save) so it is shared rather than copied. Each request can have a
+    timeout; a request that times out or is cancelled before its batch starts is dropped from
+    the batch, though a batch that is already running finishes.
+    The graph is frozen into a CompactGraph when the service starts: later changes to a Graph
+    are not seen. Use the service as an async context manager, or call `start` and `close`.
+    """
+
+    def __init__(self, graph, processes=None, threads=DEFAULT_THREADS, max_batch=DEFAULT_MAX_BATCH,
+                 batch_delay=DEFAULT_BATCH_DELAY, timeout=None):
+        """
+        Parameters:
+        graph (Graph or CompactGraph): The graph to query.
+        processes (integer): The number of worker processes, or None to run batches on threads.
+            The graph's vertex ids must then be all integers or all strings.
+        threads (integer): The number of threads, when not using processes.
+        max_batch (integer): The most requests answered by one traversal.
+        batch_delay (float): The seconds a request waits for others to join its batch.
+        timeout (float): The default seconds a request may take, or None for no limit.
+        """
+        self.__graph = graph
+        self.__processes = processes
+        self.__threads = threads
+        self.__max_batch = max_batch
+        self.__batch_delay = batch_delay
+        self.__timeout = timeout
+        self.__compact = None
+        self.__reachability = None
+        self.__executor = None
+        self.__directory = None
+        self.__pending = {find_paths: [], find_vertices_n_away: []}  # work -> [(request, future)]
+        self.__timers = {}  # work -> handle of the scheduled dispatch
+        self.__running = set()
+        self.__stats = {'requests': 0, 'batches': 0, 'largest_batch': 0, 'timeouts': 0, 'dropped': 0}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Freeze the graph and build its transpose and reachability index, off the event loop."""
+        loop = asyncio.get_running_loop()
+        self.__compact, self.__reachability = await loop.run_in_executor(None, self.__prepare)
+        if self.__processes is None:
+            self.__executor = ThreadPoolExecutor(self.__threads)
+        else:
+            self.__directory = tempfile.mkdtemp(prefix='query_service')
+            graph_path = os.path.join(self.__directory, 'graph.bin')
+            await loop.run_in_executor(None, self.__compact.save, graph_path)
+            self.__executor = ProcessPoolExecutor(self.__processes, initializer=_start_worker,
+                                                  initargs=(graph_path,))
+
+    def __prepare(self):
+        compact = self.__graph if isinstance(self.__graph, CompactGraph) else CompactGraph.from_graph(self.__graph)
+        compact.transpose()  # built once here, so batches running at the same time can share it
+        return compact, ReachabilityIndex(compact)
+
+    async def close(self):
+        """Cancel the requests still waiting for a batch, let running batches finish, and stop the workers."""
+        for timer in self.__timers.values():
+            timer.cancel()
+        self.__timers.clear()
+        for batch in self.__pending.values():
+            for _, future in batch:
+                future.cancel()
+            batch.clear()
+        if self.__running:
+            await asyncio.gather(*self.__running, return_exceptions=True)
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+        if self.__directory is not None:
+            shutil.rmtree(self.__directory, ignore_errors=True)
+            self.__directory = None
+
+    def get_graph(self):
+        """Return the frozen CompactGraph the service answers from, or None before it starts."""
+        return self.__compact
+
+    def stats(self):
+        """
+        Return the service counters.
+        Returns:
+        dict: requests, batches, largest_batch, timeouts, and dropped (requests cancelled or
+            timed out before their batch ran).
+        """
+        return dict(self.__stats)
+
+    async def find_shortest_path(self, start_id, target_id, timeout=None):
+        """
+        Find a shortest path, batched with other path requests.
+        Parameters:
+        start_id (string): The id of the start vertex.
+        target_id (string): The id of the target vertex.
+        timeout (float): The seconds to wait, overriding the service's default.
+        Returns:
+        list<string>: The vertex ids on the path from start to target, or None if there is none.
+        Raises:
+        asyncio.TimeoutError: If the answer takes longer than the timeout.
+        """
+        self.__require_ids(start_id, target_id)
+        return await self.__submit(find_paths, (start_id, target_id), timeout)
+
+    async def find_vertices_n_away(self, start_id, target_distance, timeout=None):
+        """
+        Find the vertices `target_distance` hops from a start vertex, batched with other such requests.
+        Returns:
+        list<string>: Their ids.
+        Raises:
+        asyncio.TimeoutError: If the answer takes longer than the timeout.
+        """
+        self.__require_ids(start_id)
+        return await self.__submit(find_vertices_n_away, (start_id, target_distance), timeout)
+
+    async def reachable(self, start_id, target_id):
+        """
+        Return True if there is a path from one vertex to another. Answered straight from the
+        reachability index built at start, without a batch.
+        """
+        self.__require_ids(start_id, target_id)
+        self.__stats['requests'] += 1
+        return self.__reachability.reachable(start_id, target_id)
+
+    def __require_ids(self, *vertex_ids):
+        if self.__compact is None:
+            raise RuntimeError('Query service not started')
+        if not all(self.__compact.contains_id(vertex_id) for vertex_id in vertex_ids):
+            raise KeyError("One or both vertices are not in the graph!")
+
+    async def __submit(self, work, request, timeout):
+        """Queue a request for the next batch of its kind and wait for its answer."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self.__pending[work]
+        batch.append((request, future))
+        self.__stats['requests'] += 1
+
+        if len(batch) >= self.__max_batch:
+            self.__dispatch(work)
+        elif work not in self.__timers:
+            self.__timers[work] = loop.call_later(self.__batch_delay, self.__dispatch, work)
+
+        timeout = self.__timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self.__stats['timeouts'] += 1
+            raise
+
+    def __dispatch(self, work):
+        """Send the requests waiting for a batch to the executor, skipping cancelled ones."""
+        timer = self.__timers.pop(work, None)
+        if timer is not None:
+            timer.cancel()
+        batch = [(request, future) for request, future in self.__pending[work] if not future.done()]
+        self.__stats['dropped'] += len(self.__pending[work]) - len(batch)
+        self.__pending[work] = []
+        if not batch:
+            return
+
+        self.__stats['batches'] += 1
+        self.__stats['largest_batch'] = max(self.__stats['largest_batch'], len(batch))
+        task = asyncio.get_running_loop().create_task(self.__run(work, batch))
+        self.__running.add(task)
+        task.add_done_callback(self.__running.discard)
+
+    async def __run(self, work, batch):
+        loop = asyncio.get_running_loop()
+        requests = [request for request, _ in batch]
+        try:
+            if self.__processes is None:
+                results = await loop.run_in_executor(self.__executor, work, self.__compact, requests)
+            else:
+                results = await loop.run_in_executor(self.__executor, _run_in_worker, work, requests)
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # its caller may have timed out meanwhile
+                future.set_result(result)
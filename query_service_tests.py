@@ -0,0 +1,80 @@
+import asyncio
+import random
+import time
+import unittest
+
+from generators import erdos_renyi_edges
+from graph import Graph
+from query_service import QueryService
+
+
+def random_graph(is_directed=True):
+    graph = Graph(is_directed=is_directed)
+    graph.add_edges_from(erdos_renyi_edges(200, 500, seed=4))
+    return graph
+
+
+class QueryServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.graph = random_graph()
+        rng = random.Random(2)
+        vertex_ids = self.graph.get_vertex_ids()
+        self.pairs = [(rng.choice(vertex_ids), rng.choice(vertex_ids)) for _ in range(150)]
+
+    def check_answers(self, service):
+        """Answers to many concurrent requests match the blocking Graph queries."""
+        async def run():
+            paths = [service.find_shortest_path(start_id, target_id) for start_id, target_id in self.pairs]
+            n_away = [service.find_vertices_n_away(start_id, 2) for start_id, _ in self.pairs[:40]]
+            reachable = [service.reachable(start_id, target_id) for start_id, target_id in self.pairs]
+            return await asyncio.gather(asyncio.gather(*paths), asyncio.gather(*n_away), asyncio.gather(*reachable))
+
+        async def main():
+            async with service:
+                return await run()
+
+        paths, n_away, reachable = asyncio.run(main())
+        for (start_id, target_id), path, can_reach in zip(self.pairs, paths, reachable):
+            expected = self.graph.find_shortest_path(start_id, target_id)
+            assert can_reach == (expected is not None)
+            if expected is None:
+                assert path is None
+                continue
+            assert len(path) == len(expected) and path[0] == start_id and path[-1] == target_id
+            for vertex_id, next_id in zip(path, path[1:]):
+                assert self.graph.get_vertex(vertex_id).get_edge_weight(next_id) is not None
+        for (start_id, _), vertex_ids in zip(self.pairs, n_away):
+            assert sorted(vertex_ids) == sorted(self.graph.find_vertices_n_away(start_id, 2))
+
+        stats = service.stats()
+        assert stats['requests'] == 340
+        assert stats['batches'] < 150  # requests were coalesced
+        assert stats['largest_batch'] <= 64
+
+    def test_thread_pool(self):
+        self.check_answers(QueryService(self.graph))
+
+    def test_process_pool(self):
+        self.check_answers(QueryService(self.graph, processes=2))
+
+    def test_timeouts_and_errors(self):
+        async def main():
+            service = QueryService(self.graph, batch_delay=0.2)
+            with self.assertRaises(RuntimeError):
+                await service.find_shortest_path(0, 1)
+            async with service:
+                started = time.perf_counter()
+                with self.assertRaises(asyncio.TimeoutError):
+                    await service.find_shortest_path(self.pairs[0][0], self.pairs[0][1], timeout=0.01)
+                assert time.perf_counter() - started < 0.15  # the timeout didn't wait for the batch
+                with self.assertRaises(KeyError):
+                    await service.find_vertices_n_away('missing', 1)
+                await asyncio.sleep(0.3)  # let the batch come due
+                return service.stats()
+
+        stats = asyncio.run(main())
+        assert stats['timeouts'] == 1 and stats['dropped'] == 1 and stats['batches'] == 0
+
+
+if __name__ == '__main__':
+    unittest.main()
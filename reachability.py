@@ -0,0 +1,214 @@
+from array import array
+
+from compact_graph import CompactGraph, build_csr
+from components import as_compact, connected_component_labels, strongly_connected_component_labels
+
+DEFAULT_MAX_BYTES = 64 << 20  # largest transitive closure built before falling back to labels
+
+
+class ReachabilityIndex(object):
+    """
+    Answers "can A reach B?" without a traversal per question. Building the index costs
+    O(V + E) to condense the graph's strongly connected components into a DAG of C components
+    (every vertex of a component reaches every other), and then:
+    - for an undirected graph, nothing more: two vertices reach each other exactly when they
+      are in the same connected component, and every query is a pair of dictionary lookups.
+    - for a directed graph whose transitive closure fits in `max_bytes` (about C * C / 16
+      bytes), O(C * E' / 8) to compute it as one bitset per component, E' being the number of
+      edges between components. Every query is then O(1).
+    - otherwise, O(C + E') for two interval labels per component from a depth-first search of
+      the DAG, in 16 bytes per component. Most queries are settled by the labels alone; the
+      rest search the DAG, skipping every component the labels show can't reach the target.
+    The index also keeps one dictionary entry per vertex, and is not updated by later changes
+    to the graph: compare `get_version()` with the graph's to tell when to rebuild it.
+    """
+
+    def __init__(self, graph, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Build the index.
+        Parameters:
+        graph (Graph or CompactGraph): The graph.
+        max_bytes (integer): The most memory the transitive closure may take. Larger closures
+            are not built, and queries use the interval labels instead.
+        """
+        self.__version = None if isinstance(graph, CompactGraph) else graph.get_version()
+        compact = as_compact(graph)
+        self.__is_directed = compact.is_directed()
+        if self.__is_directed:
+            count, labels = strongly_connected_component_labels(compact)
+        else:
+            count, labels = connected_component_labels(compact)
+        self.__count = count
+        self.__component = dict(zip(compact.get_vertex_ids(), labels))  # vertex id -> component
+        self.__closure = None
+        self.__offsets = self.__targets = None
+        self.__post = self.__low = self.__tree_low = None
+        if not self.__is_directed:
+            return
+
+        # the condensation: an edge between every pair of components joined by an edge
+        sources = array('i')
+        destinations = array('i')
+        offsets = compact.get_offsets()
+        targets = compact.get_targets()
+        for vertex in range(compact.num_vertices()):
+            component = labels[vertex]
+            for position in range(offsets[vertex], offsets[vertex + 1]):
+                target_component = labels[targets[position]]
+                if target_component != component:
+                    sources.append(component)
+                    destinations.append(target_component)
+        self.__offsets, self.__targets, _ = build_csr(count, sources, destinations)
+
+        if closure_bytes(count) <= max_bytes:
+            self.__build_closure()
+        else:
+            self.__build_labels()
+
+    def __build_closure(self):
+        """
+        Compute the components every component reaches, as one bitset per component. Components
+        are numbered in reverse topological order, so each one only reaches lower-numbered
+        components and its bitset needs just (component + 1) bits, built from its successors'.
+        """
+        offsets, targets = self.__offsets, self.__targets
+        closure = []
+        for component in range(self.__count):
+            bits = 1 << component
+            for position in range(offsets[component], offsets[component + 1]):
+                bits |= int.from_bytes(closure[targets[position]], 'little')
+            closure.append(bits.to_bytes((component >> 3) + 1, 'little'))
+        self.__closure = closure
+
+    def __build_labels(self):
+        """
+        Number the components in depth-first postorder. Each component gets its own number
+        (`post`), the lowest number of any component it reaches (`low`), and the lowest number
+        in its subtree of the depth-first forest (`tree_low`). Every component a component
+        reaches has a number within [low, post], and every number within [tree_low, post]
+        belongs to one it reaches.
+        """
+        count = self.__count
+        offsets, targets = self.__offsets, self.__targets
+        post = array('i', [-1]) * count
+        low = array('i', bytes(4 * count))
+        tree_low = array('i', bytes(4 * count))
+        next_edge = array('q', offsets[:count])
+        counter = 0
+
+        # sources of the DAG have the highest numbers, so start there
+        for root in range(count - 1, -1, -1):
+            if post[root] != -1:
+                continue
+            post[root] = -2  # on the path
+            path = [root]
+            tree_low[root] = low[root] = count
+
+            while path:
+                component = path[-1]
+                position = next_edge[component]
+                end = offsets[component + 1]
+                while position < end:
+                    successor = targets[position]
+                    position += 1
+                    if post[successor] == -1:
+                        next_edge[component] = position
+                        post[successor] = -2
+                        tree_low[successor] = low[successor] = count
+                        path.append(successor)
+                        break
+                    if low[successor] < low[component]:
+                        low[component] = low[successor]
+                else:
+                    path.pop()
+                    post[component] = counter
+                    low[component] = min(low[component], counter)
+                    tree_low[component] = min(tree_low[component], counter)
+                    counter += 1
+                    if path:
+                        parent = path[-1]
+                        low[parent] = min(low[parent], low[component])
+                        tree_low[parent] = min(tree_low[parent], tree_low[component])
+
+        self.__post, self.__low, self.__tree_low = post, low, tree_low
+
+    def reachable(self, vertex_id1, vertex_id2):
+        """
+        Return True if there is a path from one vertex to another. A vertex always reaches itself.
+        Parameters:
+        vertex_id1 (string): The id of the start vertex.
+        vertex_id2 (string): The id of the target vertex.
+        Returns:
+        boolean: Whether the target can be reached from the start.
+        """
+        if vertex_id1 not in self.__component or vertex_id2 not in self.__component:
+            raise KeyError("One or both vertices are not in the graph!")
+        source = self.__component[vertex_id1]
+        target = self.__component[vertex_id2]
+        if source == target:
+            return True
+        if not self.__is_directed or target > source:
+            return False  # components only reach lower-numbered components
+        if self.__closure is not None:
+            return bool(self.__closure[source][target >> 3] >> (target & 7) & 1)
+        return self.__search(source, target)
+
+    def __search(self, source, target):
+        """Depth-first search of the condensation, pruned by the interval labels."""
+        post, low, tree_low = self.__post, self.__low, self.__tree_low
+        target_post = post[target]
+        offsets, targets = self.__offsets, self.__targets
+
+        def may_reach(component):
+            return low[component] <= target_post <= post[component]
+
+        if not may_reach(source):
+            return False
+        seen = {source}
+        stack = [source]
+        while stack:
+            component = stack.pop()
+            if tree_low[component] <= target_post:
+                return True  # the target is in this component's depth-first subtree
+            for position in range(offsets[component], offsets[component + 1]):
+                successor = targets[position]
+                if successor not in seen and may_reach(successor):
+                    seen.add(successor)
+                    stack.append(successor)
+        return False
+
+    def get_component(self, vertex_id):
+        """
+        Return the number of the (strongly, for directed graphs) connected component of a
+        vertex. Components are numbered in reverse topological order.
+        """
+        if vertex_id not in self.__component:
+            raise KeyError("Vertex not found")
+        return self.__component[vertex_id]
+
+    def num_components(self):
+        """Return the number of (strongly, for directed graphs) connected components."""
+        return self.__count
+
+    def has_closure(self):
+        """Return True if queries are answered from the transitive closure in O(1)."""
+        return self.__closure is not None
+
+    def get_version(self):
+        """Return the version of the graph when the index was built, or None for a CompactGraph."""
+        return self.__version
+
+    def nbytes(self):
+        """Return the size in bytes of the closure or labels and the condensation (not the vertex dictionary)."""
+        total = 0
+        for part in (self.__offsets, self.__targets, self.__post, self.__low, self.__tree_low):
+            if part is not None:
+                total += part.itemsize * len(part)
+        if self.__closure is not None:
+            total += sum(len(bits) for bits in self.__closure)
+        return total
+
+
+def closure_bytes(num_components):
+    """Return the bytes of bitsets the transitive closure of `num_components` components takes."""
+    return sum((component >> 3) + 1 for component in range(num_components))
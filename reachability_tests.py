@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from compact_graph import CompactGraph
+from graph import Graph
+from reachability import ReachabilityIndex
+
+
+def random_graph(seed, is_directed=True):
+    rng = random.Random(seed)
+    num_vertices = rng.randint(1, 60)
+    graph = Graph(is_directed=is_directed)
+    for vertex_id in range(num_vertices):
+        graph.add_vertex(vertex_id)
+    graph.add_edges_from((rng.randrange(num_vertices), rng.randrange(num_vertices))
+                         for _ in range(rng.randint(0, 150)))
+    return graph
+
+
+class ReachabilityTests(unittest.TestCase):
+    def assert_matches_search(self, graph, index):
+        for start_id in graph.get_vertex_ids():
+            reached = set(graph.iter_bfs(start_id))
+            for target_id in graph.get_vertex_ids():
+                assert index.reachable(start_id, target_id) == (target_id in reached)
+
+    def test_closure_matches_search(self):
+        for seed in range(20):
+            graph = random_graph(seed)
+            index = ReachabilityIndex(graph)
+            assert index.has_closure()
+            self.assert_matches_search(graph, index)
+
+    def test_labels_match_search(self):
+        """Without room for the closure, the interval labels and pruned search give the same answers."""
+        for seed in range(20):
+            graph = random_graph(seed)
+            index = ReachabilityIndex(graph, max_bytes=0)
+            assert not index.has_closure()
+            self.assert_matches_search(graph, index)
+
+    def test_undirected_and_compact_graphs(self):
+        graph = random_graph(3, is_directed=False)
+        self.assert_matches_search(graph, ReachabilityIndex(graph))
+        compact = CompactGraph.from_graph(random_graph(4))
+        index = ReachabilityIndex(compact)
+        assert index.get_version() is None
+        self.assert_matches_search(random_graph(4), index)
+
+    def test_components(self):
+        graph = Graph()
+        graph.add_edges_from([('a', 'b'), ('b', 'a'), ('b', 'c'), ('d', 'c')])
+        index = ReachabilityIndex(graph)
+        assert index.num_components() == 3
+        assert index.get_component('a') == index.get_component('b') > index.get_component('c')
+        assert index.reachable('a', 'c') and not index.reachable('c', 'a') and not index.reachable('a', 'd')
+        assert index.get_version() == graph.get_version()
+        with self.assertRaises(KeyError):
+            index.reachable('a', 'z')
+
+
+if __name__ == '__main__':
+    unittest.main()
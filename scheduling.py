@@ -0,0 +1,116 @@
+from array import array
+
+from compact_graph import build_csr
+
+
+class CycleError(ValueError):
+    """
+    Raised when dependencies can't be scheduled because they form a cycle.
+    The `cycle` attribute lists the tasks on one such cycle, each a prerequisite of the next
+    and the last a prerequisite of the first.
+    """
+
+    def __init__(self, cycle):
+        super().__init__('Dependency cycle: ' + ' -> '.join(str(task) for task in cycle + cycle[:1]))
+        self.cycle = cycle
+
+
+class Schedule(object):
+    """
+    Tasks grouped into levels: every task's prerequisites are all in earlier levels, so the tasks
+    of one level can run at the same time.
+    """
+
+    def __init__(self, levels):
+        """
+        Parameters:
+        levels (list<list<integer>>): The tasks of every level, in order.
+        """
+        self.__levels = levels
+
+    def get_levels(self):
+        """Return the tasks of every level, in order."""
+        return self.__levels
+
+    def get_order(self):
+        """Return every task in an order that respects the prerequisites."""
+        return [task for level in self.__levels for task in level]
+
+    def get_critical_path_length(self):
+        """Return the number of tasks on the longest chain of prerequisites (the number of levels)."""
+        return len(self.__levels)
+
+    def get_max_width(self):
+        """Return the largest number of tasks that run at the same time."""
+        return max((len(level) for level in self.__levels), default=0)
+
+
+def _edge_arrays(num_tasks, prerequisites):
+    """Split [task, prerequisite] pairs into parallel prerequisite and task index arrays."""
+    before = array('i')
+    after = array('i')
+    for task, prerequisite in prerequisites:
+        if not (0 <= task < num_tasks and 0 <= prerequisite < num_tasks):
+            raise ValueError(f'Tasks must be numbered 0..{num_tasks - 1}, got {[task, prerequisite]}')
+        before.append(prerequisite)
+        after.append(task)
+    return before, after
+
+
+def _find_cycle(num_tasks, before, after, in_degree):
+    """
+    Find a cycle among the tasks Kahn's algorithm left unscheduled. Every such task still has an
+    unscheduled prerequisite, so following those backward must eventually repeat a task.
+    """
+    offsets, prerequisites, _ = build_csr(num_tasks, after, before)
+    step = array('i', [-1]) * num_tasks  # when the walk visited each task
+
+    task = next(task for task in range(num_tasks) if in_degree[task])
+    walk = []
+    while step[task] == -1:
+        step[task] = len(walk)
+        walk.append(task)
+        task = next(prerequisite for prerequisite in prerequisites[offsets[task]:offsets[task + 1]]
+                    if in_degree[prerequisite])
+
+    # the walk went against the edges, so reverse the loop to list it in schedule order
+    return walk[step[task]:][::-1]
+
+
+def schedule(num_tasks, prerequisites):
+    """
+    Group tasks into levels that can run concurrently, with Kahn's algorithm over integer arrays,
+    in O(V + E) time. Tasks without prerequisites, including ones no pair mentions, go first.
+    Parameters:
+    num_tasks (integer): The number of tasks, numbered 0..num_tasks-1.
+    prerequisites (iterable): [task, prerequisite] pairs; the prerequisite must run first.
+    Returns:
+    Schedule: The levels. Within a level, tasks are in the order they became ready.
+    Raises:
+    CycleError: If the prerequisites form a cycle.
+    """
+    before, after = _edge_arrays(num_tasks, prerequisites)
+    offsets, targets, _ = build_csr(num_tasks, before, after)  # repeated pairs are dropped
+
+    in_degree = array('i', bytes(4 * num_tasks))
+    for task in targets:
+        in_degree[task] += 1
+
+    levels = []
+    level = [task for task in range(num_tasks) if not in_degree[task]]
+    scheduled = 0
+    while level:
+        levels.append(level)
+        scheduled += len(level)
+        ready = []
+        for task in level:
+            for position in range(offsets[task], offsets[task + 1]):
+                successor = targets[position]
+                in_degree[successor] -= 1
+                if not in_degree[successor]:
+                    ready.append(successor)
+        level = ready
+
+    if scheduled < num_tasks:
+        raise CycleError(_find_cycle(num_tasks, before, after, in_degree))
+    return Schedule(levels)
@@ -0,0 +1,58 @@
+import random
+import unittest
+
+import challenges
+import scheduling
+
+
+class SchedulingTests(unittest.TestCase):
+    def test_levels(self):
+        plan = scheduling.schedule(5, [[1, 0], [2, 0], [3, 1], [3, 2], [3, 2]])
+        assert plan.get_levels() == [[0, 4], [1, 2], [3]]
+        assert plan.get_order() == [0, 4, 1, 2, 3]
+        assert plan.get_critical_path_length() == 3
+        assert plan.get_max_width() == 2
+        assert scheduling.schedule(0, []).get_levels() == []
+
+    def test_isolated_courses(self):
+        """Courses no prerequisite mentions can be taken at any time."""
+        assert challenges.courseOrder(3, [[1, 0]]) == [0, 2, 1]
+        assert challenges.courseOrder(2, []) == [0, 1]
+
+    def test_cycle(self):
+        with self.assertRaises(scheduling.CycleError) as raised:
+            scheduling.schedule(5, [[1, 0], [2, 1], [3, 2], [1, 3], [4, 3]])
+        cycle = raised.exception.cycle
+        assert sorted(cycle) == [1, 2, 3]
+        for position, task in enumerate(cycle):
+            # each task on the cycle is a prerequisite of the next one
+            assert [cycle[(position + 1) % len(cycle)], task] in [[2, 1], [3, 2], [1, 3]]
+        assert challenges.courseOrder(5, [[1, 0], [2, 1], [3, 2], [1, 3]]) == []
+
+        with self.assertRaises(scheduling.CycleError) as raised:
+            scheduling.schedule(2, [[1, 1]])
+        assert raised.exception.cycle == [1]
+
+    def test_random_graphs(self):
+        rng = random.Random(15)
+        for _ in range(100):
+            n = rng.randint(1, 20)
+            pairs = [[rng.randrange(n), rng.randrange(n)] for _ in range(rng.randint(0, 30))]
+            try:
+                plan = scheduling.schedule(n, pairs)
+            except scheduling.CycleError as error:
+                cycle = error.cycle
+                for position, task in enumerate(cycle):
+                    assert [cycle[(position + 1) % len(cycle)], task] in pairs
+                continue
+            level_of = {task: level for level, tasks in enumerate(plan.get_levels()) for task in tasks}
+            assert sorted(level_of) == list(range(n))
+            assert all(level_of[prerequisite] < level_of[task] for task, prerequisite in pairs)
+
+    def test_bad_course_number(self):
+        with self.assertRaises(ValueError):
+            scheduling.schedule(2, [[2, 0]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,377 @@
+import mmap
+import os
+import tempfile
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from components import UnionFind
+from grid_analysis import cell_bitmask, label_runs, row_bytes
+
+DEFAULT_TILE_ROWS = 1024
+
+
+def _read_rows(path, width, first_row, last_row):
+    """Read rows first_row..last_row-1 of a raw grid file, one bytes object per row."""
+    with open(path, 'rb') as grid_file:
+        with mmap.mmap(grid_file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            return [mapping[row * width:(row + 1) * width] for row in range(first_row, last_row)]
+
+
+def _read_boundary(path, width, slot):
+    """Read one row of spread times from a boundary file."""
+    distances = array('i')
+    with open(path, 'rb') as boundary_file:
+        boundary_file.seek(slot * width * distances.itemsize)
+        distances.fromfile(boundary_file, width)
+    return distances
+
+
+def _touching(upper_runs, lower_runs, reach):
+    """Yield the (upper label, lower label) pairs of runs in two consecutive rows that touch."""
+    above = 0
+    for start, end, label in lower_runs:
+        while above < len(upper_runs) and upper_runs[above][1] + reach <= start:
+            above += 1
+        touching = above
+        while touching < len(upper_runs) and upper_runs[touching][0] < end + reach:
+            yield upper_runs[touching][2], label
+            touching += 1
+
+
+def _label_tile(path, width, first_row, last_row, value, connectivity):
+    """
+    Label the regions of one tile, run in-process or in a worker process.
+    Returns:
+    tuple: The number of regions in the tile and the runs of its first and last rows as
+        (start, end, label), labeled 0..k-1 in order of the regions' first cells.
+    """
+    union_find, labeled_rows = label_runs(_read_rows(path, width, first_row, last_row), value, connectivity)
+    count, run_labels = union_find.labels()
+    top = [(start, end, run_labels[label]) for start, end, label in labeled_rows[0]]
+    bottom = [(start, end, run_labels[label]) for start, end, label in labeled_rows[-1]]
+    return count, top, bottom
+
+
+def _write_tile_labels(path, width, first_row, last_row, value, connectivity, labels_path, tile_labels):
+    """Relabel one tile with its global region numbers and write them to the label file."""
+    union_find, labeled_rows = label_runs(_read_rows(path, width, first_row, last_row), value, connectivity)
+    _, run_labels = union_find.labels()
+
+    with open(labels_path, 'r+b') as labels_file:
+        with mmap.mmap(labels_file.fileno(), 0) as mapping:
+            for row, runs in enumerate(labeled_rows, first_row):
+                labels = array('i', bytes(4 * width))
+                for start, end, label in runs:
+                    labels[start:end] = array('i', [tile_labels[run_labels[label]]]) * (end - start)
+                mapping[4 * row * width:4 * (row + 1) * width] = labels.tobytes()
+
+
+def _spread_tile(path, width, first_row, last_row, tile, tiles, boundary_path, source, target, connectivity):
+    """
+    Simulate the spread within one tile, treating the last row of the tile above and the first row
+    of the tile below (read from the boundary file) as sources that start spreading at the step the
+    spread reached them.
+    Returns:
+    tuple<bytes, bytes, integer, boolean>: The int32 spread times of the tile's first and last
+        rows (-1 where never reached), the last step that reached a cell, and whether any target
+        cell in the tile was left unreached.
+    """
+    rows = _read_rows(path, width, first_row, last_row)
+    padded = width + 1
+    size = (len(rows) + 2) * padded  # bits, including a halo row above and below the tile
+    shifts = (1, padded) if connectivity == 4 else (1, padded - 1, padded, padded + 1)
+    row_mask = (1 << padded) - 1
+
+    # the tile sits between the halo rows, so its bitsets are shifted past the lower halo row
+    remaining = cell_bitmask(rows, target) << padded
+    seeds = {0: cell_bitmask(rows, source) << padded}
+    for halo_row, slot in ((0, 2 * tile - 1), (len(rows) + 1, 2 * tile + 2)):
+        if 0 <= slot < 2 * tiles:
+            for column, distance in enumerate(_read_boundary(boundary_path, width, slot)):
+                if distance >= 0:
+                    bit = 1 << (size - 1 - halo_row * padded - column)
+                    seeds[distance] = seeds.get(distance, 0) | bit
+
+    # only the tile's first and last rows are recorded, since only they feed other tiles
+    top = array('i', [-1]) * width
+    bottom = array('i', [-1]) * width
+
+    def record(cells, distance):
+        for boundary, shift in ((top, size - 2 * padded), (bottom, padded)):
+            bits = (cells >> shift) & row_mask
+            if bits:
+                text = format(bits, 'b').zfill(padded)
+                column = text.find('1')
+                while column != -1:
+                    boundary[column] = distance
+                    column = text.find('1', column + 1)
+
+    record(seeds[0], 0)
+    times = sorted(seeds)
+    next_time = 0
+    time = times[0]
+    last_step = 0
+    frontier = 0
+    while remaining:
+        # halo cells join the frontier once the spread has reached them
+        while next_time < len(times) and times[next_time] == time:
+            frontier |= seeds[time]
+            next_time += 1
+        if not frontier:
+            if next_time == len(times):
+                break
+            time = times[next_time]
+            continue
+
+        reached = 0
+        for shift in shifts:
+            reached |= (frontier << shift) | (frontier >> shift)
+        frontier = reached & remaining
+        remaining &= ~frontier
+        time += 1
+        if frontier:
+            last_step = time
+            record(frontier, time)
+
+    return top.tobytes(), bottom.tobytes(), last_step, bool(remaining)
+
+
+class TiledGrid(object):
+    """
+    A grid of small non-negative integers (0-255) stored in a raw file, one byte per cell in row
+    order, and processed in tiles of whole rows. Only one tile per worker is held in memory at a
+    time, so grids much larger than RAM can be analyzed. The grid file is never modified.
+    """
+
+    def __init__(self, path, width, tile_rows=DEFAULT_TILE_ROWS):
+        """
+        Open a raw grid file.
+        Parameters:
+        path (string): The grid file.
+        width (integer): The number of cells in every row.
+        tile_rows (integer): The number of rows in each tile.
+        """
+        if width < 1 or tile_rows < 1:
+            raise ValueError('Grid width and tile rows must be positive')
+        size = os.path.getsize(path)
+        if size % width:
+            raise ValueError(f'{path} does not hold whole rows of {width} cells')
+
+        self.__path = path
+        self.__width = width
+        self.__height = size // width
+        self.__tile_rows = tile_rows
+
+    @classmethod
+    def create(cls, path, grid, tile_rows=DEFAULT_TILE_ROWS):
+        """
+        Write a grid to a raw grid file, one row at a time, and open it.
+        Parameters:
+        path (string): The file to write.
+        grid: An iterable of rows (lists, bytes or bytearrays), or a 2D NumPy array.
+        tile_rows (integer): The number of rows in each tile.
+        Returns:
+        TiledGrid: The opened grid.
+        """
+        width = None
+        with open(path, 'wb') as out:
+            for row in grid:
+                row = row_bytes(row)
+                if width is None:
+                    width = len(row)
+                elif len(row) != width:
+                    raise ValueError('All grid rows must have the same length')
+                out.write(row)
+        return cls(path, width or 1, tile_rows)
+
+    def get_path(self):
+        """Return the path of the grid file."""
+        return self.__path
+
+    def get_width(self):
+        """Return the number of cells in every row."""
+        return self.__width
+
+    def get_height(self):
+        """Return the number of rows."""
+        return self.__height
+
+    def get_tiles(self):
+        """Return the (first row, end row) bounds of every tile."""
+        return [(first, min(first + self.__tile_rows, self.__height))
+                for first in range(0, self.__height, self.__tile_rows)]
+
+    def read_rows(self, first_row, last_row):
+        """Return rows first_row..last_row-1 as bytes objects."""
+        return _read_rows(self.__path, self.__width, first_row, last_row)
+
+    def __map_tiles(self, function, arguments, processes):
+        """Call `function` on every tile, in a process pool if `processes` is given."""
+        calls = [(self.__path, self.__width) + bounds + arguments for bounds in self.get_tiles()]
+        if not processes:
+            return [function(*call) for call in calls]
+        with ProcessPoolExecutor(processes) as pool:
+            return list(pool.map(function, *zip(*calls)))
+
+    def __merge_tiles(self, tiles, connectivity):
+        """
+        Join regions that cross tile boundaries.
+        Returns:
+        tuple<UnionFind, dict, integer>: Union-find over the boundary regions, the element of each
+            (tile, label) in it, and the number of regions in the whole grid.
+        """
+        reach = 1 if connectivity == 8 else 0
+        union_find = UnionFind()
+        elements = {}
+
+        def element(key):
+            if key not in elements:
+                elements[key] = union_find.add()
+            return elements[key]
+
+        count = sum(tile_count for tile_count, _, _ in tiles)
+        for tile in range(1, len(tiles)):
+            for upper, lower in _touching(tiles[tile - 1][2], tiles[tile][1], reach):
+                if union_find.union(element((tile - 1, upper)), element((tile, lower))):
+                    count -= 1
+        return union_find, elements, count
+
+    def count_regions(self, value=1, connectivity=4, processes=None):
+        """
+        Count the connected regions of cells equal to `value`. Each tile is labeled on its own,
+        then regions touching across tile boundaries are merged with union-find.
+        Parameters:
+        value (integer): The cell value making up regions.
+        connectivity (integer): 4 to join cells sharing an edge, 8 to also join diagonal neighbors.
+        processes (integer): The number of worker processes labeling tiles, or None to label them
+            in this process.
+        Returns:
+        integer: The number of regions.
+        """
+        if connectivity not in (4, 8):
+            raise ValueError('connectivity must be 4 or 8')
+        tiles = self.__map_tiles(_label_tile, (value, connectivity), processes)
+        return self.__merge_tiles(tiles, connectivity)[2]
+
+    def label_regions(self, labels_path, value=1, connectivity=4, processes=None):
+        """
+        Label the connected regions of cells equal to `value`, writing the labels to a file.
+        Parameters:
+        labels_path (string): The file to write: one native int32 per cell in row order, where 0
+            is background and regions are numbered from 1 in order of their first cell.
+        value (integer): The cell value making up regions.
+        connectivity (integer): 4 to join cells sharing an edge, 8 to also join diagonal neighbors.
+        processes (integer): The number of worker processes, or None to work in this process.
+        Returns:
+        integer: The number of regions.
+        """
+        if connectivity not in (4, 8):
+            raise ValueError('connectivity must be 4 or 8')
+        tiles = self.__map_tiles(_label_tile, (value, connectivity), processes)
+        union_find, elements, count = self.__merge_tiles(tiles, connectivity)
+
+        # number the regions tile by tile; within a tile, labels already follow first-cell order
+        numbers = {}
+        tile_labels = []
+        for tile, (tile_count, _, _) in enumerate(tiles):
+            labels = array('i')
+            for label in range(tile_count):
+                key = (tile, label)
+                region = ('merged', union_find.find(elements[key])) if key in elements else key
+                if region not in numbers:
+                    numbers[region] = len(numbers) + 1
+                labels.append(numbers[region])
+            tile_labels.append(labels)
+
+        with open(labels_path, 'wb') as labels_file:
+            labels_file.truncate(4 * self.__width * self.__height)
+
+        calls = [(self.__path, self.__width, first, last, value, connectivity, labels_path, labels)
+                 for (first, last), labels in zip(self.get_tiles(), tile_labels)]
+        if processes:
+            with ProcessPoolExecutor(processes) as pool:
+                list(pool.map(_write_tile_labels, *zip(*calls)))
+        else:
+            for call in calls:
+                _write_tile_labels(*call)
+        return count
+
+    def spread_time(self, source=2, target=1, connectivity=4, processes=None):
+        """
+        Simulate a multi-source spread (see grid_analysis.spread_time) tile by tile. Each tile is
+        simulated with the neighboring rows of the tiles above and below as extra sources, and
+        tiles are revisited until their boundary rows stop changing, so a spread that winds back
+        and forth between tiles takes more sweeps. Without processes, tiles are swept alternately
+        down and up, each seeing its neighbors' latest boundaries; with processes, all tiles are
+        simulated in parallel each round.
+        Only the first and last row of every tile are kept, in a temporary file next to the grid.
+        Parameters:
+        source (integer): The value of cells that spread.
+        target (integer): The value of cells that can be converted.
+        connectivity (integer): 4 to spread across edges, 8 to also spread diagonally.
+        processes (integer): The number of worker processes, or None to work in this process.
+        Returns:
+        integer: The number of steps until no target cells remain, or -1 if some can never be reached.
+        """
+        if connectivity not in (4, 8):
+            raise ValueError('connectivity must be 4 or 8')
+        if not self.__height:
+            return 0
+
+        descriptor, boundary_path = tempfile.mkstemp(suffix='.boundary',
+                                                     dir=os.path.dirname(os.path.abspath(self.__path)))
+        os.close(descriptor)
+        try:
+            return self.__spread(source, target, connectivity, processes, boundary_path)
+        finally:
+            os.remove(boundary_path)
+
+    def __spread(self, source, target, connectivity, processes, boundary_path):
+        tiles = self.get_tiles()
+        row_size = 4 * self.__width
+        unknown = (array('i', [-1]) * self.__width).tobytes()
+        with open(boundary_path, 'wb') as boundary_file:
+            for _ in range(2 * len(tiles)):
+                boundary_file.write(unknown)
+
+        summaries = [None] * len(tiles)
+
+        def store(tile, result, boundary_file):
+            """Write a tile's boundary rows if they changed, and report whether they did."""
+            top, bottom, last_step, unreached = result
+            summaries[tile] = (last_step, unreached)
+            boundary_file.seek(2 * tile * row_size)
+            if boundary_file.read(2 * row_size) == top + bottom:
+                return False
+            boundary_file.seek(2 * tile * row_size)
+            boundary_file.write(top + bottom)
+            return True
+
+        calls = [(self.__path, self.__width, first, last, tile, len(tiles), boundary_path,
+                  source, target, connectivity) for tile, (first, last) in enumerate(tiles)]
+        pool = ProcessPoolExecutor(processes) if processes else None
+        try:
+            with open(boundary_path, 'r+b') as boundary_file:
+                changed = True
+                sweep = 0
+                while changed:
+                    changed = False
+                    if pool:
+                        # Jacobi rounds: every tile reads the boundaries of the previous round
+                        boundary_file.flush()
+                        for tile, result in enumerate(pool.map(_spread_tile, *zip(*calls))):
+                            changed |= store(tile, result, boundary_file)
+                    else:
+                        # Gauss-Seidel sweeps: every tile sees its neighbors' newest boundaries
+                        order = range(len(tiles)) if sweep % 2 == 0 else reversed(range(len(tiles)))
+                        for tile in order:
+                            boundary_file.flush()
+                            changed |= store(tile, _spread_tile(*calls[tile]), boundary_file)
+                    sweep += 1
+        finally:
+            if pool:
+                pool.shutdown()
+
+        if any(unreached for _, unreached in summaries):
+            return -1
+        return max(last_step for last_step, _ in summaries)
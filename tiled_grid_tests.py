@@ -0,0 +1,77 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from array import array
+
+import grid_analysis
+from challenges import numIslands, timeToRot
+from tiled_grid import TiledGrid
+
+
+class TiledGridTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'grid')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_matches_in_memory(self):
+        """Tiled results agree with the in-memory engine, whatever the tile size."""
+        rng = random.Random(13)
+        for _ in range(50):
+            width = rng.randint(1, 10)
+            grid = [[rng.choice([0, 1, 1, 2, -1, 257]) for _ in range(width)] for _ in range(rng.randint(1, 10))]
+            tiled = TiledGrid.create(self.path, grid, tile_rows=rng.randint(1, 4))
+            for connectivity in (4, 8):
+                assert tiled.count_regions(connectivity=connectivity) == \
+                    grid_analysis.count_regions(grid, connectivity=connectivity)
+                assert tiled.spread_time(connectivity=connectivity) == \
+                    grid_analysis.spread_time(grid, connectivity=connectivity)
+
+    def test_label_regions(self):
+        grid = [
+            [1, 1, 0, 1],
+            [0, 1, 0, 1],
+            [1, 1, 0, 0],
+        ]
+        tiled = TiledGrid.create(self.path, grid, tile_rows=1)
+        labels_path = os.path.join(self.directory, 'labels')
+        assert tiled.label_regions(labels_path) == 2
+
+        labels = array('i')
+        with open(labels_path, 'rb') as labels_file:
+            labels.fromfile(labels_file, 12)
+        assert list(labels) == [1, 1, 0, 2, 0, 1, 0, 2, 1, 1, 0, 0]
+
+    def test_winding_spread(self):
+        """A spread that crosses tile boundaries several times needs repeated sweeps."""
+        grid = [
+            [2, 1, 1, 1],
+            [0, 0, 0, 1],
+            [1, 1, 1, 1],
+            [1, 0, 0, 0],
+            [1, 1, 1, 1],
+        ]
+        tiled = TiledGrid.create(self.path, grid, tile_rows=1)
+        assert tiled.spread_time() == grid_analysis.spread_time(grid) == 13
+        assert tiled.spread_time(processes=2) == 13
+
+    def test_input_untouched(self):
+        grid = [[2, 1, 0], [0, 1, 1]]
+        tiled = TiledGrid.create(self.path, grid, tile_rows=1)
+        assert timeToRot(tiled) == 3
+        assert numIslands(tiled) == 1
+        assert tiled.read_rows(0, 2) == [bytes([2, 1, 0]), bytes([0, 1, 1])]
+        assert sorted(os.listdir(self.directory)) == ['grid']
+
+    def test_bad_width(self):
+        TiledGrid.create(self.path, [[1, 0, 1]])
+        with self.assertRaises(ValueError):
+            TiledGrid(self.path, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
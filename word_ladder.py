@@ -0,0 +1,140 @@
+class WordLadderIndex(object):
+    """
+    An index of a word list for word ladder queries. Every word is filed under its wildcard
+    patterns, one per letter (e.g. 'hot' under '*ot', 'h*t' and 'ho*'), so the words one letter
+    away from any word are found with a few dictionary lookups instead of a scan of the list.
+    Build it once and reuse it for any number of queries.
+    """
+
+    def __init__(self, words):
+        """
+        Index a word list.
+        Parameters:
+        words (iterable<string>): The words ladders may step through.
+        """
+        self.__words = set(words)
+        self.__patterns = {}  # wildcard pattern -> words matching it
+        for word in self.__words:
+            for position in range(len(word)):
+                pattern = word[:position] + '*' + word[position + 1:]
+                self.__patterns.setdefault(pattern, []).append(word)
+
+    def __len__(self):
+        return len(self.__words)
+
+    def __contains__(self, word):
+        return word in self.__words
+
+    def neighbors(self, word):
+        """
+        Yield the indexed words that differ from `word` in exactly one letter.
+        The word itself does not have to be indexed.
+        """
+        patterns = self.__patterns
+        for position in range(len(word)):
+            for other in patterns.get(word[:position] + '*' + word[position + 1:], ()):
+                if other != word:
+                    yield other
+
+    def __search(self, begin_word, end_word):
+        """
+        Bidirectional breadth-first search, expanding a whole level of the smaller side at a time.
+        Returns:
+        tuple: For each side, a dict from every word it reached to the words one step closer to
+            that side's start, and the words where the sides met on a shortest ladder; or None if
+            no ladder exists.
+        """
+        if end_word not in self.__words or len(begin_word) != len(end_word):
+            return None
+        forward = {begin_word: []}
+        backward = {end_word: []}
+        if begin_word == end_word:
+            return forward, backward, [begin_word]
+
+        patterns = self.__patterns
+        forward_frontier = [begin_word]
+        backward_frontier = [end_word]
+        while forward_frontier and backward_frontier:
+            expand_forward = len(forward_frontier) <= len(backward_frontier)
+            parents, other = (forward, backward) if expand_forward else (backward, forward)
+            frontier = forward_frontier if expand_forward else backward_frontier
+
+            # collect every parent of each new word, so that all shortest ladders are kept
+            level = {}
+            for word in frontier:
+                for position in range(len(word)):
+                    for neighbor in patterns.get(word[:position] + '*' + word[position + 1:], ()):
+                        if neighbor not in parents:  # also skips the word itself
+                            level.setdefault(neighbor, []).append(word)
+            parents.update(level)
+
+            # the first level that touches the other side only touches its deepest level,
+            # so every meeting word lies on a shortest ladder
+            meeting = [word for word in level if word in other]
+            if meeting:
+                return forward, backward, meeting
+
+            if expand_forward:
+                forward_frontier = list(level)
+            else:
+                backward_frontier = list(level)
+
+        return None
+
+    def ladder_length(self, begin_word, end_word):
+        """
+        Return the number of words in the shortest ladder from `begin_word` to `end_word`, where
+        each step changes one letter and every word after the first is indexed.
+        Parameters:
+        begin_word (string): The first word; it does not have to be indexed.
+        end_word (string): The last word.
+        Returns:
+        integer: The number of words in the ladder, or 0 if there is none.
+        """
+        ladder = self.find_ladder(begin_word, end_word)
+        return len(ladder) if ladder else 0
+
+    def find_ladder(self, begin_word, end_word):
+        """
+        Return one shortest ladder from `begin_word` to `end_word` (see ladder_length).
+        Returns:
+        list<string>: The words of the ladder, or None if there is none.
+        """
+        found = self.__search(begin_word, end_word)
+        if found is None:
+            return None
+        forward, backward, meeting = found
+        return _ladder(next(_chains(forward, meeting[0])), next(_chains(backward, meeting[0])))
+
+    def find_all_ladders(self, begin_word, end_word):
+        """
+        Return every shortest ladder from `begin_word` to `end_word` (see ladder_length).
+        There can be exponentially many of them.
+        Returns:
+        list<list<string>>: The ladders in sorted order; empty if there are none.
+        """
+        found = self.__search(begin_word, end_word)
+        if found is None:
+            return []
+        forward, backward, meeting = found
+        return sorted(_ladder(first_half, second_half)
+                      for word in meeting
+                      for first_half in _chains(forward, word)
+                      for second_half in _chains(backward, word))
+
+
+def _chains(parents, word):
+    """Yield every chain of parents from `word` back to a search start, starting with `word`."""
+    stack = [[word]]
+    while stack:
+        chain = stack.pop()
+        steps = parents[chain[-1]]
+        if not steps:
+            yield chain
+        for parent in steps:
+            stack.append(chain + [parent])
+
+
+def _ladder(forward_chain, backward_chain):
+    """Join the chains from a meeting word back to the begin word and on to the end word."""
+    return forward_chain[::-1] + backward_chain[1:]
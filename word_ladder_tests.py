@@ -0,0 +1,40 @@
+import unittest
+
+import challenges
+from word_ladder import WordLadderIndex
+
+
+class WordLadderIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.index = WordLadderIndex(["hot", "dot", "dog", "lot", "log", "cog"])
+
+    def test_neighbors(self):
+        assert sorted(self.index.neighbors("hot")) == ["dot", "lot"]
+        assert sorted(self.index.neighbors("hit")) == ["hot"]
+
+    def test_ladders(self):
+        assert self.index.ladder_length("hit", "cog") == 5
+        assert self.index.find_ladder("hit", "cog") in self.index.find_all_ladders("hit", "cog")
+        assert self.index.find_all_ladders("hit", "cog") == [
+            ["hit", "hot", "dot", "dog", "cog"],
+            ["hit", "hot", "lot", "log", "cog"],
+        ]
+
+    def test_no_ladder(self):
+        """The end word must be in the list, and words of other lengths are never reached."""
+        assert self.index.ladder_length("hit", "cot") == 0
+        assert self.index.find_ladder("hit", "hat") is None
+        assert self.index.find_all_ladders("hits", "cog") == []
+        assert WordLadderIndex(["abc", "xyz"]).ladder_length("abc", "xyz") == 0
+
+    def test_challenges(self):
+        words = ["hot", "dot", "dog", "lot", "log"]
+        assert challenges.wordLadderLength("hit", "cog", words) == 0
+        assert challenges.wordLadderLength("hit", "log", words) == 4
+        assert challenges.wordLadders("hit", "dog", words) == [["hit", "hot", "dot", "dog"]]
+        words.append("cog")  # every call sees the list as it is now
+        assert challenges.wordLadderLength("hit", "cog", words) == 5
+
+
+if __name__ == '__main__':
+    unittest.main()